@@ -0,0 +1,71 @@
+"""Microbenchmark: per-image CPU cost of reference image normalization.
+
+Compares the previous open → verify → reopen → thumbnail → re-encode path
+with the single-decode ``normalize_reference`` in ``utils/image_ops.py``.
+
+Run with: python benchmarks/bench_ref_normalize.py
+"""
+
+from __future__ import annotations
+
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from image_agent.utils.image_ops import normalize_reference
+from image_agent.utils.image_hash import dhash
+
+MAX_SIZE = (1024, 1024)
+ROUNDS = 20
+
+
+def _legacy_normalize(raw_bytes: bytes, max_size: tuple[int, int]) -> bytes:
+    """The pre-single-decode implementation, kept here for comparison."""
+    img = Image.open(io.BytesIO(raw_bytes))
+    img.verify()
+    img = Image.open(io.BytesIO(raw_bytes))
+    img.thumbnail(max_size, Image.LANCZOS)
+    dhash(img)
+    buf = io.BytesIO()
+    fmt = img.format or "PNG"
+    if fmt.upper() not in ("JPEG", "PNG", "WEBP"):
+        fmt = "PNG"
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _sample(size: tuple[int, int], fmt: str) -> bytes:
+    rng = np.random.default_rng(0)
+    small = (rng.random((size[1] // 16, size[0] // 16, 3)) * 255).astype("uint8")
+    img = Image.fromarray(small).resize(size, Image.BICUBIC)
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _cpu_ms(fn, raw: bytes) -> float:
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        fn(raw, MAX_SIZE)
+    return (time.process_time() - start) / ROUNDS * 1000
+
+
+def main() -> None:
+    cases = {
+        "jpeg 4000x3000": _sample((4000, 3000), "JPEG"),
+        "jpeg 2048x1536": _sample((2048, 1536), "JPEG"),
+        "jpeg 900x700": _sample((900, 700), "JPEG"),
+        "png 1600x1200": _sample((1600, 1200), "PNG"),
+        "png 800x800": _sample((800, 800), "PNG"),
+    }
+    print(f"{'case':<16}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name, raw in cases.items():
+        before = _cpu_ms(_legacy_normalize, raw)
+        after = _cpu_ms(normalize_reference, raw)
+        print(f"{name:<16}{before:>12.1f}{after:>12.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
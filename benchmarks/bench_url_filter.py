@@ -0,0 +1,79 @@
+"""Microbenchmark: reference image URL filtering over 100k synthetic URLs.
+
+Compares the previous per-pattern loop (eleven ``re.search`` calls plus
+``urlparse``, no host check) with ``UrlFilter`` — one compiled
+alternation and a reversed-label domain suffix trie.
+
+Run with: python benchmarks/bench_url_filter.py
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import time
+from urllib.parse import urlparse
+
+from image_agent.nodes.ref_images import _BAD_URL_PATTERNS, _url_filter
+from image_agent.nodes.research import _EXCLUDED_DOMAINS
+
+N_URLS = 100_000
+
+_LEGACY_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in [*_BAD_URL_PATTERNS, r"i\.ytimg\.com"]
+]
+
+_GOOD_HOSTS = [
+    "upload.wikimedia.org", "images.metmuseum.org", "cdn.britannica.com",
+    "static.wikia.nocookie.net", "www.artic.edu", "media.nga.gov",
+]
+_PATHS = [
+    "/wikipedia/commons/a/ab/{n}_painting.jpg",
+    "/images/collection/{n}/full.png",
+    "/media/{n}/hero-image.webp",
+    "/thumb/a/ab/{n}/120px-Thing.png",
+    "/youtube/vi/{n}/hqdefault.jpg",
+    "/assets/logo_{n}.png",
+    "/img/placeholder-{n}.jpg",
+    "/anim/{n}.gif",
+    "/i/{n}",
+]
+
+
+def _legacy_is_quality_url(url: str) -> bool:
+    for pattern in _LEGACY_PATTERNS:
+        if pattern.search(url):
+            return False
+    return len(urlparse(url).path.strip("/")) >= 8
+
+
+def _synthetic_urls(n: int) -> list[str]:
+    rng = random.Random(0)
+    stock_hosts = [f"{sub}.{d}" for d in _EXCLUDED_DOMAINS for sub in ("www", "cdn", "images")]
+    urls = []
+    for i in range(n):
+        host = rng.choice(stock_hosts) if rng.random() < 0.25 else rng.choice(_GOOD_HOSTS)
+        urls.append(f"https://{host}" + rng.choice(_PATHS).format(n=i))
+    return urls
+
+
+def main() -> None:
+    urls = _synthetic_urls(N_URLS)
+    url_filter = _url_filter()
+
+    start = time.perf_counter()
+    legacy_kept = [u for u in urls if _legacy_is_quality_url(u)]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = url_filter.filter(urls)
+    engine_s = time.perf_counter() - start
+
+    print(f"{'filter':<10}{'seconds':>10}{'urls/s':>12}{'kept':>9}")
+    print(f"{'legacy':<10}{legacy_s:>10.3f}{N_URLS / legacy_s:>12,.0f}{len(legacy_kept):>9}")
+    print(f"{'engine':<10}{engine_s:>10.3f}{N_URLS / engine_s:>12,.0f}{len(result.kept):>9}")
+    print(f"speedup {legacy_s / engine_s:.1f}x  rejected by reason: {dict(result.rejected)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from rich.table import Table
 
 from image_agent.graph import compile_graph
 from image_agent.history import list_history, clear_history
+from image_agent.utils.blobs import release_blobs, retain_blobs
 
 app = typer.Typer(
     name="image-agent",
@@ -20,12 +21,19 @@ app = typer.Typer(
 )
 console = Console()
 
+providers_app = typer.Typer(help="Image provider health and circuit breakers", no_args_is_help=True)
+app.add_typer(providers_app, name="providers")
+
 
 @app.command()
 def generate(
     prompt: str = typer.Argument(..., help="Image generation prompt"),
     provider: Optional[str] = typer.Option(None, help="Force provider: gemini, openai, or flux"),
     size: str = typer.Option("1024x1024", help="Image size"),
+    hedge: Optional[bool] = typer.Option(
+        None, "--hedge/--no-hedge", help="Race a second provider (default: HEDGE_ENABLED)"
+    ),
+    seed: Optional[int] = typer.Option(None, help="Generation seed (Flux text-to-image, Gemini)"),
 ):
     """Generate an image from a text prompt with internet research."""
     console.print(Panel(f"[bold]Prompt:[/bold] {prompt}", title="Image Agent"))
@@ -35,8 +43,15 @@ def generate(
     initial_state = {"original_prompt": prompt, "skip_suggestions": True}
     if provider:
         initial_state["provider"] = provider
+    if hedge is not None:
+        initial_state["hedge"] = hedge
+    generation_params = {}
     if size != "1024x1024":
-        initial_state["generation_params"] = {"size": size}
+        generation_params["size"] = size
+    if seed is not None:
+        generation_params["seed"] = seed
+    if generation_params:
+        initial_state["generation_params"] = generation_params
     config = {"configurable": {"thread_id": str(uuid.uuid4())}}
 
     with console.status("[bold green]Working..."):
@@ -92,13 +107,14 @@ def enhance(
 
     # Manually run just the research + enhance steps
     from image_agent.nodes.router import router_node
-    from image_agent.nodes.research import research_node
+    from image_agent.nodes.research import research_node, synthesize_node
     from image_agent.nodes.enhance import enhance_node
 
     with console.status("[bold green]Researching & enhancing..."):
         state = {"original_prompt": prompt}
         state.update(router_node(state))
         state.update(research_node(state))
+        state.update(synthesize_node(state))
         state.update(enhance_node(state))
 
     console.print("\n[bold]Enhanced prompt:[/bold]")
@@ -145,6 +161,53 @@ def history(
     console.print(table)
 
 
+@providers_app.command("status")
+def providers_status():
+    """Show circuit breaker state, error rate and latency per provider."""
+    from image_agent.config import get_settings
+    from image_agent.nodes.generate import provider_model
+    from image_agent.providers.health import get_provider_health
+
+    health = get_provider_health()
+    if health is None:
+        console.print("[dim]Provider health tracking is disabled.[/dim]")
+        return
+
+    settings = get_settings()
+    providers = list(dict.fromkeys([*settings.provider_fallback_chain, "gemini", "flux", "openai"]))
+    state_styles = {"closed": "green", "half_open": "yellow", "open": "red"}
+
+    table = Table(title="Provider Health")
+    table.add_column("Provider", style="cyan")
+    table.add_column("Model")
+    table.add_column("Circuit")
+    table.add_column("Calls", justify="right")
+    table.add_column("Errors", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Last error", max_width=40, style="dim")
+
+    for provider in providers:
+        snap = health.snapshot(provider, provider_model(provider))
+        circuit = f"[{state_styles[snap['state']]}]{snap['state']}[/]"
+        if snap["retry_in_s"] is not None:
+            circuit += f" ({snap['retry_in_s']:.0f}s)"
+        table.add_row(
+            provider,
+            snap["model"],
+            circuit,
+            str(snap["calls"]),
+            f"{snap['error_rate']:.0%}" if snap["error_rate"] is not None else "-",
+            f"{snap['p50_s']:.1f}s" if snap["p50_s"] is not None else "-",
+            f"{snap['p95_s']:.1f}s" if snap["p95_s"] is not None else "-",
+            snap["last_error"] or "",
+        )
+
+    console.print(table)
+    if settings.provider_fallback_chain:
+        console.print(f"[dim]Fallback chain: {' → '.join(settings.provider_fallback_chain)}[/dim]")
+
+
 @app.command()
 def chat():
     """Interactive REPL for generating images."""
@@ -213,12 +276,16 @@ def chat():
                 # Carry reference image data from Phase 1
                 "reference_images": last_phase1_result.get("reference_images"),
                 "reference_image_analysis": last_phase1_result.get("reference_image_analysis"),
+                "reference_image_features": last_phase1_result.get("reference_image_features"),
                 "enhanced_prompt": None,
                 "error": None,
                 "image_path": None,
                 "generation_metadata": None,
             }
             phase2_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            # The Phase 2 run releases its reference images; keep ours for re-picks
+            retain_blobs(phase2_state["reference_images"])
+            phase2_state["reference_images_owned"] = True
 
             with console.status("[bold green]Creating your image..."):
                 result = graph.invoke(phase2_state, phase2_config)
@@ -254,6 +321,10 @@ def chat():
             "selected_suggestion": None,
             "skip_suggestions": False,
             "suggestion_phase_complete": False,
+            "reference_images": None,
+            "reference_image_analysis": None,
+            "reference_image_features": None,
+            "reference_images_owned": False,
         }
         with console.status("[bold green]Researching and analyzing..."):
             result = graph.invoke(initial_state, config)
@@ -277,6 +348,10 @@ def chat():
         # We have suggestions — display them and get user choice
         suggestions = result.get("suggestions") or []
         last_suggestions = suggestions if len(suggestions) > 1 else None
+        # Phase 1 stops before response_node, so its reference images stay
+        # held here until a newer Phase 1 result replaces them
+        if last_phase1_result is not None:
+            release_blobs(last_phase1_result.get("reference_images"))
         last_phase1_result = result
         if not suggestions:
             # No suggestions returned (shouldn't happen), proceed without
@@ -306,6 +381,7 @@ def chat():
             # Carry reference image data from Phase 1
             "reference_images": result.get("reference_images"),
             "reference_image_analysis": result.get("reference_image_analysis"),
+            "reference_image_features": result.get("reference_image_features"),
             # Reset output fields
             "enhanced_prompt": None,
             "error": None,
@@ -315,6 +391,8 @@ def chat():
 
         # Use a fresh thread for Phase 2 so we don't collide with Phase 1 checkpoint
         phase2_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        retain_blobs(phase2_state["reference_images"])
+        phase2_state["reference_images_owned"] = True
 
         with console.status("[bold green]Creating your image..."):
             result = graph.invoke(phase2_state, phase2_config)
@@ -426,11 +504,22 @@ def _get_user_selection(suggestions: list[dict]) -> str | None:
 def _print_result(result: dict) -> None:
     """Pretty-print a generation result."""
     image_path = result.get("image_path", "?")
-    provider = (result.get("generation_metadata") or {}).get("provider", "?")
+    metadata = result.get("generation_metadata") or {}
+    provider = metadata.get("provider", "?")
     enhanced = result.get("enhanced_prompt") or ""
 
     console.print(f"\n[bold green]Image saved:[/bold green] {image_path}")
-    console.print(f"[bold]Provider:[/bold] {provider}")
+    console.print(f"[bold]Provider:[/bold] {provider}" + (" (cached)" if metadata.get("cached") else ""))
+    hedge = metadata.get("hedge")
+    if hedge:
+        latencies = "  ".join(
+            f"{p} {s:.1f}s" if s is not None else f"{p} cancelled"
+            for p, s in hedge["latencies"].items()
+        )
+        console.print(f"[bold]Hedge:[/bold] {hedge['trigger']}  {latencies}")
+    alternate = metadata.get("alternate")
+    if alternate:
+        console.print(f"[bold]Alternate ({alternate['provider']}):[/bold] {alternate['image_path']}")
 
     if enhanced:
         console.print(f"\n[bold]Enhanced prompt:[/bold]")
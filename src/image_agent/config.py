@@ -35,8 +35,28 @@ class Settings(BaseSettings):
     # Output
     output_dir: Path = Path("output")
 
+    # On-disk caches (defaults to <output_dir>/.cache)
+    cache_dir: Path | None = None
+
     # Research settings
     tavily_max_results: int = 5
+    research_deadline_s: float = 20.0  # shared deadline for all concurrent searches
+    research_query_timeout_s: float = 12.0  # per-search timeout
+
+    # Research cache (raw Tavily responses + synthesized context)
+    research_cache_enabled: bool = True
+    research_cache_search_ttl_s: float = 24 * 3600
+    research_cache_synthesis_ttl_s: float = 3 * 24 * 3600
+    research_cache_max_entries: int = 2000
+
+    # Local extractive compression of search snippets before synthesis
+    research_compression_enabled: bool = True
+    research_context_token_budget: int = 1200
+    research_dedup_threshold: float = 0.7  # estimated Jaccard for near-duplicates
+
+    # Speculative research: start subject-only searches while the router runs
+    research_speculative: bool = True
+    research_speculative_min_similarity: float = 0.5  # router subject vs raw prompt
 
     # Pipeline logging
     pipeline_logging: bool = True
@@ -46,6 +66,121 @@ class Settings(BaseSettings):
     ref_images_max_download: int = 5
     ref_images_max_pass_to_model: int = 3
     ref_image_analysis_model: str = "gpt-4o-mini"
+    # "batch": one vision request for the final set; "incremental": one request
+    # per image as its download completes, merged locally at the end;
+    # "local": skip the vision model and rely on the local NumPy features
+    ref_image_analysis_mode: str = "batch"
+    ref_image_features_enabled: bool = True  # palette / tone / framing computed locally
+    ref_image_palette_size: int = 5
+    # Race mode: start more downloads than needed, keep the first good
+    # max_pass_to_model (preferring higher-priority URLs within the budget)
+    ref_images_race_enabled: bool = True
+    ref_images_race_candidates: int = 8
+    ref_images_race_budget_s: float = 4.0
+    # Perceptual-hash dedup of near-identical references (Hamming distance in bits)
+    ref_images_dedup_enabled: bool = True
+    ref_images_dedup_threshold: int = 6
+    ref_images_max_bytes: int = 8 * 1024 * 1024  # hard cap per streamed download
+    ref_images_min_dimension: int = 256  # longest side, checked from the header
+    ref_images_max_pixels: int = 40_000_000
+    # Image hosts to skip in addition to the research exclusion list
+    ref_images_excluded_domains: list[str] = []
+    # Local quality scoring (sharpness, entropy, letterbox, text density):
+    # rank decoded images, drop those below the floor, analyze only the top
+    # max_pass_to_model
+    ref_images_quality_enabled: bool = True
+    ref_images_min_quality: float = 0.3
+
+    # Shared download engine (pooled httpx client)
+    download_max_connections: int = 16
+    download_max_per_host: int = 4
+    download_http2: bool = True
+    download_timeout_s: float = 15.0  # default / ceiling for reference image downloads
+
+    # Provider health: per provider/model circuit breakers over a rolling
+    # window. The generate step falls through provider_fallback_chain,
+    # skipping providers whose circuit is open ([] disables fallback). It
+    # stops when a provider rejects the request (4xx other than 408/429), and
+    # an explicit --provider is used alone unless provider_fallback_explicit.
+    provider_fallback_chain: list[str] = ["gemini", "flux", "openai"]
+    provider_fallback_explicit: bool = False
+    provider_health_enabled: bool = True
+    provider_health_window_s: float = 15 * 60
+    provider_health_max_events: int = 100  # per provider/model
+    provider_health_ttl_s: float = 7 * 24 * 3600
+    provider_breaker_consecutive_failures: int = 3
+    provider_breaker_error_rate: float = 0.5
+    provider_breaker_min_samples: int = 8  # in the window, before the error rate counts
+    provider_breaker_open_s: float = 60.0  # cooldown before a half-open probe
+
+    # Adaptive provider selection: EWMA latency / success rate per (provider,
+    # style, size). When enabled, pick the candidate with the lowest expected
+    # latency among those meeting the success floor, exploring a random
+    # candidate with probability epsilon. Only list providers whose output
+    # quality is acceptable for the default path.
+    provider_adaptive_enabled: bool = False
+    provider_adaptive_candidates: list[str] = ["gemini", "flux", "openai"]
+    provider_adaptive_min_success: float = 0.9
+    provider_adaptive_epsilon: float = 0.05
+    provider_adaptive_alpha: float = 0.2  # EWMA weight of the newest call
+    provider_adaptive_min_samples: int = 5  # before an estimate is trusted
+    provider_adaptive_ttl_s: float = 30 * 24 * 3600
+
+    # Hedged generation: if the selected provider has no valid image after
+    # hedge_delay_s (0 = hedge immediately), send the same prompt to the next
+    # provider in hedge_providers; the first valid image wins
+    hedge_enabled: bool = False
+    hedge_delay_s: float = 8.0
+    hedge_providers: list[str] = ["gemini", "flux", "openai"]
+    # Keep the loser's image as an alternate if it lands within the wait
+    hedge_keep_alternate: bool = False
+    hedge_alternate_wait_s: float = 20.0
+
+    # Shared provider / LLM API clients (one pooled client per service)
+    client_max_connections: int = 32
+    client_max_keepalive: int = 16
+    client_http2: bool = True
+
+    # Host reputation: skip hosts that keep failing, derive timeouts from p95
+    # latency (x multiplier), and favour fast, reliable hosts. Only transport
+    # errors, timeouts and 403/429/5xx count as host failures.
+    host_reputation_enabled: bool = True
+    host_reputation_block_after: int = 2  # consecutive failures
+    host_reputation_block_min_samples: int = 4  # recent outcomes before blocking
+    host_reputation_block_failure_rate: float = 0.5  # over the recent outcomes
+    host_reputation_block_ttl_s: float = 6 * 3600
+    host_reputation_timeout_multiplier: float = 3.0
+    host_reputation_min_timeout_s: float = 3.0
+    host_reputation_ttl_s: float = 30 * 24 * 3600  # forget hosts not seen for this long
+    host_reputation_max_hosts: int = 5000
+
+    # Exact-match generation cache (opt-in): provider + model + prompt used +
+    # mapped size + quality + seed + reference image hashes -> image bytes.
+    # Re-running the same request returns the stored image without a call.
+    generation_cache_enabled: bool = False
+    generation_cache_ttl_s: float = 30 * 24 * 3600
+    generation_cache_max_entries: int = 2000
+    generation_cache_max_bytes: int = 1024 * 1024 * 1024
+
+    # Vision analysis cache keyed by reference image hashes + subject + model + prompt
+    ref_image_analysis_cache_enabled: bool = True
+    ref_image_analysis_cache_ttl_s: float = 7 * 24 * 3600
+    ref_image_analysis_cache_max_entries: int = 2000
+    ref_image_analysis_cache_max_bytes: int = 16 * 1024 * 1024
+
+    # Process pool for CPU-bound image work (0 workers = cpu_count - 1)
+    image_pool_enabled: bool = True
+    image_pool_workers: int = 0
+    image_pool_inline_threshold_bytes: int = 256 * 1024  # smaller inputs run in-process
+
+    # In-memory store for image bytes referenced by handle from graph state
+    blob_store_max_bytes: int = 512 * 1024 * 1024
+
+    # Reference image cache (normalized bytes keyed by URL and content hash)
+    ref_image_cache_enabled: bool = True
+    ref_image_cache_ttl_s: float = 7 * 24 * 3600  # revalidate with the origin after this
+    ref_image_cache_max_entries: int = 10000
+    ref_image_cache_max_bytes: int = 256 * 1024 * 1024
 
 
 @lru_cache
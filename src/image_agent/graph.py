@@ -1,23 +1,80 @@
-"""LangGraph StateGraph definition and compilation."""
+"""LangGraph StateGraph definition and compilation.
+
+Network-bound nodes are registered with both a sync and an async body, so
+the compiled graph runs them natively under ``invoke`` and ``ainvoke``;
+nodes with only a sync body (CPU / thread-pool work such as ref_images and
+save) are run in LangGraph's executor under ``ainvoke``.
+"""
 
 from __future__ import annotations
 
+from typing import Awaitable, Callable
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, START, StateGraph
 from langgraph.checkpoint.memory import MemorySaver
 
+from image_agent.config import get_settings
 from image_agent.state import ImageAgentState
-from image_agent.nodes.router import router_node
-from image_agent.nodes.research import research_node
+from image_agent.nodes.router import arouter_node, router_node
+from image_agent.nodes.research import (
+    aresearch_node,
+    asynthesize_node,
+    discard_speculative_research,
+    research_node,
+    start_speculative_research,
+    synthesize_node,
+)
 from image_agent.nodes.ref_images import ref_images_node
-from image_agent.nodes.enhance import enhance_node
-from image_agent.nodes.suggest import suggest_node
+from image_agent.nodes.enhance import aenhance_node, enhance_node
+from image_agent.nodes.suggest import asuggest_node, suggest_node
 from image_agent.nodes.provider import provider_select_node
-from image_agent.nodes.generate import openai_generate_node, flux_generate_node, gemini_generate_node
-from image_agent.nodes.edit import edit_node
+from image_agent.nodes.generate import (
+    aflux_generate_node,
+    agemini_generate_node,
+    aopenai_generate_node,
+    flux_generate_node,
+    gemini_generate_node,
+    openai_generate_node,
+)
+from image_agent.nodes.edit import aedit_node, edit_node
+from image_agent.nodes.hedge import ahedged_generate_node, hedged_generate_node
 from image_agent.nodes.save import save_node
 from image_agent.nodes.response import response_node
 
 
+def speculative_router_node(state: ImageAgentState) -> dict:
+    """Run the router while subject-only research searches run in parallel.
+
+    The searches use the raw prompt as the subject; research_node reuses
+    them when the router's analysis agrees closely enough.
+    """
+    spec_id = start_speculative_research(state["original_prompt"])
+    return _claim_or_discard(router_node(state), spec_id)
+
+
+async def aspeculative_router_node(state: ImageAgentState) -> dict:
+    """Async ``speculative_router_node``."""
+    spec_id = start_speculative_research(state["original_prompt"])
+    return _claim_or_discard(await arouter_node(state), spec_id)
+
+
+def _claim_or_discard(result: dict, spec_id: str) -> dict:
+    if result.get("action") == "edit":
+        discard_speculative_research(spec_id)
+        spec_id = None
+    result["speculative_research_id"] = spec_id
+    return result
+
+
+def _node(
+    func: Callable[[ImageAgentState], dict],
+    afunc: Callable[[ImageAgentState], Awaitable[dict]],
+) -> RunnableLambda:
+    """A node with a sync body for ``invoke`` and an async one for ``ainvoke``."""
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
 def _route_from_start(state: ImageAgentState) -> str:
     """Route at graph entry: Phase 2 skips straight to enhance."""
     if state.get("suggestion_phase_complete") and state.get("research_context"):
@@ -35,8 +92,13 @@ def _route_after_router(state: ImageAgentState) -> str:
     return "research"
 
 
-def _route_after_ref_images(state: ImageAgentState) -> str:
-    """After ref images, decide whether to suggest or skip to enhance."""
+def research_join_node(state: ImageAgentState) -> dict:
+    """Barrier where research synthesis and reference-image work meet."""
+    return {}
+
+
+def _route_after_research_join(state: ImageAgentState) -> str:
+    """After synthesis + ref images, decide whether to suggest or skip to enhance."""
     if state.get("skip_suggestions") or state.get("action") == "enhance_only":
         return "enhance"
     return "suggest"
@@ -50,7 +112,12 @@ def _route_after_enhance(state: ImageAgentState) -> str:
 
 
 def _route_provider(state: ImageAgentState) -> str:
-    """Route to the correct image provider node."""
+    """Route to the correct image provider node (or the hedged race)."""
+    hedge = state.get("hedge")
+    if hedge is None:
+        hedge = get_settings().hedge_enabled
+    if hedge:
+        return "hedged_generate"
     provider = state.get("provider", "gemini")
     if provider == "flux":
         return "flux_generate"
@@ -64,16 +131,22 @@ def build_graph() -> StateGraph:
     graph = StateGraph(ImageAgentState)
 
     # Add all nodes
-    graph.add_node("router", router_node)
-    graph.add_node("research", research_node)
+    if get_settings().research_speculative:
+        graph.add_node("router", _node(speculative_router_node, aspeculative_router_node))
+    else:
+        graph.add_node("router", _node(router_node, arouter_node))
+    graph.add_node("research", _node(research_node, aresearch_node))
+    graph.add_node("synthesize", _node(synthesize_node, asynthesize_node))
     graph.add_node("ref_images", ref_images_node)
-    graph.add_node("suggest", suggest_node)
-    graph.add_node("enhance", enhance_node)
+    graph.add_node("research_join", research_join_node)
+    graph.add_node("suggest", _node(suggest_node, asuggest_node))
+    graph.add_node("enhance", _node(enhance_node, aenhance_node))
     graph.add_node("provider_select", provider_select_node)
-    graph.add_node("openai_generate", openai_generate_node)
-    graph.add_node("flux_generate", flux_generate_node)
-    graph.add_node("gemini_generate", gemini_generate_node)
-    graph.add_node("edit", edit_node)
+    graph.add_node("openai_generate", _node(openai_generate_node, aopenai_generate_node))
+    graph.add_node("flux_generate", _node(flux_generate_node, aflux_generate_node))
+    graph.add_node("gemini_generate", _node(gemini_generate_node, agemini_generate_node))
+    graph.add_node("hedged_generate", _node(hedged_generate_node, ahedged_generate_node))
+    graph.add_node("edit", _node(edit_node, aedit_node))
     graph.add_node("save", save_node)
     graph.add_node("response", response_node)
 
@@ -89,11 +162,15 @@ def build_graph() -> StateGraph:
         "edit": "edit",
     })
 
-    # Research → ref_images (always)
+    # Research → synthesize ∥ ref_images. Image URLs are known as soon as the
+    # searches return, so downloads and vision analysis overlap the synthesis
+    # LLM call; both branches join before suggest/enhance.
+    graph.add_edge("research", "synthesize")
     graph.add_edge("research", "ref_images")
+    graph.add_edge(["synthesize", "ref_images"], "research_join")
 
-    # Ref images → conditional: suggest or skip to enhance
-    graph.add_conditional_edges("ref_images", _route_after_ref_images, {
+    # Join → conditional: suggest or skip to enhance
+    graph.add_conditional_edges("research_join", _route_after_research_join, {
         "suggest": "suggest",
         "enhance": "enhance",
     })
@@ -112,12 +189,14 @@ def build_graph() -> StateGraph:
         "openai_generate": "openai_generate",
         "flux_generate": "flux_generate",
         "gemini_generate": "gemini_generate",
+        "hedged_generate": "hedged_generate",
     })
 
     # Both generators → save → response → END
     graph.add_edge("openai_generate", "save")
     graph.add_edge("flux_generate", "save")
     graph.add_edge("gemini_generate", "save")
+    graph.add_edge("hedged_generate", "save")
     graph.add_edge("edit", "save")
     graph.add_edge("save", "response")
     graph.add_edge("response", END)
@@ -48,7 +48,7 @@ def clear_history() -> int:
 
     count = 0
     for f in output_dir.iterdir():
-        if f.name == ".gitkeep":
+        if f.name == ".gitkeep" or f.is_dir():
             continue
         f.unlink(missing_ok=True)
         count += 1
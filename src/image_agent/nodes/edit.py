@@ -4,14 +4,14 @@ from __future__ import annotations
 
 from openai import BadRequestError
 
-from image_agent.providers.openai_image import edit_openai_image
-from image_agent.providers.image_utils import image_to_base64
+from image_agent.providers.openai_image import aedit_openai_image, edit_openai_image
 from image_agent.nodes.generate import map_size_openai, _parse_size
 from image_agent.state import ImageAgentState
+from image_agent.utils.blobs import get_blob_store
 
 
-def edit_node(state: ImageAgentState) -> dict:
-    """Edit an existing image using OpenAI's image edit API."""
+def _edit_inputs(state: ImageAgentState) -> tuple[str, str | None, str]:
+    """Return (prompt, source_path, openai_size) for an edit."""
     # For edits, use original_prompt (the user's edit instruction).
     # Enrich with context about what the previous image contained so
     # pronouns like "he", "it" resolve correctly.
@@ -19,25 +19,14 @@ def edit_node(state: ImageAgentState) -> dict:
     last_prompt = state.get("last_prompt")
     if last_prompt:
         prompt = f"Original image: {last_prompt}\nEdit instruction: {prompt}"
-    source_path = state.get("source_image_path")
-
-    if not source_path:
-        return {"error": "No source image provided for editing."}
 
     params = state.get("generation_params", {})
     # Map ideal size to OpenAI-supported size
     w, h = _parse_size(params.get("size", "1024x1024"))
-    openai_size = map_size_openai(w, h)
+    return prompt, state.get("source_image_path"), map_size_openai(w, h)
 
-    try:
-        image_bytes = edit_openai_image(
-            prompt,
-            source_path,
-            size=openai_size,
-        )
-    except BadRequestError as exc:
-        return {"error": f"OpenAI rejected the edit request: {exc.message}"}
 
+def _edited(prompt: str, source_path: str, image_bytes: bytes) -> dict:
     return {
         "generation_metadata": {
             "provider": "openai",
@@ -45,6 +34,42 @@ def edit_node(state: ImageAgentState) -> dict:
             "mode": "edit",
             "prompt_used": prompt,
             "source_image": source_path,
-            "image_b64": image_to_base64(image_bytes),
+            "image_blob": get_blob_store().put(image_bytes),
         },
     }
+
+
+def edit_node(state: ImageAgentState) -> dict:
+    """Edit an existing image using OpenAI's image edit API."""
+    prompt, source_path, openai_size = _edit_inputs(state)
+    if not source_path:
+        return {"error": "No source image provided for editing."}
+
+    try:
+        image_bytes = edit_openai_image(
+            prompt,
+            source_path,
+            size=openai_size,
+        )
+    except BadRequestError as exc:
+        return {"error": f"OpenAI rejected the edit request: {exc.message}"}
+
+    return _edited(prompt, source_path, image_bytes)
+
+
+async def aedit_node(state: ImageAgentState) -> dict:
+    """Async ``edit_node``."""
+    prompt, source_path, openai_size = _edit_inputs(state)
+    if not source_path:
+        return {"error": "No source image provided for editing."}
+
+    try:
+        image_bytes = await aedit_openai_image(
+            prompt,
+            source_path,
+            size=openai_size,
+        )
+    except BadRequestError as exc:
+        return {"error": f"OpenAI rejected the edit request: {exc.message}"}
+
+    return _edited(prompt, source_path, image_bytes)
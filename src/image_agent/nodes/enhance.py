@@ -2,24 +2,16 @@
 
 from __future__ import annotations
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from image_agent.config import get_settings
+from image_agent.providers.clients import get_clients
 from image_agent.prompts.templates import ENHANCE_SYSTEM_PROMPT
 from image_agent.state import ImageAgentState
 from image_agent.utils.logger import log_pipeline_step
 
 
-def enhance_node(state: ImageAgentState) -> dict:
-    """Enhance the user prompt using research context from the internet."""
-    settings = get_settings()
-    llm = ChatOpenAI(
-        model=settings.enhance_model,
-        api_key=settings.openai_api_key,
-        temperature=0.7,
-    )
-
+def _enhance_messages(state: ImageAgentState) -> list:
     research = state.get("research_context", {})
     prompt = state["original_prompt"]
     selected_suggestion = state.get("selected_suggestion")
@@ -47,6 +39,17 @@ Use these visual details as the primary source for how characters and subjects s
 Text research provides context, but visual analysis should take priority for appearance, \
 clothing, colors, and iconographic details."""
 
+    # Measured (not inferred) palette, tone and framing of the same references
+    features_block = ""
+    ref_features = state.get("reference_image_features")
+    if ref_features:
+        features_block = f"""
+
+Measured visual features of the reference images (exact palette hex codes, tone, framing):
+{ref_features}
+
+Use these for the color palette, lighting key/contrast and subject placement."""
+
     user_msg = f"""\
 Realism mode: {realism_mode}
 
@@ -58,20 +61,37 @@ visible element in your output — not just as a modifier of another noun.
 === HOW IT SHOULD LOOK (Visual Details & Style) ===
 Research context:
 {research.get('synthesized', 'No research available')}
-{visual_analysis_block}
+{visual_analysis_block}{features_block}
 {suggestion_block}
 
 Enhance this into a detailed image prompt. The original prompt defines WHAT must be in the scene. \
 Research and visual analysis define HOW it should look. Do not drop any scene elements."""
 
-    response = llm.invoke([
+    return [
         SystemMessage(content=ENHANCE_SYSTEM_PROMPT),
         HumanMessage(content=user_msg),
-    ])
+    ]
 
+
+def _enhance_result(state: ImageAgentState, content: str) -> dict:
     log_pipeline_step(
         "Enhance",
-        f'"{(response.content or "")[:150]}..."'
-        f"  visual_analysis={'yes' if ref_analysis else 'no'}",
+        f'"{(content or "")[:150]}..."'
+        f"  visual_analysis={'yes' if state.get('reference_image_analysis') else 'no'}"
+        f"  visual_features={'yes' if state.get('reference_image_features') else 'no'}",
     )
-    return {"enhanced_prompt": response.content}
+    return {"enhanced_prompt": content}
+
+
+def enhance_node(state: ImageAgentState) -> dict:
+    """Enhance the user prompt using research context from the internet."""
+    llm = get_clients().chat(get_settings().enhance_model, temperature=0.7)
+    response = llm.invoke(_enhance_messages(state))
+    return _enhance_result(state, response.content)
+
+
+async def aenhance_node(state: ImageAgentState) -> dict:
+    """Async ``enhance_node``."""
+    llm = get_clients().chat(get_settings().enhance_model, temperature=0.7)
+    response = await llm.ainvoke(_enhance_messages(state))
+    return _enhance_result(state, response.content)
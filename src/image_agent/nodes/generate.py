@@ -1,16 +1,37 @@
-"""Generation nodes: call OpenAI, Flux, or Gemini to produce an image."""
+"""Generation nodes: call OpenAI, Flux, or Gemini to produce an image.
+
+Each node starts with its own provider and, if that fails or its circuit
+breaker is open, falls through ``provider_fallback_chain`` — unless the
+provider rejected the request itself (a 4xx other than a rate limit), or
+the user chose the provider explicitly. Every call's
+outcome feeds the provider health table. With the generation cache on, an
+exact repeat of a request is answered from disk without a provider call.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from typing import Iterator
 
 from openai import BadRequestError
 
-from image_agent.providers.openai_image import generate_openai_image, generate_openai_image_with_refs
-from image_agent.providers.flux_image import generate_flux_image
-from image_agent.providers.gemini_image import generate_gemini_image
-from image_agent.providers.image_utils import image_to_base64
+from image_agent.config import get_settings
+from image_agent.providers.openai_image import (
+    agenerate_openai_image,
+    agenerate_openai_image_with_refs,
+    generate_openai_image,
+    generate_openai_image_with_refs,
+)
+from image_agent.providers.flux_image import agenerate_flux_image, generate_flux_image
+from image_agent.providers.gemini_image import agenerate_gemini_image, generate_gemini_image
+from image_agent.providers.health import get_provider_health
+from image_agent.providers.selection import get_provider_stats
 from image_agent.state import ImageAgentState
+from image_agent.utils.blobs import get_blob_store
+from image_agent.utils.disk_cache import cache_key
+from image_agent.utils.generation_cache import get_generation_cache
 from image_agent.utils.logger import log_pipeline_step
 
 logger = logging.getLogger(__name__)
@@ -50,120 +71,377 @@ def _parse_size(size_str: str) -> tuple[int, int]:
     return w, h
 
 
-def openai_generate_node(state: ImageAgentState) -> dict:
-    """Generate an image using OpenAI gpt-image-1."""
+# ---------------------------------------------------------------------------
+# Provider calls from state: each returns raw image bytes or raises
+# ---------------------------------------------------------------------------
+
+def _inputs(state: ImageAgentState) -> tuple[str, dict, list[dict], int, int]:
     prompt = state.get("enhanced_prompt") or state["original_prompt"]
     params = state.get("generation_params", {})
     ref_images = state.get("reference_images") or []
+    w, h = _parse_size(params.get("size", "1024x1024"))
+    return prompt, params, ref_images, w, h
 
+
+def _openai_call(state: ImageAgentState):
+    """Return (sync_fn, async_fn, args, kwargs) for OpenAI."""
+    prompt, params, ref_images, w, h = _inputs(state)
     # Map ideal size to OpenAI-supported size
-    w, h = _parse_size(params.get("size", "1024x1024"))
     openai_size = map_size_openai(w, h)
+    quality = params.get("quality", "high")
+    if ref_images:
+        logger.info("Using OpenAI image edit with %d reference images", len(ref_images))
+        return (
+            generate_openai_image_with_refs, agenerate_openai_image_with_refs,
+            (prompt, ref_images), {"size": openai_size, "quality": quality},
+        )
+    return (
+        generate_openai_image, agenerate_openai_image,
+        (prompt,), {"size": openai_size, "quality": quality, "n": params.get("n", 1)},
+    )
 
-    try:
-        if ref_images:
-            logger.info("Using OpenAI image edit with %d reference images", len(ref_images))
-            image_bytes = generate_openai_image_with_refs(
-                prompt,
-                ref_images,
-                size=openai_size,
-                quality=params.get("quality", "high"),
-            )
-        else:
-            image_bytes = generate_openai_image(
-                prompt,
-                size=openai_size,
-                quality=params.get("quality", "high"),
-                n=params.get("n", 1),
-            )
-    except BadRequestError as exc:
-        log_pipeline_step("Generate", "openai \u2717 " + str(exc.message)[:80])
-        return {"error": f"OpenAI rejected the request: {exc.message}"}
-
-    log_pipeline_step("Generate", "openai \u2713")
-    return {
-        "generation_metadata": {
-            "provider": "openai",
-            "model": "gpt-image-1",
-            "prompt_used": prompt,
-            "params": params,
-            "image_b64": image_to_base64(image_bytes),
-        },
+
+def _flux_call(state: ImageAgentState) -> tuple[str, dict]:
+    """Return (prompt, kwargs) for a Flux call."""
+    prompt, params, ref_images, w, h = _inputs(state)
+    # Map ideal size to Flux-compatible size (multiples of 64)
+    width, height = map_size_flux(w, h)
+    kwargs: dict = {"width": width, "height": height, "seed": params.get("seed")}
+    if ref_images:
+        logger.info("Using Flux image-to-image with reference image")
+        kwargs["reference_image"] = ref_images[0]  # Flux supports single ref
+    return prompt, kwargs
+
+
+def _gemini_call(state: ImageAgentState) -> tuple[str, dict]:
+    """Return (prompt, kwargs) for a Gemini call."""
+    prompt, params, ref_images, w, h = _inputs(state)
+    # Map ideal size to Gemini aspect ratio
+    aspect_ratio = map_size_gemini(w, h)
+    if ref_images:
+        logger.info("Using Gemini multimodal with %d reference images", len(ref_images))
+    return prompt, {
+        "aspect_ratio": aspect_ratio,
+        "reference_images": ref_images if ref_images else None,
+        "seed": params.get("seed"),
     }
 
 
-def flux_generate_node(state: ImageAgentState) -> dict:
-    """Generate an image using Flux via Hugging Face Inference API."""
-    prompt = state.get("enhanced_prompt") or state["original_prompt"]
-    params = state.get("generation_params", {})
-    ref_images = state.get("reference_images") or []
+def provider_model(provider: str) -> str:
+    """Model name recorded in metadata (and health stats) for a provider."""
+    if provider == "openai":
+        return "gpt-image-1"
+    if provider == "flux":
+        return "flux-1.1-pro"
+    return get_settings().gemini_image_model
 
-    # Map ideal size to Flux-compatible size (multiples of 64)
-    w, h = _parse_size(params.get("size", "1024x1024"))
-    width, height = map_size_flux(w, h)
 
-    try:
-        if ref_images:
-            logger.info("Using Flux image-to-image with reference image")
-            image_bytes = generate_flux_image(
-                prompt,
-                width=width,
-                height=height,
-                reference_image=ref_images[0],  # Flux supports single ref
-            )
-        else:
-            image_bytes = generate_flux_image(
-                prompt,
-                width=width,
-                height=height,
-            )
-    except Exception as exc:
-        log_pipeline_step("Generate", "flux \u2717 " + str(exc)[:80])
-        return {"error": f"Flux generation failed: {exc}"}
-
-    log_pipeline_step("Generate", "flux \u2713")
+def generation_metadata(state: ImageAgentState, provider: str, image_bytes: bytes) -> dict:
+    """Metadata for an image produced by ``provider`` from state (bytes go to the BlobStore)."""
+    prompt, params, *_ = _inputs(state)
     return {
-        "generation_metadata": {
-            "provider": "flux",
-            "model": "flux-1.1-pro",
-            "prompt_used": prompt,
-            "params": params,
-            "image_b64": image_to_base64(image_bytes),
-        },
+        "provider": provider,
+        "model": provider_model(provider),
+        "prompt_used": prompt,
+        "params": params,
+        "image_blob": get_blob_store().put(image_bytes),
     }
 
 
-def gemini_generate_node(state: ImageAgentState) -> dict:
-    """Generate an image using Gemini 2.5 Flash."""
-    from image_agent.config import get_settings
+# ---------------------------------------------------------------------------
+# Exact-match generation cache
+# ---------------------------------------------------------------------------
 
-    prompt = state.get("enhanced_prompt") or state["original_prompt"]
-    params = state.get("generation_params", {})
-    ref_images = state.get("reference_images") or []
+def generation_cache_key(provider: str, state: ImageAgentState) -> str:
+    """Key on everything the provider request depends on, after size mapping."""
+    prompt, params, ref_images, w, h = _inputs(state)
+    if provider == "openai":
+        size = map_size_openai(w, h)
+    elif provider == "flux":
+        size = "%dx%d" % map_size_flux(w, h)
+        ref_images = ref_images[:1]
+    else:
+        size = map_size_gemini(w, h)
+    return cache_key(
+        provider,
+        provider_model(provider),
+        prompt,
+        size,
+        params.get("quality", "high"),
+        params.get("seed"),
+        [ref["blob"] for ref in ref_images],  # blob handles are content hashes
+    )
 
-    # Map ideal size to Gemini aspect ratio
-    w, h = _parse_size(params.get("size", "1024x1024"))
-    aspect_ratio = map_size_gemini(w, h)
 
-    try:
-        if ref_images:
-            logger.info("Using Gemini multimodal with %d reference images", len(ref_images))
-        image_bytes = generate_gemini_image(
-            prompt,
-            aspect_ratio=aspect_ratio,
-            reference_images=ref_images if ref_images else None,
+def cached_generation(provider: str, state: ImageAgentState) -> dict | None:
+    """Node update for a stored result of this exact request, or None."""
+    cache = get_generation_cache()
+    if cache is None:
+        return None
+    image_bytes = cache.get(generation_cache_key(provider, state))
+    if image_bytes is None:
+        return None
+    log_pipeline_step("Generate", f"{provider} \u2713 (cached)")
+    metadata = generation_metadata(state, provider, image_bytes)
+    metadata["cached"] = True
+    return {"generation_metadata": metadata}
+
+
+def store_generation(provider: str, state: ImageAgentState, image_bytes: bytes) -> None:
+    cache = get_generation_cache()
+    if cache is not None:
+        cache.set(generation_cache_key(provider, state), image_bytes)
+
+
+# ---------------------------------------------------------------------------
+# Provider dispatch and health bookkeeping
+# ---------------------------------------------------------------------------
+
+def call_provider(provider: str, state: ImageAgentState) -> bytes:
+    """Generate with the named provider from state; exceptions propagate."""
+    if provider == "openai":
+        call, _, args, kwargs = _openai_call(state)
+        return call(*args, **kwargs)
+    if provider == "flux":
+        prompt, kwargs = _flux_call(state)
+        return generate_flux_image(prompt, **kwargs)
+    prompt, kwargs = _gemini_call(state)
+    return generate_gemini_image(prompt, **kwargs)
+
+
+async def acall_provider(provider: str, state: ImageAgentState) -> bytes:
+    """Async ``call_provider``."""
+    if provider == "openai":
+        _, acall, args, kwargs = _openai_call(state)
+        return await acall(*args, **kwargs)
+    if provider == "flux":
+        prompt, kwargs = _flux_call(state)
+        return await agenerate_flux_image(prompt, **kwargs)
+    prompt, kwargs = _gemini_call(state)
+    return await agenerate_gemini_image(prompt, **kwargs)
+
+
+def _status_code(exc: Exception) -> int | None:
+    """HTTP status behind an SDK error (OpenAI, google-genai, Hugging Face), if any."""
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    value = getattr(getattr(exc, "response", None), "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_request_rejection(exc: Exception | None) -> bool:
+    """True when the provider refused the request itself (4xx other than timeout / rate limit).
+
+    Another provider would most likely refuse it too, and it says nothing
+    about the provider's health.
+    """
+    if exc is None:
+        return False
+    if isinstance(exc, BadRequestError):
+        return True
+    status = _status_code(exc)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+def record_provider_outcome(
+    provider: str, state: ImageAgentState, seconds: float, exc: Exception | None = None
+) -> None:
+    """Feed one call's outcome to the provider health table and selection stats."""
+    # A rejected prompt is a problem with the request, not the provider
+    rejected = is_request_rejection(exc)
+    if not rejected:
+        style = (state.get("prompt_analysis") or {}).get("style", "").lower().strip()
+        size = (state.get("generation_params") or {}).get("size", "")
+        get_provider_stats().record(provider, style, size, seconds, ok=exc is None)
+    health = get_provider_health()
+    if health is None:
+        return
+    model = provider_model(provider)
+    if exc is None or rejected:
+        health.record_success(provider, model, seconds)
+    else:
+        health.record_failure(provider, model, seconds, str(exc))
+
+
+def provider_available(provider: str, *, claim: bool) -> bool:
+    """False while the provider's circuit is open.
+
+    With ``claim``, a half-open circuit hands out its single probe, and the
+    caller must report the call through ``record_provider_outcome`` (or
+    ``release_provider_probe`` if the call is cancelled).
+    """
+    health = get_provider_health()
+    if health is None:
+        return True
+    model = provider_model(provider)
+    if claim:
+        return health.acquire(provider, model)
+    return health.state(provider, model) != "open"
+
+
+def release_provider_probe(provider: str) -> None:
+    """Give back a probe claimed by ``provider_available`` for a call that was cancelled."""
+    health = get_provider_health()
+    if health is not None:
+        health.release(provider, provider_model(provider))
+
+
+# ---------------------------------------------------------------------------
+# Fallback chain shared by the sync and async nodes
+# ---------------------------------------------------------------------------
+
+_LABELS = {"openai": "OpenAI", "flux": "Flux", "gemini": "Gemini"}
+
+
+def provider_chain(first: str, *, explicit: bool = False) -> list[str]:
+    """The requested provider, then the configured fallbacks in order.
+
+    A provider the user chose explicitly is used alone unless
+    ``provider_fallback_explicit`` is set.
+    """
+    settings = get_settings()
+    if explicit and not settings.provider_fallback_explicit:
+        return [first]
+    return [first] + [p for p in settings.provider_fallback_chain if p != first]
+
+
+def rejection_message(provider: str, exc: Exception) -> str:
+    """User-facing error for a request the provider refused."""
+    detail = str(exc.message) if isinstance(exc, BadRequestError) else str(exc)
+    return f"{_LABELS.get(provider, provider)} rejected the request: {detail}"
+
+
+class _ChainRun:
+    """Walk the provider chain, skipping open circuits and recording outcomes."""
+
+    def __init__(self, state: ImageAgentState, first: str) -> None:
+        self.state = state
+        self.first = first
+        self.chain = provider_chain(first, explicit=bool(state.get("provider_explicit")))
+        self.attempts: list[dict] = []
+        self.skipped: list[str] = []
+        self.errors: list[str] = []
+        self.rejection: str | None = None
+
+    def candidates(self) -> Iterator[str]:
+        for provider in self.chain:
+            if provider_available(provider, claim=True):
+                yield provider
+            else:
+                self.skipped.append(provider)
+                log_pipeline_step("Generate", f"{provider} skipped (circuit open)")
+
+    def failed(self, provider: str, exc: Exception, seconds: float) -> bool:
+        """Record a failed call; False when the chain should stop here."""
+        record_provider_outcome(provider, self.state, seconds, exc)
+        rejected = is_request_rejection(exc)
+        if rejected:
+            error = rejection_message(provider, exc)
+        else:
+            error = f"{_LABELS.get(provider, provider)} generation failed: {exc}"
+        log_pipeline_step("Generate", f"{provider} \u2717 " + str(exc)[:80])
+        self.attempts.append({"provider": provider, "ok": False, "seconds": round(seconds, 3)})
+        self.errors.append(error)
+        if rejected:
+            self.rejection = error
+        return not rejected
+
+    def succeeded(self, provider: str, image_bytes: bytes, seconds: float) -> dict:
+        record_provider_outcome(provider, self.state, seconds)
+        self.attempts.append({"provider": provider, "ok": True, "seconds": round(seconds, 3)})
+        fell_back = provider != self.first
+        log_pipeline_step(
+            "Generate",
+            f"{provider} \u2713" + (f"  (fallback from {self.first})" if fell_back else ""),
         )
-    except Exception as exc:
-        log_pipeline_step("Generate", "gemini \u2717 " + str(exc)[:80])
-        return {"error": f"Gemini generation failed: {exc}"}
+        store_generation(provider, self.state, image_bytes)
+        metadata = generation_metadata(self.state, provider, image_bytes)
+        if fell_back or self.skipped:
+            metadata["fallback"] = {
+                "requested": self.first,
+                "attempts": self.attempts,
+                "skipped": self.skipped,
+                "errors": self.errors,
+            }
+        return {"generation_metadata": metadata}
 
-    log_pipeline_step("Generate", "gemini \u2713")
-    return {
-        "generation_metadata": {
-            "provider": "gemini",
-            "model": get_settings().gemini_image_model,
-            "prompt_used": prompt,
-            "params": params,
-            "image_b64": image_to_base64(image_bytes),
-        },
-    }
+    def exhausted(self) -> dict:
+        if self.rejection is not None:
+            # Surface the provider's reason as-is, not as a chain failure
+            return {"error": self.rejection}
+        if not self.errors:
+            return {"error": f"No image provider available (circuits open: {', '.join(self.skipped)})"}
+        if len(self.errors) == 1:
+            return {"error": self.errors[0]}
+        return {"error": "All image providers failed: " + "; ".join(self.errors)}
+
+
+def generate_with_fallback(state: ImageAgentState, first: str) -> dict:
+    """Generate with ``first``, falling through the chain on failure."""
+    cached = cached_generation(first, state)
+    if cached is not None:
+        return cached
+    run = _ChainRun(state, first)
+    for provider in run.candidates():
+        start = time.perf_counter()
+        try:
+            image_bytes = call_provider(provider, state)
+        except Exception as exc:
+            if run.failed(provider, exc, time.perf_counter() - start):
+                continue
+            break
+        return run.succeeded(provider, image_bytes, time.perf_counter() - start)
+    return run.exhausted()
+
+
+async def agenerate_with_fallback(state: ImageAgentState, first: str) -> dict:
+    """Async ``generate_with_fallback``."""
+    cached = cached_generation(first, state)
+    if cached is not None:
+        return cached
+    run = _ChainRun(state, first)
+    for provider in run.candidates():
+        start = time.perf_counter()
+        try:
+            image_bytes = await acall_provider(provider, state)
+        except asyncio.CancelledError:
+            release_provider_probe(provider)
+            raise
+        except Exception as exc:
+            if run.failed(provider, exc, time.perf_counter() - start):
+                continue
+            break
+        return run.succeeded(provider, image_bytes, time.perf_counter() - start)
+    return run.exhausted()
+
+
+def openai_generate_node(state: ImageAgentState) -> dict:
+    """Generate an image using OpenAI gpt-image-1."""
+    return generate_with_fallback(state, "openai")
+
+
+async def aopenai_generate_node(state: ImageAgentState) -> dict:
+    """Async ``openai_generate_node``."""
+    return await agenerate_with_fallback(state, "openai")
+
+
+def flux_generate_node(state: ImageAgentState) -> dict:
+    """Generate an image using Flux via Hugging Face Inference API."""
+    return generate_with_fallback(state, "flux")
+
+
+async def aflux_generate_node(state: ImageAgentState) -> dict:
+    """Async ``flux_generate_node``."""
+    return await agenerate_with_fallback(state, "flux")
+
+
+def gemini_generate_node(state: ImageAgentState) -> dict:
+    """Generate an image using Gemini 2.5 Flash."""
+    return generate_with_fallback(state, "gemini")
+
+
+async def agemini_generate_node(state: ImageAgentState) -> dict:
+    """Async ``gemini_generate_node``."""
+    return await agenerate_with_fallback(state, "gemini")
@@ -0,0 +1,281 @@
+"""Hedged generation: race a second provider against the selected one.
+
+The selected (primary) provider starts at once. If it has not produced a
+valid image after ``hedge_delay_s`` — or fails before that — the same
+prompt goes to the next provider in ``hedge_providers``. The first valid
+image wins; the loser is cancelled, or kept as an alternate when
+``hedge_keep_alternate`` is set and it lands within ``hedge_alternate_wait_s``.
+
+Under ``ainvoke`` a cancelled loser's request is really aborted. Under
+``invoke`` providers run on threads, which cannot be interrupted, so a
+cancelled loser finishes in the background and its image is dropped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from image_agent.config import get_settings
+from image_agent.nodes.generate import (
+    acall_provider,
+    cached_generation,
+    call_provider,
+    generation_metadata,
+    is_request_rejection,
+    rejection_message,
+    provider_available,
+    provider_model,
+    record_provider_outcome,
+    release_provider_probe,
+    store_generation,
+)
+from image_agent.state import ImageAgentState
+from image_agent.utils.blobs import get_blob_store
+from image_agent.utils.logger import log_pipeline_step
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+@dataclass
+class _Attempt:
+    """Outcome of one provider call. ``data`` is None when it failed."""
+
+    provider: str
+    data: bytes | None
+    seconds: float
+    error: str | None = None
+    rejected: bool = False  # the provider refused the request itself (4xx)
+
+
+def _is_valid_image(data: bytes | None) -> bool:
+    if not data:
+        return False
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return img.width > 0 and img.height > 0
+    except Exception:
+        return False
+
+
+def _checked(
+    provider: str, state: ImageAgentState, data: bytes | None, started: float, exc: Exception | None
+) -> _Attempt:
+    seconds = time.perf_counter() - started
+    if exc is None and not _is_valid_image(data):
+        exc = ValueError("invalid image data")
+    record_provider_outcome(provider, state, seconds, exc)
+    if exc is not None:
+        if is_request_rejection(exc):
+            return _Attempt(provider, None, seconds, rejection_message(provider, exc), rejected=True)
+        return _Attempt(provider, None, seconds, str(exc)[:200])
+    return _Attempt(provider, data, seconds)
+
+
+def _attempt(provider: str, state: ImageAgentState) -> _Attempt:
+    if not provider_available(provider, claim=True):
+        return _Attempt(provider, None, 0.0, "circuit open")
+    started = time.perf_counter()
+    try:
+        data = call_provider(provider, state)
+    except Exception as exc:
+        return _checked(provider, state, None, started, exc)
+    return _checked(provider, state, data, started, None)
+
+
+async def _aattempt(provider: str, state: ImageAgentState) -> _Attempt:
+    if not provider_available(provider, claim=True):
+        return _Attempt(provider, None, 0.0, "circuit open")
+    started = time.perf_counter()
+    try:
+        data = await acall_provider(provider, state)
+    except asyncio.CancelledError:
+        # The race was settled without this call: free a half-open probe
+        # (CancelledError is not an Exception, so nothing else reports it)
+        release_provider_probe(provider)
+        raise
+    except Exception as exc:
+        return _checked(provider, state, None, started, exc)
+    return _checked(provider, state, data, started, None)
+
+
+def secondary_provider(primary: str, providers: list[str]) -> str | None:
+    """First provider in the hedge list other than the primary whose circuit isn't open."""
+    return next(
+        (p for p in providers if p != primary and provider_available(p, claim=False)), None
+    )
+
+
+class _HedgeRace:
+    """Bookkeeping shared by the sync and async drivers."""
+
+    def __init__(self, state: ImageAgentState) -> None:
+        settings = get_settings()
+        self.state = state
+        self.delay = max(0.0, settings.hedge_delay_s)
+        self.keep_alternate = settings.hedge_keep_alternate
+        self.alternate_wait = settings.hedge_alternate_wait_s
+        self.primary = state.get("provider") or "gemini"
+        self.secondary = secondary_provider(self.primary, settings.hedge_providers)
+        self.trigger = "not_triggered"
+        self.started = time.perf_counter()
+        self.launched: list[str] = []
+        self.attempts: dict[str, _Attempt] = {}
+        self.winner: _Attempt | None = None
+        self.alternate: _Attempt | None = None
+
+    def hedge_now(self) -> str | None:
+        """Provider to launch at start (delay 0), or None."""
+        if self.secondary and self.delay == 0:
+            self.trigger = "immediate"
+            return self.secondary
+        return None
+
+    def wait_timeout(self) -> float | None:
+        """How long to wait before the hedge is due (None: nothing left to launch)."""
+        if self.secondary is None or self.secondary in self.launched:
+            return None
+        return max(0.0, self.started + self.delay - time.perf_counter())
+
+    def on_timeout(self) -> str:
+        self.trigger = "delay"
+        return self.secondary
+
+    def record(self, attempt: _Attempt) -> str | None:
+        """Record a finished attempt; return a provider to launch now, if any."""
+        self.attempts[attempt.provider] = attempt
+        if attempt.data is not None:
+            if self.winner is None:
+                self.winner = attempt
+            elif self.alternate is None:
+                self.alternate = attempt
+            return None
+        # A rejected request would be rejected elsewhere too; don't hedge it
+        if attempt.rejected:
+            return None
+        if self.secondary and self.secondary not in self.launched:
+            self.trigger = "primary_failed"
+            return self.secondary
+        return None
+
+    def result(self, cancelled: list[str]) -> dict:
+        latencies = {
+            p: round(self.attempts[p].seconds, 3) if p in self.attempts else None
+            for p in self.launched
+        }
+        hedge = {
+            "primary": self.primary,
+            "secondary": self.secondary if self.secondary in self.launched else None,
+            "trigger": self.trigger,
+            "delay_s": self.delay,
+            "winner": self.winner.provider if self.winner else None,
+            "latencies": latencies,
+            "errors": {p: a.error for p, a in self.attempts.items() if a.error},
+            "cancelled": cancelled,
+        }
+        summary = "  ".join(
+            f"{p}={latencies[p]:.2f}s" if latencies[p] is not None else f"{p}=cancelled"
+            for p in self.launched
+        )
+
+        if self.winner is None:
+            log_pipeline_step("Generate", f"hedge \u2717 trigger={self.trigger}  {summary}")
+            rejected = next((a for a in self.attempts.values() if a.rejected), None)
+            if rejected is not None:
+                return {"error": rejected.error}
+            errors = "; ".join(f"{p}: {e}" for p, e in hedge["errors"].items())
+            return {"error": f"Hedged generation failed ({errors})"}
+
+        log_pipeline_step(
+            "Generate",
+            f"{self.winner.provider} \u2713 hedge trigger={self.trigger}  {summary}"
+            + (f"  alternate={self.alternate.provider}" if self.alternate else ""),
+        )
+        store_generation(self.winner.provider, self.state, self.winner.data)
+        metadata = generation_metadata(self.state, self.winner.provider, self.winner.data)
+        metadata["hedge"] = hedge
+        if self.alternate is not None:
+            store_generation(self.alternate.provider, self.state, self.alternate.data)
+            metadata["alternate"] = {
+                "provider": self.alternate.provider,
+                "model": provider_model(self.alternate.provider),
+                "image_blob": get_blob_store().put(self.alternate.data),
+            }
+        return {"generation_metadata": metadata}
+
+
+def hedged_generate_node(state: ImageAgentState) -> dict:
+    """Generate with the selected provider, hedged by a second one."""
+    cached = cached_generation(state.get("provider") or "gemini", state)
+    if cached is not None:
+        return cached
+    race = _HedgeRace(state)
+    pending: dict[Future, str] = {}
+
+    def launch(provider: str | None) -> None:
+        if provider:
+            race.launched.append(provider)
+            pending[_executor.submit(_attempt, provider, state)] = provider
+
+    launch(race.primary)
+    launch(race.hedge_now())
+    while pending and race.winner is None:
+        done, _ = wait(pending, timeout=race.wait_timeout(), return_when=FIRST_COMPLETED)
+        if not done:
+            launch(race.on_timeout())
+            continue
+        for future in done:
+            del pending[future]
+            launch(race.record(future.result()))
+
+    if pending and race.keep_alternate:
+        done, _ = wait(pending, timeout=race.alternate_wait)
+        for future in done:
+            del pending[future]
+            race.record(future.result())
+    for future in pending:
+        future.cancel()
+    return race.result(cancelled=list(pending.values()))
+
+
+async def ahedged_generate_node(state: ImageAgentState) -> dict:
+    """Async ``hedged_generate_node``; the loser's request is cancelled."""
+    cached = cached_generation(state.get("provider") or "gemini", state)
+    if cached is not None:
+        return cached
+    race = _HedgeRace(state)
+    pending: dict[asyncio.Task, str] = {}
+
+    def launch(provider: str | None) -> None:
+        if provider:
+            race.launched.append(provider)
+            pending[asyncio.ensure_future(_aattempt(provider, state))] = provider
+
+    launch(race.primary)
+    launch(race.hedge_now())
+    try:
+        while pending and race.winner is None:
+            done, _ = await asyncio.wait(
+                pending, timeout=race.wait_timeout(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                launch(race.on_timeout())
+                continue
+            for task in done:
+                del pending[task]
+                launch(race.record(task.result()))
+
+        if pending and race.keep_alternate:
+            done, _ = await asyncio.wait(pending, timeout=race.alternate_wait)
+            for task in done:
+                del pending[task]
+                race.record(task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+    return race.result(cancelled=list(pending.values()))
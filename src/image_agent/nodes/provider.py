@@ -1,7 +1,12 @@
-"""Provider selection node: deterministic style-to-provider mapping."""
+"""Provider selection node: style-to-provider mapping, optionally adaptive."""
 
 from __future__ import annotations
 
+import random
+
+from image_agent.config import get_settings
+from image_agent.nodes.generate import provider_available
+from image_agent.providers.selection import get_provider_stats
 from image_agent.state import ImageAgentState
 from image_agent.utils.logger import log_pipeline_step
 
@@ -18,11 +23,22 @@ ORIENTATION_SIZES: dict[str, str] = {
     "square": "1080x1080",
 }
 
+_rng = random.Random()
+
+
+def _generation_params(size: str, existing: dict) -> dict:
+    params = {"size": size, "quality": "high", "n": 1}
+    # A CLI --seed rides along in the incoming params
+    if existing.get("seed") is not None:
+        params["seed"] = existing["seed"]
+    return params
+
 
 def provider_select_node(state: ImageAgentState) -> dict:
     """Select the image generation provider based on detected style.
 
-    Priority: explicit override > style mapping > gemini (default).
+    Priority: explicit override > adaptive choice (when enabled) > style
+    mapping > gemini (default).
     """
     analysis = state.get("prompt_analysis", {})
 
@@ -40,7 +56,8 @@ def provider_select_node(state: ImageAgentState) -> dict:
         log_pipeline_step("Provider", f"{explicit} ({size}) [explicit]")
         return {
             "provider": explicit,
-            "generation_params": {"size": size, "quality": "high", "n": 1},
+            "provider_explicit": True,
+            "generation_params": _generation_params(size, existing_params),
         }
 
     style = analysis.get("style", "").lower().strip()
@@ -52,14 +69,39 @@ def provider_select_node(state: ImageAgentState) -> dict:
     else:
         provider = "gemini"
 
-    generation_params = {
-        "size": size,
-        "quality": "high",
-        "n": 1,
-    }
+    settings = get_settings()
+    if settings.provider_adaptive_enabled:
+        candidates = [
+            p for p in settings.provider_adaptive_candidates
+            if provider_available(p, claim=False)
+        ]
+        choice = get_provider_stats().choose(
+            candidates,
+            style,
+            size,
+            default=provider,
+            min_success=settings.provider_adaptive_min_success,
+            epsilon=settings.provider_adaptive_epsilon,
+            rng=_rng,
+        )
+        estimates = "  ".join(
+            f"{p}={e['expected_s']:.1f}s/{e['success']:.0%}"
+            for p, e in sorted(choice.estimates.items())
+        )
+        log_pipeline_step(
+            "Provider",
+            f"{choice.provider} ({size}) [{choice.mode}: {choice.reason}]"
+            + (f"  {estimates}" if estimates else ""),
+        )
+        return {
+            "provider": choice.provider,
+            "provider_explicit": False,
+            "generation_params": _generation_params(size, existing_params),
+        }
 
     log_pipeline_step("Provider", f"{provider} ({size})")
     return {
         "provider": provider,
-        "generation_params": generation_params,
+        "provider_explicit": False,
+        "generation_params": _generation_params(size, existing_params),
     }
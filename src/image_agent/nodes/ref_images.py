@@ -2,112 +2,314 @@
 
 from __future__ import annotations
 
-import base64
-import io
+import hashlib
 import logging
-import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from urllib.parse import urlparse
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable
 
-from PIL import Image
-from openai import OpenAI
+import httpx
 
 from image_agent.config import get_settings
-from image_agent.prompts.templates import REFERENCE_IMAGE_ANALYSIS_PROMPT
-from image_agent.providers.image_utils import download_image
+from image_agent.nodes.research import _EXCLUDED_DOMAINS
+from image_agent.prompts.templates import (
+    REFERENCE_IMAGE_ANALYSIS_PROMPT,
+    REFERENCE_IMAGE_SINGLE_ANALYSIS_PROMPT,
+)
+from image_agent.providers.clients import get_clients
+from image_agent.providers.download_engine import get_download_engine
+from image_agent.providers.image_utils import (
+    DownloadRejected,
+    download_image_conditional,
+    image_to_base64,
+)
 from image_agent.state import ImageAgentState
+from image_agent.utils.analysis_merge import merge_image_descriptions
+from image_agent.utils.blobs import get_blob_store, release_blobs
+from image_agent.utils.disk_cache import DiskCache, cache_key, normalize_text, open_cache
+from image_agent.utils.image_features import summarize_features
+from image_agent.utils.image_hash import collapse_near_duplicates, hamming_matrix
+from image_agent.utils.image_pool import get_image_pool
 from image_agent.utils.logger import log_pipeline_step
+from image_agent.utils.ref_image_cache import content_hash, get_ref_image_cache
+from image_agent.utils.host_reputation import get_host_reputation
+from image_agent.utils.url_filter import UrlFilter, split_url
 
 logger = logging.getLogger(__name__)
 
-# Patterns that indicate a low-quality or irrelevant image URL.
+
+def _is_host_failure_status(status: int) -> bool:
+    """HTTP statuses that say the host is refusing or struggling, not that one link is bad."""
+    return status in (403, 429) or status >= 500
+
+
+# Per-image vision requests (incremental analysis mode) run here, overlapping
+# the downloads that are still in flight.
+_vision_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vision")
+
+# Patterns that indicate a low-quality or irrelevant image URL, matched
+# against the whole lower-cased URL as one alternation by UrlFilter. Hosts
+# (e.g. i.ytimg.com for YouTube thumbnails) are excluded via _EXCLUDED_DOMAINS.
 _BAD_URL_PATTERNS = [
     # YouTube thumbnails
-    re.compile(r"/hqdefault\.jpg", re.IGNORECASE),
-    re.compile(r"/maxresdefault\.jpg", re.IGNORECASE),
-    re.compile(r"/sddefault\.jpg", re.IGNORECASE),
-    re.compile(r"/mqdefault\.jpg", re.IGNORECASE),
-    re.compile(r"i\.ytimg\.com", re.IGNORECASE),
+    r"/hqdefault\.jpg",
+    r"/maxresdefault\.jpg",
+    r"/sddefault\.jpg",
+    r"/mqdefault\.jpg",
     # Avatars, favicons, logos, icons, banners
-    re.compile(r"/(avatar|favicon|logo|icon|banner)[s_\-./]", re.IGNORECASE),
+    r"/(avatar|favicon|logo|icon|banner)[s_\-./]",
     # Tiny wiki thumbnails (e.g. /thumb/...120px-Something.png)
-    re.compile(r"/thumb/.+\d{1,3}px", re.IGNORECASE),
+    r"/thumb/.+\d{1,3}px",
     # SVG and GIF files (not useful as generation references)
-    re.compile(r"\.svg(\?|$)", re.IGNORECASE),
-    re.compile(r"\.gif(\?|$)", re.IGNORECASE),
+    r"\.svg(\?|$)",
+    r"\.gif(\?|$)",
     # Ad images, spinners, placeholders
-    re.compile(r"/(ads?|spinner|placeholder|loading|spacer)[_\-./]", re.IGNORECASE),
+    r"/(ads?|spinner|placeholder|loading|spacer)[_\-./]",
 ]
 
 
+@lru_cache
+def _url_filter() -> UrlFilter:
+    """Path patterns plus image hosts from the research exclusion list and settings."""
+    return UrlFilter(
+        _BAD_URL_PATTERNS,
+        [*_EXCLUDED_DOMAINS, *get_settings().ref_images_excluded_domains],
+    )
+
+
 def _is_quality_url(url: str) -> bool:
     """Return True if the URL is likely to be a useful reference image."""
-    # Reject URLs matching known bad patterns
-    for pattern in _BAD_URL_PATTERNS:
-        if pattern.search(url):
-            return False
+    return _url_filter().is_allowed(url)
 
-    # Reject URLs with very short paths (generic / stub images)
-    parsed = urlparse(url)
-    # Strip leading slash and query; path like "/" or "/image" is too short
-    path = parsed.path.strip("/")
-    if len(path) < 8:
-        return False
 
-    return True
+def _download_and_validate(
+    url: str,
+    max_size: tuple[int, int] = (1024, 1024),
+    cancel: threading.Event | None = None,
+) -> dict | None:
+    """Download a single image, validate with PIL, resize, and return as dict.
 
-
-def _download_and_validate(url: str, max_size: tuple[int, int] = (1024, 1024)) -> dict | None:
-    """Download a single image, validate with PIL, resize, and return as dict."""
+    Normalized images are cached by URL and by content hash: fresh URL hits
+    skip the network entirely, stale ones are revalidated with ETag /
+    Last-Modified, and unchanged bytes skip PIL work.
+    """
+    settings = get_settings()
+    cache = get_ref_image_cache()
+    reputation = get_host_reputation()
+    host = split_url(url)[0]
     try:
-        raw_bytes = download_image(url, timeout=15.0)
-
-        # Validate with PIL
-        img = Image.open(io.BytesIO(raw_bytes))
-        img.verify()
-
-        # Re-open after verify (verify closes the image)
-        img = Image.open(io.BytesIO(raw_bytes))
-
-        # Resize if needed
-        img.thumbnail(max_size, Image.LANCZOS)
-
-        # Convert to base64
-        buf = io.BytesIO()
-        fmt = img.format or "PNG"
-        mime_type = f"image/{fmt.lower()}"
-        if fmt.upper() == "JPEG":
-            mime_type = "image/jpeg"
-        elif fmt.upper() == "PNG":
-            mime_type = "image/png"
-        elif fmt.upper() == "WEBP":
-            mime_type = "image/webp"
+        cached = cache.lookup(url) if cache else None
+        if cached is not None and cached.fresh:
+            return _ref_dict(url, cached.data, cached.mime_type, cached.info, cached=True)
+
+        # The p95-derived timeout is a budget for the whole download, not
+        # just for each connect / read
+        timeout = settings.download_timeout_s
+        if reputation:
+            timeout = reputation.timeout_for(host, timeout)
+        try:
+            result = download_image_conditional(
+                url,
+                etag=cached.etag if cached else None,
+                last_modified=cached.last_modified if cached else None,
+                timeout=timeout,
+                max_seconds=timeout,
+                max_bytes=settings.ref_images_max_bytes,
+                min_dimension=settings.ref_images_min_dimension,
+                max_pixels=settings.ref_images_max_pixels,
+                cancel=cancel,
+            )
+        # Rejected images (HTML pages, thumbnails, odd formats) and dead
+        # links say nothing about the host, so only these count against it
+        except httpx.HTTPStatusError as exc:
+            if reputation and _is_host_failure_status(exc.response.status_code):
+                reputation.record_failure(host, f"http {exc.response.status_code}")
+            raise
+        except httpx.TransportError as exc:  # includes timeouts
+            if reputation:
+                reputation.record_failure(host, type(exc).__name__)
+            raise
+        if reputation and result.seconds is not None:
+            reputation.record_success(host, result.seconds)
+
+        if result.not_modified and cached is not None:
+            cache.mark_fresh(url)
+            return _ref_dict(url, cached.data, cached.mime_type, cached.info, cached=True)
+
+        raw_bytes = result.content or b""
+        source_hash = content_hash(raw_bytes)
+        known = cache.get_normalized(source_hash) if cache else None
+        if known is not None:
+            data, info = known
+            cache.remember_url(
+                url,
+                source_hash=source_hash,
+                etag=result.etag,
+                last_modified=result.last_modified,
+            )
+            return _ref_dict(url, data, info["mime_type"], info, cached=True)
+
+        data, info = get_image_pool().run("normalize_reference", raw_bytes, max_size)
+        mime_type = info["mime_type"]
+        if cache:
+            cache.store(
+                url,
+                source_hash=source_hash,
+                data=data,
+                mime_type=mime_type,
+                info=info,
+                etag=result.etag,
+                last_modified=result.last_modified,
+            )
+        return _ref_dict(url, data, mime_type, info)
+    except DownloadRejected as exc:
+        logger.info("Skipped reference image %s (%s)", url, exc.reason)
+        return None
+    except Exception as exc:
+        logger.warning("Failed to download/validate reference image %s: %s", url, exc)
+        return None
+
+
+def _ref_dict(
+    url: str,
+    data: bytes,
+    mime_type: str,
+    info: dict,
+    *,
+    cached: bool = False,
+) -> dict:
+    """Build the reference image dict carried in state (bytes go to the blob store)."""
+    return {
+        "url": url,
+        "blob": get_blob_store().put(data),
+        "mime_type": mime_type,
+        "width": info.get("width"),
+        "height": info.get("height"),
+        "dhash": info.get("dhash"),
+        "cached": cached,
+    }
+
+
+def _race_downloads(
+    urls: list[str],
+    *,
+    need: int,
+    budget_s: float,
+    on_image: Callable[[dict], None] | None = None,
+) -> tuple[list[dict], int]:
+    """Download candidates concurrently and stop once the best ``need`` are settled.
+
+    ``urls`` are in priority order (canonical first). The race ends as soon
+    as ``need`` images have validated and every higher-priority candidate
+    has finished, or — once ``need`` are in hand — when ``budget_s`` runs
+    out. Stragglers are cancelled. ``on_image`` is called with each image as
+    soon as it validates. Returns (images in priority order, number of
+    cancelled downloads).
+    """
+    if need <= 0:
+        return [], 0
+    engine = get_download_engine()
+    cancel = threading.Event()
+    futures = {
+        engine.submit(_download_and_validate, url, cancel=cancel): rank
+        for rank, url in enumerate(urls)
+    }
+    results: dict[int, dict | None] = {}
+    deadline = time.monotonic() + budget_s
+    pending = set(futures)
+
+    while pending:
+        good = sorted(rank for rank, r in results.items() if r is not None)
+        timeout = None
+        if len(good) >= need:
+            cutoff = good[need - 1]
+            if all(rank in results for rank in range(cutoff)):
+                break
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            image = results[futures[future]] = future.result()
+            if image is not None and on_image is not None:
+                on_image(image)
+
+    if pending:
+        cancel.set()
+        for future in pending:
+            future.cancel()
+            # A straggler already running still stores its image; let it go
+            future.add_done_callback(_release_straggler)
+
+    ranked = [results[rank] for rank in sorted(results) if results[rank] is not None]
+    return ranked, len(pending)
+
+
+def _release_straggler(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    image = future.result()
+    if image is not None:
+        release_blobs([image])
+
+
+def _release_dropped(images: list[dict], kept: list[dict]) -> None:
+    """Release the blobs of downloaded images that were not kept.
+
+    Matched by handle count, not identity: ranking and dedup may copy the
+    dicts, and identical bytes from two URLs share a handle (and two refs).
+    """
+    keep = Counter(image["blob"] for image in kept)
+    dropped = []
+    for image in images:
+        if keep[image["blob"]] > 0:
+            keep[image["blob"]] -= 1
         else:
-            # Convert to PNG for unsupported formats
-            fmt = "PNG"
-            mime_type = "image/png"
+            dropped.append(image)
+    release_blobs(dropped)
 
-        img.save(buf, format=fmt)
-        image_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
 
-        return {
-            "url": url,
-            "image_b64": image_b64,
-            "mime_type": mime_type,
-        }
-    except Exception as exc:
-        logger.warning("Failed to download/validate reference image %s: %s", url, exc)
+def _analysis_cache() -> DiskCache | None:
+    """Vision analyses keyed by the exact reference image set, subject, model and prompt."""
+    settings = get_settings()
+    if not settings.ref_image_analysis_cache_enabled:
         return None
+    return open_cache(
+        "ref_image_analysis",
+        ttl=settings.ref_image_analysis_cache_ttl_s,
+        max_entries=settings.ref_image_analysis_cache_max_entries,
+        max_bytes=settings.ref_image_analysis_cache_max_bytes,
+    )
+
+
+def _analysis_cache_key(
+    images: list[dict],
+    subject: str,
+    model: str,
+    prompt: str = REFERENCE_IMAGE_ANALYSIS_PROMPT,
+) -> str:
+    return cache_key(
+        sorted(img["blob"] for img in images),  # blob handles are content hashes
+        normalize_text(subject),
+        model,
+        hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+    )
 
 
 def _analyze_with_vision(
     images: list[dict],
     subject: str,
     model: str,
-    api_key: str,
+    *,
+    system_prompt: str = REFERENCE_IMAGE_ANALYSIS_PROMPT,
+    max_tokens: int = 600,
 ) -> str:
     """Analyze reference images using GPT-4o vision."""
-    client = OpenAI(api_key=api_key)
+    client = get_clients().openai()
+    blobs = get_blob_store()
 
     # Build multimodal message content
     content: list[dict] = [
@@ -118,10 +320,12 @@ def _analyze_with_vision(
     ]
 
     for img in images:
+        # Base64 only at the wire: the data URL is built from the blob bytes here
+        b64 = image_to_base64(blobs.get(img["blob"]))
         content.append({
             "type": "image_url",
             "image_url": {
-                "url": f"data:{img['mime_type']};base64,{img['image_b64']}",
+                "url": f"data:{img['mime_type']};base64,{b64}",
                 "detail": "low",
             },
         })
@@ -129,82 +333,299 @@ def _analyze_with_vision(
     response = client.chat.completions.create(
         model=model,
         messages=[
-            {"role": "system", "content": REFERENCE_IMAGE_ANALYSIS_PROMPT},
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": content},
         ],
-        max_tokens=600,
+        max_tokens=max_tokens,
         temperature=0.3,
     )
 
     return response.choices[0].message.content or ""
 
 
+def _describe_image(image: dict, subject: str, model: str) -> tuple[str, bool]:
+    """Describe one reference image (per-image cache first). Returns (text, cache_hit)."""
+    cache = _analysis_cache()
+    key = _analysis_cache_key([image], subject, model, REFERENCE_IMAGE_SINGLE_ANALYSIS_PROMPT)
+    cached = cache.get_json(key) if cache else None
+    if cached is not None:
+        return cached, True
+    text = _analyze_with_vision(
+        [image],
+        subject=subject,
+        model=model,
+        system_prompt=REFERENCE_IMAGE_SINGLE_ANALYSIS_PROMPT,
+        max_tokens=300,
+    )
+    if cache and text:
+        cache.set_json(key, text)
+    return text, False
+
+
+class _IncrementalAnalysis:
+    """Start one vision request per image as it arrives; merge locally at the end."""
+
+    def __init__(self, subject: str, model: str, dedup_threshold: int | None) -> None:
+        self.subject = subject
+        self.model = model
+        self.dedup_threshold = dedup_threshold
+        self.futures: dict[str, Future] = {}
+        self._hashes: list[int] = []
+
+    def submit(self, image: dict) -> None:
+        """Queue a description unless the image is a near-duplicate of one already queued."""
+        if image["blob"] in self.futures:
+            return
+        if self.dedup_threshold is not None and image.get("dhash") and self._hashes:
+            distances = hamming_matrix([int(image["dhash"], 16), *self._hashes])[0, 1:]
+            if distances.min() <= self.dedup_threshold:
+                return
+        if image.get("dhash"):
+            self._hashes.append(int(image["dhash"], 16))
+        self.futures[image["blob"]] = _vision_executor.submit(
+            _describe_image, image, self.subject, self.model
+        )
+
+    def collect(self, images: list[dict]) -> tuple[str, int]:
+        """Merge descriptions of ``images`` (priority order). Returns (text, cache_hits)."""
+        futures = []
+        for image in images:
+            if image["blob"] not in self.futures:
+                # Kept copy of a duplicate group that was skipped at submit time
+                self.futures[image["blob"]] = _vision_executor.submit(
+                    _describe_image, image, self.subject, self.model
+                )
+            futures.append(self.futures[image["blob"]])
+
+        descriptions: list[str] = []
+        hits = 0
+        for image, future in zip(images, futures):
+            try:
+                text, hit = future.result()
+            except Exception as exc:
+                logger.warning("Vision analysis failed for %s: %s", image["url"], exc)
+                continue
+            descriptions.append(text)
+            hits += hit
+        return merge_image_descriptions(descriptions), hits
+
+
+def _batch_analysis(images: list[dict], subject: str) -> tuple[str, str]:
+    """One multimodal request for the whole set, unless it was analyzed before.
+
+    Returns (analysis_text, cache status "hit" | "miss").
+    """
+    settings = get_settings()
+    analysis_cache = _analysis_cache()
+    analysis_key = _analysis_cache_key(images, subject, settings.ref_image_analysis_model)
+    cached = analysis_cache.get_json(analysis_key) if analysis_cache else None
+    if cached is not None:
+        return cached, "hit"
+
+    analysis_text = ""
+    try:
+        analysis_text = _analyze_with_vision(
+            images,
+            subject=subject,
+            model=settings.ref_image_analysis_model,
+        )
+        logger.info("Reference image analysis complete (%d chars)", len(analysis_text))
+    except Exception as exc:
+        logger.warning("Vision analysis failed, continuing without: %s", exc)
+    if analysis_cache and analysis_text:
+        analysis_cache.set_json(analysis_key, analysis_text)
+    return analysis_text, "miss"
+
+
+def _rank_by_quality(images: list[dict], min_quality: float) -> tuple[list[dict], int]:
+    """Score images locally and order them best first, dropping those below the floor.
+
+    Earlier (higher-priority) candidates get a small bonus so near-ties keep
+    the search ranking. Returns (ranked images, number dropped).
+    """
+    blobs = get_blob_store()
+    pool = get_image_pool()
+    futures = [
+        pool.submit("quality", blobs.get(img["blob"]), img.get("width"), img.get("height"))
+        for img in images
+    ]
+    scored: list[tuple[float, int, dict]] = []
+    for rank, (img, future) in enumerate(zip(images, futures)):
+        try:
+            metrics = future.result()[1]
+        except Exception as exc:
+            logger.warning("Quality scoring failed for %s: %s", img["url"], exc)
+            scored.append((0.0, rank, img))  # unscored: keep, rank last
+            continue
+        if metrics["score"] < min_quality:
+            logger.info("Dropped low-quality reference image %s (%s)", img["url"], metrics)
+            continue
+        scored.append((metrics["score"] - 0.02 * rank, rank, {**img, "quality": metrics["score"]}))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [img for _, _, img in scored], len(images) - len(scored)
+
+
+def _local_features(images: list[dict], palette_size: int) -> str:
+    """Measure palette, tone and framing of each image and render them as text."""
+    blobs = get_blob_store()
+    pool = get_image_pool()
+    futures = [
+        pool.submit("features", blobs.get(img["blob"]), palette_size) for img in images
+    ]
+    features = []
+    for img, future in zip(images, futures):
+        try:
+            features.append(future.result()[1])
+        except Exception as exc:
+            logger.warning("Local feature extraction failed for %s: %s", img["url"], exc)
+    return summarize_features(features, palette_size=palette_size)
+
+
+# Returned when a run ends up without reference images, so values left in a
+# reused thread's checkpoint by an earlier turn are cleared
+_NO_REFERENCES = {
+    "reference_images": None,
+    "reference_image_analysis": None,
+    "reference_image_features": None,
+    "reference_images_owned": False,
+}
+
+
 def ref_images_node(state: ImageAgentState) -> dict:
     """Download reference images, validate, and analyze with GPT-4o vision."""
     settings = get_settings()
 
-    # Feature flag check
-    if not settings.ref_images_enabled:
-        return {}
+    # Feature flag check (passing zero images to the model disables them too)
+    if not settings.ref_images_enabled or settings.ref_images_max_pass_to_model <= 0:
+        return dict(_NO_REFERENCES)
 
     urls = state.get("reference_image_urls") or []
     if not urls:
-        return {}
+        return dict(_NO_REFERENCES)
 
     analysis = state.get("prompt_analysis", {})
     subject = analysis.get("subject", state.get("original_prompt", ""))
 
-    # Filter out low-quality URLs before downloading
-    quality_urls = [u for u in urls if _is_quality_url(u)]
-    filtered_out = len(urls) - len(quality_urls)
+    # Filter out low-quality URLs and excluded hosts before downloading
+    url_check = _url_filter().filter(urls)
+    quality_urls = url_check.kept
+    filtered_out = url_check.rejected_total
     if filtered_out:
-        logger.info("Filtered out %d low-quality reference image URLs", filtered_out)
+        logger.info(
+            "Filtered out %d low-quality reference image URLs (%s)",
+            filtered_out, dict(url_check.rejected),
+        )
 
-    # Download top N images in parallel
-    max_download = settings.ref_images_max_download
-    urls_to_download = quality_urls[:max_download]
-    downloaded: list[dict] = []
+    # Skip hosts in their negative-cache window and move fast, reliable
+    # hosts up the candidate list
+    host_skipped = 0
+    reputation = get_host_reputation()
+    if reputation and quality_urls:
+        hosts = [split_url(u)[0] for u in quality_urls]
+        allowed = [(u, h) for u, h in zip(quality_urls, hosts) if not reputation.is_blocked(h)]
+        host_skipped = len(quality_urls) - len(allowed)
+        if host_skipped:
+            logger.info("Skipped %d reference image URLs from recently failing hosts", host_skipped)
+        quality_urls = reputation.order([u for u, _ in allowed], [h for _, h in allowed])
+
+    # Incremental analysis describes each image as soon as it validates, so
+    # vision requests overlap the downloads still in flight.
+    incremental = None
+    if settings.ref_image_analysis_mode == "incremental":
+        incremental = _IncrementalAnalysis(
+            subject,
+            settings.ref_image_analysis_model,
+            settings.ref_images_dedup_threshold if settings.ref_images_dedup_enabled else None,
+        )
+    on_image = incremental.submit if incremental else None
 
-    with ThreadPoolExecutor(max_workers=max_download) as executor:
-        futures = {
-            executor.submit(_download_and_validate, url): url
-            for url in urls_to_download
-        }
-        for future in as_completed(futures):
-            result = future.result()
-            if result is not None:
-                downloaded.append(result)
+    # Download in parallel through the shared engine (pooled keep-alive/HTTP2
+    # connections, long-lived executor). Race mode over-provisions candidates
+    # and stops once enough good images are in, cancelling stragglers.
+    max_pass = settings.ref_images_max_pass_to_model
+    engine = get_download_engine()
+    net_before = engine.stats.snapshot()
+    if settings.ref_images_race_enabled:
+        fetched, cancelled = _race_downloads(
+            quality_urls[:settings.ref_images_race_candidates],
+            need=max_pass,
+            budget_s=settings.ref_images_race_budget_s,
+            on_image=on_image,
+        )
+        # Extra finishers beyond the usual download count aren't analyzed
+        downloaded = fetched[:settings.ref_images_max_download]
+    else:
+        urls_to_download = quality_urls[:settings.ref_images_max_download]
+        fetched, cancelled = _race_downloads(
+            urls_to_download,
+            need=len(urls_to_download),
+            budget_s=float("inf"),
+            on_image=on_image,
+        )
+        downloaded = fetched
+    net_after = engine.stats.snapshot()
+    net_requests = net_after["requests"] - net_before["requests"]
+    net_reused = net_after["reused"] - net_before["reused"]
+    net_seconds = net_after["seconds"] - net_before["seconds"]
 
     if not downloaded:
         logger.info("No reference images could be downloaded, continuing without.")
-        return {}
+        return dict(_NO_REFERENCES)
 
     logger.info("Downloaded %d reference images", len(downloaded))
 
-    # Analyze with GPT-4o vision
-    analysis_text = ""
-    try:
-        analysis_text = _analyze_with_vision(
-            downloaded,
-            subject=subject,
-            model=settings.ref_image_analysis_model,
-            api_key=settings.openai_api_key,
+    # Collapse mirrors of the same artwork before spending vision tokens on them
+    duplicates = 0
+    if settings.ref_images_dedup_enabled:
+        downloaded, duplicates = collapse_near_duplicates(
+            downloaded, settings.ref_images_dedup_threshold
         )
-        logger.info("Reference image analysis complete (%d chars)", len(analysis_text))
-    except Exception as exc:
-        logger.warning("Vision analysis failed, continuing without: %s", exc)
 
-    # Limit images passed forward to model
-    max_pass = settings.ref_images_max_pass_to_model
+    # Rank by local quality and keep only what the model will see, so the
+    # vision call and the generator get fewer, better images
+    low_quality = 0
+    if settings.ref_images_quality_enabled:
+        downloaded, low_quality = _rank_by_quality(downloaded, settings.ref_images_min_quality)
+        downloaded = downloaded[:max_pass]
+        if not downloaded:
+            logger.info("No reference images passed the quality floor, continuing without.")
+            release_blobs(fetched)
+            return dict(_NO_REFERENCES)
+
+    # Local palette / tone / framing features (milliseconds, no API call)
+    features_text = ""
+    if settings.ref_image_features_enabled:
+        features_text = _local_features(downloaded, settings.ref_image_palette_size)
+
+    # Analyze with GPT-4o vision (skipped entirely in "local" mode)
+    if settings.ref_image_analysis_mode == "local":
+        analysis_text, analysis_status = "", "skipped"
+    elif incremental is not None:
+        analysis_text, hits = incremental.collect(downloaded)
+        analysis_status = f"{hits}/{len(downloaded)}"
+        logger.info("Merged %d per-image reference analyses", len(downloaded))
+    else:
+        analysis_text, analysis_status = _batch_analysis(downloaded, subject)
+
+    # Limit images passed forward to model (highest priority first)
     images_for_model = downloaded[:max_pass]
+    # Only the images carried in state keep their blobs; response_node
+    # releases those when the run finishes
+    _release_dropped(fetched, images_for_model)
 
+    cache_hits = sum(1 for d in downloaded if d.get("cached"))
     log_pipeline_step(
         "Ref Images",
         f"downloaded={len(downloaded)}  analyzed={len(images_for_model)}"
-        f"  filtered_out={filtered_out}"
+        f"  filtered_out={filtered_out}  host_skipped={host_skipped}  cache_hits={cache_hits}  cancelled={cancelled}"
+        f"  duplicates={duplicates}  low_quality={low_quality}  analysis_cache={analysis_status}"
+        f"  features={'yes' if features_text else 'no'}"
+        f"  requests={net_requests}  reused_conns={net_reused}  dl_time={net_seconds:.2f}s"
         f'  "{(analysis_text or "")[:50]}..."',
     )
     return {
         "reference_images": images_for_model,
         "reference_image_analysis": analysis_text if analysis_text else None,
+        "reference_image_features": features_text if features_text else None,
+        "reference_images_owned": True,
     }
@@ -2,14 +2,30 @@
 
 from __future__ import annotations
 
-from tavily import TavilyClient
-from langchain_openai import ChatOpenAI
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from image_agent.config import get_settings
+from image_agent.providers.clients import get_clients
 from image_agent.prompts.templates import RESEARCH_SYNTHESIS_PROMPT
 from image_agent.state import ImageAgentState
+from image_agent.utils.context_compressor import compress_search_results, estimate_tokens
+from image_agent.utils.disk_cache import DiskCache, cache_key, normalize_text, open_cache
 from image_agent.utils.logger import log_pipeline_step
+from image_agent.utils.research_executor import (
+    PendingSearch,
+    SearchOutcome,
+    SearchQuery,
+    acollect_searches,
+    asubmit_searches,
+    collect_searches,
+    submit_searches,
+)
 
 # Domains that return low-quality reference images (AI-generated, stock vectors,
 # thumbnails, social media crops). Passed to Tavily's exclude_domains parameter.
@@ -92,95 +108,373 @@ def _format_search_results(
     return "\n".join(sections)
 
 
-def research_node(state: ImageAgentState) -> dict:
-    """Search the internet for context to enrich image generation."""
-    settings = get_settings()
-    analysis = state["prompt_analysis"]
-    subject = analysis.get("subject", state["original_prompt"])
-    style = analysis.get("style", "photorealistic")
+# Canonical reference queries per subject type (wiki, fandom, official art)
+_CANONICAL_QUERIES = {
+    "fictional_character": '"{subject}" character official art wiki fandom',
+    "cultural": '"{subject}" traditional art iconography wiki',
+    "real_person": '"{subject}" photo portrait official',
+    "landmark": '"{subject}" photo high resolution',
+}
+_DEFAULT_CANONICAL_QUERY = '"{subject}" reference image high quality'
+
+
+def plan_research_queries(
+    subject: str,
+    style: str,
+    subject_type: str,
+    complexity: str,
+    max_results: int,
+) -> list[SearchQuery]:
+    """Build the list of Tavily searches to run for a prompt analysis.
+
+    All searches exclude low-quality domains (stock vectors, AI generators, etc.)
+    and most include images for reference.
+    """
+    queries = [
+        SearchQuery("style", f"{subject} {style} art visual style reference", {
+            "max_results": max_results,
+            "include_images": True,
+            "search_depth": "advanced",
+            "exclude_domains": _EXCLUDED_DOMAINS,
+        }),
+        SearchQuery("factual", f"{subject} details characteristics appearance", {
+            "max_results": max_results,
+            "include_images": True,
+            "exclude_domains": _EXCLUDED_DOMAINS,
+        }),
+        SearchQuery("trending", f"AI art {style} techniques trending 2025", {
+            "max_results": min(max_results, 2),
+            "exclude_domains": _EXCLUDED_DOMAINS,
+        }),
+    ]
+
+    # Scene composition (for moderate/complex or cultural/scene subjects)
+    if complexity in ("moderate", "complex") or subject_type in ("cultural", "scene"):
+        queries.append(SearchQuery(
+            "composition",
+            f"{subject} scene description composition layout spatial arrangement",
+            {
+                "max_results": max_results,
+                "include_images": True,
+                "exclude_domains": _EXCLUDED_DOMAINS,
+            },
+        ))
+
+    canonical_query = _CANONICAL_QUERIES.get(
+        subject_type, _DEFAULT_CANONICAL_QUERY
+    ).format(subject=subject)
+    queries.append(SearchQuery("canonical", canonical_query, {
+        "max_results": max_results,
+        "include_images": True,
+        "search_depth": "advanced",
+        "exclude_domains": _EXCLUDED_DOMAINS,
+    }))
+    return queries
+
+
+# ---------------------------------------------------------------------------
+# Speculative research: subject-only searches started alongside the router
+# ---------------------------------------------------------------------------
+
+# Searches that only depend on the subject, so the raw prompt is a usable
+# stand-in. The canonical query is not speculated: its template depends on the
+# subject type, which only the router knows, so a guess is usually discarded
+# and re-issued (an extra "advanced"-depth Tavily call).
+_SPECULATIVE_QUERIES = ("factual",)
+
+# Unclaimed speculations (e.g. the router chose "edit") are dropped after this
+_SPECULATION_TTL_S = 120.0
+
+_STOPWORDS = frozenset(
+    "a an the of in on at to for with and or by from into is are be as it its "
+    "this that my me make create generate draw show image picture photo".split()
+)
+
+
+@dataclass
+class _Speculation:
+    subject: str
+    pending: dict[str, PendingSearch]
+    started_at: float
+
 
-    tavily = TavilyClient(api_key=settings.tavily_api_key)
-    max_results = settings.tavily_max_results
-
-    # Run searches for comprehensive context (include images for reference)
-    # All searches exclude low-quality domains (stock vectors, AI generators, etc.)
-    style_results = tavily.search(
-        f"{subject} {style} art visual style reference",
-        max_results=max_results,
-        include_images=True,
-        search_depth="advanced",
-        exclude_domains=_EXCLUDED_DOMAINS,
+_speculations: dict[str, _Speculation] = {}
+_speculations_lock = threading.Lock()
+
+
+def subject_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the content words in two subject strings."""
+    tokens_a = {t for t in re.findall(r"\w+", a.lower()) if t not in _STOPWORDS}
+    tokens_b = {t for t in re.findall(r"\w+", b.lower()) if t not in _STOPWORDS}
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def start_speculative_research(original_prompt: str) -> str:
+    """Dispatch subject-only searches using the raw prompt as the subject.
+
+    Returns an id to store in state; ``research_node`` claims the in-flight
+    searches with it and reuses those that still match the router's analysis.
+    """
+    settings = get_settings()
+    queries = [
+        q for q in plan_research_queries(
+            original_prompt, "", "", "simple", settings.tavily_max_results
+        )
+        if q.name in _SPECULATIVE_QUERIES
+    ]
+    pending = submit_searches(
+        get_clients().tavily(),
+        queries,
+        per_query_timeout=settings.research_query_timeout_s,
+        cache=_search_cache(),
     )
-    factual_results = tavily.search(
-        f"{subject} details characteristics appearance",
-        max_results=max_results,
-        include_images=True,
-        exclude_domains=_EXCLUDED_DOMAINS,
+
+    spec_id = uuid.uuid4().hex
+    now = time.monotonic()
+    with _speculations_lock:
+        for stale_id in [
+            k for k, v in _speculations.items() if now - v.started_at > _SPECULATION_TTL_S
+        ]:
+            del _speculations[stale_id]
+        _speculations[spec_id] = _Speculation(original_prompt, pending, now)
+    return spec_id
+
+
+def discard_speculative_research(spec_id: str | None) -> None:
+    """Forget a speculation whose results will never be claimed."""
+    if spec_id:
+        with _speculations_lock:
+            _speculations.pop(spec_id, None)
+
+
+def _claim_speculation(spec_id: str | None) -> _Speculation | None:
+    if not spec_id:
+        return None
+    with _speculations_lock:
+        return _speculations.pop(spec_id, None)
+
+
+def _reusable_speculative_searches(
+    speculation: _Speculation,
+    queries: list[SearchQuery],
+    *,
+    subject: str,
+    style: str,
+    subject_type: str,
+    complexity: str,
+) -> dict[str, PendingSearch]:
+    """Return the speculative searches that can stand in for planned ones.
+
+    A speculative search is reused only when the router's subject is close
+    enough to the raw prompt and the planned query string is the one the
+    raw prompt would have produced.
+    """
+    settings = get_settings()
+    if subject_similarity(subject, speculation.subject) < settings.research_speculative_min_similarity:
+        return {}
+
+    as_if_raw = {
+        q.name: q.query
+        for q in plan_research_queries(
+            speculation.subject, style, subject_type, complexity, settings.tavily_max_results
+        )
+    }
+    reusable: dict[str, PendingSearch] = {}
+    for q in queries:
+        spec = speculation.pending.get(q.name)
+        if spec is not None and spec.query.query == as_if_raw.get(q.name):
+            reusable[q.name] = spec
+    return reusable
+
+
+def _search_cache() -> DiskCache | None:
+    """Raw Tavily responses keyed by normalized query string."""
+    settings = get_settings()
+    if not settings.research_cache_enabled:
+        return None
+    return open_cache(
+        "research_search",
+        ttl=settings.research_cache_search_ttl_s,
+        max_entries=settings.research_cache_max_entries,
     )
-    trending_results = tavily.search(
-        f"AI art {style} techniques trending 2025",
-        max_results=min(max_results, 2),
-        exclude_domains=_EXCLUDED_DOMAINS,
+
+
+def _synthesis_cache() -> DiskCache | None:
+    """Synthesized research context keyed by (subject, style, subject_type, complexity)."""
+    settings = get_settings()
+    if not settings.research_cache_enabled:
+        return None
+    return open_cache(
+        "research_synthesis",
+        ttl=settings.research_cache_synthesis_ttl_s,
+        max_entries=settings.research_cache_max_entries,
     )
 
-    # 4th search: scene composition (for moderate/complex or cultural/scene subjects)
+
+@dataclass
+class _ResearchPlan:
+    subject: str
+    style: str
+    complexity: str
+    subject_type: str
+    queries: list[SearchQuery]
+    reused: dict[str, PendingSearch]
+    speculation: _Speculation | None
+
+    @property
+    def to_submit(self) -> list[SearchQuery]:
+        return [q for q in self.queries if q.name not in self.reused]
+
+
+def _plan_research(state: ImageAgentState) -> _ResearchPlan:
+    """Plan the searches and claim any matching speculative ones."""
+    settings = get_settings()
+    analysis = state["prompt_analysis"]
+    subject = analysis.get("subject", state["original_prompt"])
+    style = analysis.get("style", "photorealistic")
     complexity = analysis.get("complexity", "simple")
     subject_type = analysis.get("subject_type", "")
-    composition_results = None
-    if complexity in ("moderate", "complex") or subject_type in ("cultural", "scene"):
-        composition_results = tavily.search(
-            f"{subject} scene description composition layout spatial arrangement",
-            max_results=max_results,
-            include_images=True,
-            exclude_domains=_EXCLUDED_DOMAINS,
+
+    queries = plan_research_queries(
+        subject, style, subject_type, complexity, settings.tavily_max_results
+    )
+
+    # Claim searches started speculatively alongside the router, if any
+    reused: dict[str, PendingSearch] = {}
+    speculation = _claim_speculation(state.get("speculative_research_id"))
+    if speculation is not None:
+        reused = _reusable_speculative_searches(
+            speculation,
+            queries,
+            subject=subject,
+            style=style,
+            subject_type=subject_type,
+            complexity=complexity,
         )
+    return _ResearchPlan(subject, style, complexity, subject_type, queries, reused, speculation)
 
-    # 5th search: canonical reference images (wiki, fandom, official art)
-    _CANONICAL_QUERIES = {
-        "fictional_character": '"{subject}" character official art wiki fandom',
-        "cultural": '"{subject}" traditional art iconography wiki',
-        "real_person": '"{subject}" photo portrait official',
-        "landmark": '"{subject}" photo high resolution',
-    }
-    canonical_query = _CANONICAL_QUERIES.get(
-        subject_type,
-        '"{subject}" reference image high quality',
-    ).format(subject=subject)
 
-    canonical_results = tavily.search(
-        canonical_query,
-        max_results=max_results,
-        include_images=True,
-        search_depth="advanced",
-        exclude_domains=_EXCLUDED_DOMAINS,
+def research_node(state: ImageAgentState) -> dict:
+    """Search the internet for context to enrich image generation."""
+    settings = get_settings()
+    plan = _plan_research(state)
+
+    # Dispatch every remaining search at once — wall time is the slowest
+    # single search. Failed or timed-out searches degrade to empty results.
+    wall_start = time.perf_counter()
+    search_cache = _search_cache()
+    pending = submit_searches(
+        get_clients().tavily(),
+        plan.to_submit,
+        per_query_timeout=settings.research_query_timeout_s,
+        cache=search_cache,
     )
+    pending.update(plan.reused)
+    outcomes = collect_searches(
+        pending,
+        deadline=settings.research_deadline_s,
+        per_query_timeout=settings.research_query_timeout_s,
+        cache=search_cache,
+    )
+    return _research_result(plan, outcomes, time.perf_counter() - wall_start, search_cache)
+
+
+async def aresearch_node(state: ImageAgentState) -> dict:
+    """Async ``research_node``: searches run as tasks on the event loop."""
+    settings = get_settings()
+    plan = _plan_research(state)
 
-    # Synthesize with GPT-4o
-    raw_context = _format_search_results(
-        style_results,
-        factual_results,
-        trending_results,
-        composition_results,
-        canonical_results,
+    wall_start = time.perf_counter()
+    search_cache = _search_cache()
+    pending = asubmit_searches(
+        get_clients().async_tavily(),
+        plan.to_submit,
+        per_query_timeout=settings.research_query_timeout_s,
+        cache=search_cache,
     )
-    llm = ChatOpenAI(
-        model=settings.enhance_model,
-        api_key=settings.openai_api_key,
-        temperature=0.3,
+    pending.update(plan.reused)
+    outcomes = await acollect_searches(
+        pending,
+        deadline=settings.research_deadline_s,
+        per_query_timeout=settings.research_query_timeout_s,
+        cache=search_cache,
     )
-    original_prompt = state["original_prompt"]
-    synthesis = llm.invoke(
-        [
-            SystemMessage(content=RESEARCH_SYNTHESIS_PROMPT),
-            HumanMessage(
-                content=(
-                    f"Original prompt: {original_prompt}\n"
-                    f"Subject: {subject}\nStyle: {style}\n\n"
-                    f"Search Results:\n{raw_context}"
-                )
-            ),
-        ]
+    return _research_result(plan, outcomes, time.perf_counter() - wall_start, search_cache)
+
+
+def _research_result(
+    plan: _ResearchPlan,
+    outcomes: dict[str, SearchOutcome],
+    search_wall: float,
+    search_cache: DiskCache | None,
+) -> dict:
+    """Turn search outcomes into the research state update (and log it)."""
+    settings = get_settings()
+    subject, style = plan.subject, plan.style
+    subject_type, complexity = plan.subject_type, plan.complexity
+    reused, speculation = plan.reused, plan.speculation
+
+    style_results = outcomes["style"].results
+    factual_results = outcomes["factual"].results
+    trending_results = outcomes["trending"].results
+    composition_results = outcomes["composition"].results if "composition" in outcomes else None
+    canonical_results = outcomes["canonical"].results
+
+    # Reuse a cached synthesis for the same analysis; otherwise prepare the
+    # synthesis input so synthesize_node can run alongside ref_images_node.
+    synthesis_cache = _synthesis_cache()
+    synthesis_key = cache_key(
+        normalize_text(subject), normalize_text(style), subject_type, complexity
     )
+    synthesized = synthesis_cache.get_json(synthesis_key) if synthesis_cache else None
+    synthesis_hit = synthesized is not None
+    pending_synthesis = None
+    if not synthesis_hit:
+        if settings.research_compression_enabled:
+            compressed = compress_search_results(
+                [
+                    ("Style References", style_results),
+                    ("Factual Context", factual_results),
+                    ("Trending Techniques", trending_results),
+                    ("Scene Composition & Spatial Layout", composition_results),
+                    ("Canonical Reference", canonical_results),
+                ],
+                query=f"{subject} {style}",
+                token_budget=settings.research_context_token_budget,
+                dedup_threshold=settings.research_dedup_threshold,
+            )
+            raw_context = compressed.text
+            # "before" is what the uncompressed formatter (200-char snippets) sends
+            uncompressed = _format_search_results(
+                style_results,
+                factual_results,
+                trending_results,
+                composition_results,
+                canonical_results,
+            )
+            log_pipeline_step(
+                "Research",
+                f"synthesis_tokens before={estimate_tokens(uncompressed)}"
+                f"  after={compressed.tokens_after}  raw_snippets={compressed.raw_tokens}"
+                f"  sentences={compressed.sentences}  duplicates={compressed.duplicates}"
+                f"  kept={compressed.kept}",
+            )
+        else:
+            raw_context = _format_search_results(
+                style_results,
+                factual_results,
+                trending_results,
+                composition_results,
+                canonical_results,
+            )
+        # Only cache syntheses built from a complete set of search results
+        complete = all(o.status in ("ok", "cached") for o in outcomes.values())
+        pending_synthesis = {
+            "raw_context": raw_context,
+            "cache_key": synthesis_key if synthesis_cache and complete else None,
+        }
 
     # Extract image URLs from search results.
     # Canonical results are prepended so they get download priority.
@@ -203,12 +497,16 @@ def research_node(state: ImageAgentState) -> dict:
         _extract_key_points(composition_results) if composition_results else []
     )
     result = {
+        "pending_synthesis": pending_synthesis,
         "research_context": {
-            "synthesized": synthesis.content,
+            "synthesized": synthesized,
             "style_refs": _extract_key_points(style_results),
             "factual_context": _extract_key_points(factual_results),
             "trending_techniques": _extract_key_points(trending_results),
             "composition_context": composition_points,
+            "search_latency": {
+                name: round(o.latency, 3) for name, o in outcomes.items()
+            },
         },
         "reference_image_urls": image_urls if image_urls else None,
     }
@@ -221,4 +519,78 @@ def research_node(state: ImageAgentState) -> dict:
         f"  image_urls={len(image_urls)}"
         f"  canonical_images={canonical_image_count}",
     )
+    failed = [name for name, o in outcomes.items() if o.status in ("error", "timeout")]
+    log_pipeline_step(
+        "Research",
+        f"searches={len(outcomes)}  wall={search_wall:.2f}s  "
+        + "  ".join(f"{name}={o.latency:.2f}s" for name, o in outcomes.items())
+        + (f"  degraded={','.join(failed)}" if failed else ""),
+    )
+    if speculation is not None:
+        log_pipeline_step(
+            "Research",
+            f"speculative reused={','.join(reused) or 'none'}"
+            f"  discarded={len(speculation.pending) - len(reused)}",
+        )
+    if search_cache is not None:
+        search_hits = sum(1 for o in outcomes.values() if o.status == "cached")
+        log_pipeline_step(
+            "Research",
+            f"cache search_hits={search_hits}  search_misses={len(outcomes) - search_hits}"
+            f"  synthesis={'hit' if synthesis_hit else 'miss'}"
+            f"  total_hits={search_cache.hits + synthesis_cache.hits}"
+            f"  total_misses={search_cache.misses + synthesis_cache.misses}",
+        )
     return result
+
+
+def _synthesis_messages(state: ImageAgentState) -> list:
+    pending = state["pending_synthesis"]
+    analysis = state.get("prompt_analysis") or {}
+    original_prompt = state["original_prompt"]
+    subject = analysis.get("subject", original_prompt)
+    style = analysis.get("style", "photorealistic")
+    return [
+        SystemMessage(content=RESEARCH_SYNTHESIS_PROMPT),
+        HumanMessage(
+            content=(
+                f"Original prompt: {original_prompt}\n"
+                f"Subject: {subject}\nStyle: {style}\n\n"
+                f"Search Results:\n{pending['raw_context']}"
+            )
+        ),
+    ]
+
+
+def synthesize_node(state: ImageAgentState) -> dict:
+    """Synthesize the gathered search results into research context with an LLM.
+
+    Runs in parallel with ref_images_node; a no-op when research_node
+    already found a cached synthesis.
+    """
+    if not state.get("pending_synthesis"):
+        return {}
+    llm = get_clients().chat(get_settings().enhance_model, temperature=0.3)
+    synthesis = llm.invoke(_synthesis_messages(state))
+    return _synthesis_result(state, synthesis)
+
+
+async def asynthesize_node(state: ImageAgentState) -> dict:
+    """Async ``synthesize_node``."""
+    if not state.get("pending_synthesis"):
+        return {}
+    llm = get_clients().chat(get_settings().enhance_model, temperature=0.3)
+    synthesis = await llm.ainvoke(_synthesis_messages(state))
+    return _synthesis_result(state, synthesis)
+
+
+def _synthesis_result(state: ImageAgentState, synthesis) -> dict:
+    pending = state["pending_synthesis"]
+    synthesis_cache = _synthesis_cache()
+    if synthesis_cache and pending.get("cache_key"):
+        synthesis_cache.set_json(pending["cache_key"], synthesis.content)
+
+    research = dict(state.get("research_context") or {})
+    research["synthesized"] = synthesis.content
+    log_pipeline_step("Research", f"synthesized={len(synthesis.content or '')} chars")
+    return {"research_context": research, "pending_synthesis": None}
@@ -3,14 +3,24 @@
 from __future__ import annotations
 
 from image_agent.state import ImageAgentState
+from image_agent.utils.blobs import release_blobs
 
 
 def response_node(state: ImageAgentState) -> dict:
-    """Build a human-readable response summarizing the generation."""
+    """Build a human-readable response summarizing the generation.
+
+    This is the last node of a run, so the run's reference images are
+    released here — only when the run holds a reference to them (downloaded
+    by this run, or retained by the caller that passed them in).
+    """
+    if state.get("reference_images_owned"):
+        release_blobs(state.get("reference_images"))
+
     error = state.get("error")
     if error:
         return {
             "messages": [{"role": "assistant", "content": f"Error: {error}"}],
+            "reference_images_owned": False,
         }
 
     image_path = state.get("image_path", "unknown")
@@ -35,4 +45,5 @@ def response_node(state: ImageAgentState) -> dict:
     content = "\n".join(parts)
     return {
         "messages": [{"role": "assistant", "content": content}],
+        "reference_images_owned": False,
     }
@@ -4,24 +4,16 @@ from __future__ import annotations
 
 import json
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from image_agent.config import get_settings
+from image_agent.providers.clients import get_clients
 from image_agent.prompts.templates import ROUTER_SYSTEM_PROMPT
 from image_agent.state import ImageAgentState
 from image_agent.utils.logger import log_pipeline_step
 
 
-def router_node(state: ImageAgentState) -> dict:
-    """Classify the user prompt into action + style/mood/subject analysis."""
-    settings = get_settings()
-    llm = ChatOpenAI(
-        model=settings.router_model,
-        api_key=settings.openai_api_key,
-        temperature=0,
-    )
-
+def _router_messages(state: ImageAgentState) -> list:
     prompt = state["original_prompt"]
     last_image = state.get("last_image_path")
 
@@ -41,13 +33,18 @@ def router_node(state: ImageAgentState) -> dict:
             "\"I want robots farming\"). When in doubt, prefer \"generate\"."
         )
 
-    response = llm.invoke([
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=prompt),
-    ])
+    ]
+
+
+def _router_result(state: ImageAgentState, content: str) -> dict:
+    prompt = state["original_prompt"]
+    last_image = state.get("last_image_path")
 
     try:
-        analysis = json.loads(response.content)
+        analysis = json.loads(content)
     except json.JSONDecodeError:
         analysis = {
             "action": "generate",
@@ -74,3 +71,17 @@ def router_node(state: ImageAgentState) -> dict:
         f'  mood={analysis.get("mood", "")}',
     )
     return result
+
+
+def router_node(state: ImageAgentState) -> dict:
+    """Classify the user prompt into action + style/mood/subject analysis."""
+    llm = get_clients().chat(get_settings().router_model, temperature=0)
+    response = llm.invoke(_router_messages(state))
+    return _router_result(state, response.content)
+
+
+async def arouter_node(state: ImageAgentState) -> dict:
+    """Async ``router_node``."""
+    llm = get_clients().chat(get_settings().router_model, temperature=0)
+    response = await llm.ainvoke(_router_messages(state))
+    return _router_result(state, response.content)
@@ -7,8 +7,10 @@ import uuid
 from datetime import datetime, timezone
 
 from image_agent.config import get_settings
-from image_agent.providers.image_utils import base64_to_image, save_image
+from image_agent.providers.clients import get_clients
+from image_agent.providers.image_utils import save_image
 from image_agent.state import ImageAgentState
+from image_agent.utils.blobs import BlobNotFound, get_blob_store
 from image_agent.utils.logger import log_pipeline_step
 
 
@@ -17,11 +19,15 @@ def save_node(state: ImageAgentState) -> dict:
     settings = get_settings()
     metadata = state.get("generation_metadata") or {}
 
-    image_b64 = metadata.get("image_b64")
-    if not image_b64:
+    image_blob = metadata.get("image_blob")
+    if not image_blob:
         return {"error": "No image data to save."}
 
-    image_bytes = base64_to_image(image_b64)
+    blobs = get_blob_store()
+    try:
+        image_bytes = blobs.get(image_blob)
+    except BlobNotFound:
+        return {"error": "Generated image data is no longer available."}
     image_id = uuid.uuid4().hex[:12]
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     filename = f"{timestamp}_{image_id}.png"
@@ -31,8 +37,24 @@ def save_node(state: ImageAgentState) -> dict:
 
     image_path = save_image(image_bytes, output_dir / filename)
 
-    # Build metadata sidecar (strip the large b64 blob)
-    # Collect reference image URLs (just URLs, not the b64 data)
+    # A hedged run may also carry the losing provider's image
+    alternate = metadata.get("alternate")
+    alternate_info = None
+    if alternate:
+        try:
+            alternate_bytes = blobs.get(alternate["image_blob"])
+        except BlobNotFound:
+            alternate_bytes = None
+        if alternate_bytes is not None:
+            alternate_path = save_image(alternate_bytes, output_dir / f"{timestamp}_{image_id}_alt.png")
+            alternate_info = {
+                "provider": alternate.get("provider"),
+                "model": alternate.get("model"),
+                "image_path": str(alternate_path),
+            }
+
+    # Build metadata sidecar
+    # Collect reference image URLs (just URLs, not the image data)
     ref_urls = []
     for ref in (state.get("reference_images") or []):
         if ref.get("url"):
@@ -49,19 +71,35 @@ def save_node(state: ImageAgentState) -> dict:
         "provider": metadata.get("provider"),
         "model": metadata.get("model"),
         "params": metadata.get("params"),
+        "hedge": metadata.get("hedge"),
+        "fallback": metadata.get("fallback"),
+        "cached": metadata.get("cached", False),
+        "alternate": alternate_info,
         "prompt_analysis": analysis,
         "research_context": state.get("research_context"),
         "reference_image_urls": ref_urls if ref_urls else None,
         "reference_image_analysis": state.get("reference_image_analysis"),
+        "reference_image_features": state.get("reference_image_features"),
         "image_path": str(image_path),
     }
     sidecar_path = output_dir / f"{timestamp}_{image_id}.json"
     sidecar_path.write_text(json.dumps(sidecar, indent=2, default=str))
 
-    # Remove b64 from metadata flowing forward
-    clean_metadata = {k: v for k, v in metadata.items() if k != "image_b64"}
+    # The bytes are on disk now; drop the handles and free the blobs
+    clean_metadata = {k: v for k, v in metadata.items() if k not in ("image_blob", "alternate")}
+    if alternate_info:
+        clean_metadata["alternate"] = alternate_info
+    blobs.discard(image_blob)
+    if alternate:
+        blobs.discard(alternate["image_blob"])
 
     log_pipeline_step("Save", f"{image_path}")
+    client_stats = get_clients().stats()
+    if client_stats:
+        log_pipeline_step("Clients", "  ".join(
+            f"{name}: requests={s['requests']} new_conns={s['new_connections']} reused={s['reused']}"
+            for name, s in sorted(client_stats.items())
+        ))
     return {
         "image_path": str(image_path),
         "image_id": image_id,
@@ -4,24 +4,16 @@ from __future__ import annotations
 
 import json
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from image_agent.config import get_settings
+from image_agent.providers.clients import get_clients
 from image_agent.prompts.templates import SUGGEST_SYSTEM_PROMPT
 from image_agent.state import ImageAgentState
 from image_agent.utils.logger import log_pipeline_step
 
 
-def suggest_node(state: ImageAgentState) -> dict:
-    """Generate 3 creative direction suggestions based on prompt and research."""
-    settings = get_settings()
-    llm = ChatOpenAI(
-        model=settings.enhance_model,
-        api_key=settings.openai_api_key,
-        temperature=0.9,
-    )
-
+def _suggest_messages(state: ImageAgentState) -> list:
     prompt = state["original_prompt"]
     analysis = state.get("prompt_analysis", {})
     research = state.get("research_context", {})
@@ -52,13 +44,18 @@ Research context:
 {visual_block}
 Generate 3 distinct creative directions for this image."""
 
-    response = llm.invoke([
+    return [
         SystemMessage(content=SUGGEST_SYSTEM_PROMPT),
         HumanMessage(content=user_msg),
-    ])
+    ]
+
+
+def _suggest_result(state: ImageAgentState, content: str) -> dict:
+    prompt = state["original_prompt"]
+    analysis = state.get("prompt_analysis", {})
 
     try:
-        data = json.loads(response.content)
+        data = json.loads(content)
         suggestions = data.get("suggestions", [])
         if not suggestions or not isinstance(suggestions, list):
             raise ValueError("No suggestions in response")
@@ -78,3 +75,17 @@ Generate 3 distinct creative directions for this image."""
     titles = [f"{i+1}: {s.get('title', '?')}" for i, s in enumerate(suggestions[:3])]
     log_pipeline_step("Suggest", "  ".join(titles))
     return {"suggestions": suggestions}
+
+
+def suggest_node(state: ImageAgentState) -> dict:
+    """Generate 3 creative direction suggestions based on prompt and research."""
+    llm = get_clients().chat(get_settings().enhance_model, temperature=0.9)
+    response = llm.invoke(_suggest_messages(state))
+    return _suggest_result(state, response.content)
+
+
+async def asuggest_node(state: ImageAgentState) -> dict:
+    """Async ``suggest_node``."""
+    llm = get_clients().chat(get_settings().enhance_model, temperature=0.9)
+    response = await llm.ainvoke(_suggest_messages(state))
+    return _suggest_result(state, response.content)
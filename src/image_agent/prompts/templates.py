@@ -647,3 +647,24 @@ and what VARIES (these are artistic interpretations).
 Keep the analysis under 500 words. Focus on details that would help generate an accurate, \
 faithful image of the subject.\
 """
+
+REFERENCE_IMAGE_SINGLE_ANALYSIS_PROMPT = """\
+You are a visual analysis expert. You are given ONE reference image related to a subject \
+that will be used for AI image generation. Other images of the same subject are analyzed \
+separately and the descriptions are merged afterwards.
+
+Describe the image as plain lines, one per aspect, each starting with its label exactly as \
+written below followed by a colon. Skip an aspect only if it is not visible.
+
+Character Appearance: face, skin tone, build, hair, age range, distinguishing features, expression
+Clothing & Attire: garments, colors, materials, patterns, accessories, headwear, footwear
+Iconographic Details: weapons, symbols, divine attributes, sacred objects, mounts, halos, mudras
+Color Palette: dominant and accent colors, skin color conventions, background colors
+Pose & Composition: posture, action, implied camera angle, scale, foreground/background
+Setting & Environment: architecture, landscape, celestial elements, lighting, time of day
+Art Style: painting tradition, level of realism, line quality, texture, period influence
+Scene Object Relationships: every distinct object and where it sits relative to the others
+
+Write short, concrete, visual sentences an image generation model can use directly. \
+Keep the whole description under 200 words.\
+"""
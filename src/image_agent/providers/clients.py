@@ -0,0 +1,274 @@
+"""Process-wide registry of provider and LLM clients.
+
+Every OpenAI / Gemini / Hugging Face / Tavily call goes through one shared,
+thread-safe client per service, backed by one pooled HTTP client per service,
+so chat sessions and batch runs reuse warm TLS connections instead of
+opening a fresh pool per call. Request and new-connection counts per
+service are available from ``ClientRegistry.stats()``.
+
+Async clients are bound to the event loop that created them (their
+connection pools hold loop-owned sockets), so they are cached per running
+loop; the sync clients are shared by every thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from image_agent.config import Settings, get_settings
+from image_agent.providers.download_engine import (
+    ConnectionStats,
+    build_async_http_client,
+    build_http_client,
+)
+
+if TYPE_CHECKING:
+    import requests
+    from google import genai
+    from huggingface_hub import AsyncInferenceClient, InferenceClient
+    from langchain_openai import ChatOpenAI
+    from openai import AsyncOpenAI, OpenAI
+    from tavily import AsyncTavilyClient, TavilyClient
+
+# Image generation calls can take minutes; SDKs pass shorter per-call
+# timeouts where they want them.
+_API_TIMEOUT = 600.0
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class ClientRegistry:
+    """Lazily built, shared sync and async clients for one set of settings."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._lock = threading.RLock()
+        self._clients: dict[Any, Any] = {}
+        self._loop_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._stats: dict[str, ConnectionStats] = {}
+
+    def _get(self, key: Any, factory) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+            return client
+
+    def _get_async(self, key: Any, factory) -> Any:
+        """Like ``_get``, but one client per running event loop."""
+        loop = _running_loop()
+        if loop is None:
+            return self._get(("no_loop", key), factory)
+        with self._lock:
+            clients = self._loop_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = factory()
+            return client
+
+    def _service_stats(self, service: str) -> ConnectionStats:
+        with self._lock:
+            return self._stats.setdefault(service, ConnectionStats())
+
+    def http(self, service: str) -> httpx.Client:
+        """Shared pooled sync httpx client for one service."""
+        s = self.settings
+        return self._get(("http", service), lambda: build_http_client(
+            self._service_stats(service),
+            max_connections=s.client_max_connections,
+            max_keepalive=s.client_max_keepalive,
+            http2=s.client_http2,
+            timeout=_API_TIMEOUT,
+        ))
+
+    def async_http(self, service: str) -> httpx.AsyncClient:
+        """Pooled async httpx client for one service on the running loop."""
+        s = self.settings
+        return self._get_async(("async_http", service), lambda: build_async_http_client(
+            self._service_stats(service),
+            max_connections=s.client_max_connections,
+            max_keepalive=s.client_max_keepalive,
+            http2=s.client_http2,
+            timeout=_API_TIMEOUT,
+        ))
+
+    # -- OpenAI ------------------------------------------------------------
+
+    def openai(self) -> OpenAI:
+        from openai import OpenAI
+
+        return self._get("openai", lambda: OpenAI(
+            api_key=self.settings.openai_api_key, http_client=self.http("openai")
+        ))
+
+    def async_openai(self) -> AsyncOpenAI:
+        from openai import AsyncOpenAI
+
+        return self._get_async("async_openai", lambda: AsyncOpenAI(
+            api_key=self.settings.openai_api_key, http_client=self.async_http("openai")
+        ))
+
+    def chat(self, model: str, temperature: float) -> ChatOpenAI:
+        """Chat model for (model, temperature); all share the OpenAI connection pools.
+
+        Called inside an event loop, the model's ``ainvoke`` uses that loop's
+        async pool; from plain threads only ``invoke`` is pooled.
+        """
+        from langchain_openai import ChatOpenAI
+
+        def build() -> ChatOpenAI:
+            extra = {}
+            if _running_loop() is not None:
+                extra["http_async_client"] = self.async_http("openai")
+            return ChatOpenAI(
+                model=model,
+                api_key=self.settings.openai_api_key,
+                temperature=temperature,
+                http_client=self.http("openai"),
+                **extra,
+            )
+
+        if _running_loop() is None:
+            return self._get(("chat", model, temperature), build)
+        return self._get_async(("chat", model, temperature), build)
+
+    # -- Gemini / Hugging Face / Tavily ------------------------------------
+
+    def gemini(self) -> genai.Client:
+        """google-genai client on the shared sync httpx pool."""
+        from google import genai
+        from google.genai import types
+
+        return self._get("gemini", lambda: genai.Client(
+            api_key=self.settings.gemini_api_key,
+            http_options=types.HttpOptions(httpx_client=self.http("gemini")),
+        ))
+
+    def async_gemini(self) -> genai.client.AsyncClient:
+        """google-genai async surface (``Client.aio``) on the running loop's pool."""
+        from google import genai
+        from google.genai import types
+
+        return self._get_async("async_gemini", lambda: genai.Client(
+            api_key=self.settings.gemini_api_key,
+            http_options=types.HttpOptions(httpx_async_client=self.async_http("gemini")),
+        ).aio)
+
+    def inference(self) -> InferenceClient:
+        """Hugging Face InferenceClient.
+
+        huggingface_hub already routes every call through its own process-wide
+        session (requests or httpx depending on its version), so only the
+        client object is shared here and its traffic is not counted.
+        """
+        from huggingface_hub import InferenceClient
+
+        return self._get("inference", lambda: InferenceClient(
+            token=self.settings.huggingface_api_key
+        ))
+
+    def async_inference(self) -> AsyncInferenceClient:
+        from huggingface_hub import AsyncInferenceClient
+
+        return self._get_async("async_inference", lambda: AsyncInferenceClient(
+            token=self.settings.huggingface_api_key
+        ))
+
+    def tavily(self) -> TavilyClient:
+        """Tavily client on a pooled ``requests`` session (the SDK is requests-based)."""
+        from tavily import TavilyClient
+
+        return self._get("tavily", lambda: TavilyClient(
+            api_key=self.settings.tavily_api_key,
+            session=self._requests_session("tavily"),
+        ))
+
+    def async_tavily(self) -> AsyncTavilyClient:
+        """Async Tavily client; it configures the base URL and auth on its own pool."""
+        from tavily import AsyncTavilyClient
+
+        return self._get_async("async_tavily", lambda: AsyncTavilyClient(
+            api_key=self.settings.tavily_api_key,
+            client=self.async_http("tavily"),
+        ))
+
+    def _requests_session(self, service: str) -> requests.Session:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+
+        stats = self._service_stats(service)
+
+        class _CountingHTTPPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.record_connection(self.host)
+                return super()._new_conn()
+
+        class _CountingHTTPSPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.record_connection(self.host)
+                return super()._new_conn()
+
+        class _CountingAdapter(HTTPAdapter):
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                self.poolmanager.pool_classes_by_scheme = {
+                    "http": _CountingHTTPPool,
+                    "https": _CountingHTTPSPool,
+                }
+
+        session = requests.Session()
+        adapter = _CountingAdapter(
+            pool_connections=4, pool_maxsize=self.settings.client_max_keepalive
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.hooks["response"].append(
+            lambda resp, *args, **kwargs: stats.record_request(httpx.URL(resp.url).host)
+        )
+        return session
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-service request / new-connection / reuse counts."""
+        with self._lock:
+            services = dict(self._stats)
+        return {name: stats.snapshot() for name, stats in services.items()}
+
+
+_registries: dict[tuple, ClientRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def _settings_key(settings: Settings) -> tuple:
+    return (
+        settings.openai_api_key,
+        settings.gemini_api_key,
+        settings.huggingface_api_key,
+        settings.tavily_api_key,
+        settings.client_max_connections,
+        settings.client_max_keepalive,
+        settings.client_http2,
+    )
+
+
+def get_clients() -> ClientRegistry:
+    """Return the shared client registry for the current settings."""
+    settings = get_settings()
+    key = _settings_key(settings)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = ClientRegistry(settings)
+        return registry
@@ -0,0 +1,240 @@
+"""Process-wide download engine: one pooled httpx client with concurrency caps.
+
+Every reference image download shares the same keep-alive (and, when the
+``h2`` package is installed, HTTP/2) connection pool, so several images from
+one host reuse a single TLS connection. Downloads run on a long-lived thread
+pool and are throttled per host and globally.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from typing import Any, Callable, Iterator
+
+import httpx
+
+from image_agent.config import get_settings
+
+try:
+    import h2  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    _HTTP2_AVAILABLE = False
+
+
+class ConnectionStats:
+    """Thread-safe request / connection / timing counters, overall and per host.
+
+    New connections are counted from httpcore's ``connect_tcp`` trace events,
+    so ``requests - new_connections`` is the number of requests that reused
+    a pooled connection.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: dict[str, int] = defaultdict(int)
+        self.new_connections: dict[str, int] = defaultdict(int)
+        self.bytes: dict[str, int] = defaultdict(int)
+        self.seconds: dict[str, float] = defaultdict(float)
+
+    def record_request(self, host: str) -> None:
+        with self._lock:
+            self.requests[host] += 1
+
+    def record_connection(self, host: str) -> None:
+        with self._lock:
+            self.new_connections[host] += 1
+
+    def on_request(self, request: httpx.Request) -> None:
+        """httpx request hook: attach a trace callback that knows the host."""
+        host = request.url.host
+        self.record_request(host)
+        request.extensions["trace"] = partial(self._trace, host)
+
+    async def aon_request(self, request: httpx.Request) -> None:
+        """``httpx.AsyncClient`` request hook (hooks and traces must be awaitable)."""
+        host = request.url.host
+        self.record_request(host)
+        request.extensions["trace"] = partial(self._atrace, host)
+
+    def _trace(self, host: str, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.record_connection(host)
+
+    async def _atrace(self, host: str, event_name: str, info: dict) -> None:
+        self._trace(host, event_name, info)
+
+    def record_download(self, host: str, size: int, seconds: float) -> None:
+        with self._lock:
+            self.bytes[host] += size
+            self.seconds[host] += seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return totals plus a per-host breakdown."""
+        with self._lock:
+            hosts = sorted(set(self.requests) | set(self.new_connections))
+            per_host = {
+                h: {
+                    "requests": self.requests[h],
+                    "new_connections": self.new_connections[h],
+                    "bytes": self.bytes[h],
+                    "seconds": round(self.seconds[h], 3),
+                }
+                for h in hosts
+            }
+        requests = sum(v["requests"] for v in per_host.values())
+        new_connections = sum(v["new_connections"] for v in per_host.values())
+        return {
+            "requests": requests,
+            "new_connections": new_connections,
+            "reused": max(0, requests - new_connections),
+            "bytes": sum(v["bytes"] for v in per_host.values()),
+            "seconds": round(sum(v["seconds"] for v in per_host.values()), 3),
+            "hosts": per_host,
+        }
+
+
+def build_http_client(
+    stats: ConnectionStats,
+    *,
+    max_connections: int,
+    max_keepalive: int,
+    http2: bool,
+    timeout: float = 60.0,
+    follow_redirects: bool = False,
+    headers: dict[str, str] | None = None,
+) -> httpx.Client:
+    """Create a pooled httpx client whose requests are counted in ``stats``."""
+    return httpx.Client(
+        http2=http2 and _HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=30.0,
+        ),
+        timeout=timeout,
+        follow_redirects=follow_redirects,
+        headers=headers,
+        event_hooks={"request": [stats.on_request]},
+    )
+
+
+def build_async_http_client(
+    stats: ConnectionStats,
+    *,
+    max_connections: int,
+    max_keepalive: int,
+    http2: bool,
+    timeout: float = 60.0,
+    follow_redirects: bool = False,
+) -> httpx.AsyncClient:
+    """Async counterpart of ``build_http_client``, counted in the same ``stats``."""
+    return httpx.AsyncClient(
+        http2=http2 and _HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=30.0,
+        ),
+        timeout=timeout,
+        follow_redirects=follow_redirects,
+        event_hooks={"request": [stats.aon_request]},
+    )
+
+
+class DownloadEngine:
+    """Shared pooled client + executor with per-host and global concurrency caps."""
+
+    def __init__(
+        self,
+        *,
+        max_connections: int,
+        max_per_host: int,
+        http2: bool,
+    ) -> None:
+        self.stats = ConnectionStats()
+        self.client = build_http_client(
+            self.stats,
+            max_connections=max_connections,
+            max_keepalive=max_connections,
+            http2=http2,
+            follow_redirects=True,
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_connections, thread_name_prefix="download"
+        )
+        self._global = threading.BoundedSemaphore(max_connections)
+        self._max_per_host = max_per_host
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self._max_per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def get(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: float = 60.0,
+    ) -> httpx.Response:
+        """GET a URL through the shared pool, respecting concurrency caps."""
+        host = httpx.URL(url).host
+        with self._host_slot(host), self._global:
+            start = time.perf_counter()
+            resp = self.client.get(url, headers=headers, timeout=timeout)
+            self.stats.record_download(host, len(resp.content), time.perf_counter() - start)
+        return resp
+
+    @contextmanager
+    def stream(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: float = 60.0,
+    ) -> Iterator[httpx.Response]:
+        """Open a streaming GET; the body is read (or abandoned) by the caller.
+
+        Leaving the block early closes the response, so the rest of the body
+        is never downloaded. ``resp.extensions["download_start"]`` is the
+        ``perf_counter`` time the request was sent, after any wait for a
+        connection slot.
+        """
+        host = httpx.URL(url).host
+        with self._host_slot(host), self._global:
+            start = time.perf_counter()
+            with self.client.stream("GET", url, headers=headers, timeout=timeout) as resp:
+                resp.extensions["download_start"] = start
+                try:
+                    yield resp
+                finally:
+                    self.stats.record_download(
+                        host, resp.num_bytes_downloaded, time.perf_counter() - start
+                    )
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Run ``fn`` on the engine's long-lived download executor."""
+        return self.executor.submit(fn, *args, **kwargs)
+
+
+@lru_cache
+def get_download_engine() -> DownloadEngine:
+    """Return the process-wide download engine."""
+    settings = get_settings()
+    return DownloadEngine(
+        max_connections=settings.download_max_connections,
+        max_per_host=settings.download_max_per_host,
+        http2=settings.download_http2,
+    )
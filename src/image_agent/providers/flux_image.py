@@ -2,10 +2,70 @@
 
 from __future__ import annotations
 
-import base64
 import io
 
 from image_agent.config import get_settings
+from image_agent.providers.clients import get_clients
+from image_agent.utils.blobs import get_blob_store
+from image_agent.utils.image_ops import RAW_MODES
+from image_agent.utils.image_pool import get_image_pool
+
+
+def _flux_request(
+    prompt: str,
+    *,
+    width: int,
+    height: int,
+    num_inference_steps: int,
+    reference_image: dict | None,
+    seed: int | None,
+) -> tuple[str, tuple, dict]:
+    """Return (client method name, args, kwargs) for the sync or async client."""
+    from PIL import Image
+
+    model = get_settings().flux_model
+    if reference_image:
+        # Use image-to-image with the reference (the API takes no seed here)
+        ref_img = Image.open(io.BytesIO(get_blob_store().get(reference_image["blob"])))
+        return "image_to_image", (ref_img,), {"prompt": prompt, "model": model}
+    kwargs = {
+        "model": model,
+        "width": width,
+        "height": height,
+        "num_inference_steps": num_inference_steps,
+    }
+    if seed is not None:
+        kwargs["seed"] = seed
+    return "text_to_image", (prompt,), kwargs
+
+
+def _encode_args(image) -> tuple | None:
+    """``encode_raw`` arguments for the image worker pool, or None to encode in-process.
+
+    Raw pixel bytes carry no palette or ``info``, so palette images are
+    expanded to RGB/RGBA first and any other non-plain mode is encoded here.
+    """
+    if image.mode in ("P", "PA"):
+        has_alpha = image.mode == "PA" or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    if image.mode not in RAW_MODES:
+        return None
+    return image.tobytes(), image.mode, image.size, "PNG"
+
+
+def _encode_png(image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _to_png(image) -> bytes:
+    # Convert PIL Image to PNG bytes (encoding runs in the image worker pool)
+    args = _encode_args(image)
+    if args is None:
+        return _encode_png(image)
+    png, _ = get_image_pool().run("encode_raw", *args)
+    return png
 
 
 def generate_flux_image(
@@ -15,38 +75,47 @@ def generate_flux_image(
     height: int = 1024,
     num_inference_steps: int = 25,
     reference_image: dict | None = None,
+    seed: int | None = None,
 ) -> bytes:
     """Generate an image using Flux on Hugging Face Inference API. Returns raw bytes.
 
     If reference_image is provided, uses image_to_image for visual conditioning
-    (Flux only supports a single reference image).
+    (Flux only supports a single reference image). ``seed`` applies to
+    text-to-image only.
     """
-    from huggingface_hub import InferenceClient
-    from PIL import Image
+    method, args, kwargs = _flux_request(
+        prompt,
+        width=width,
+        height=height,
+        num_inference_steps=num_inference_steps,
+        reference_image=reference_image,
+        seed=seed,
+    )
+    image = getattr(get_clients().inference(), method)(*args, **kwargs)
+    return _to_png(image)
 
-    settings = get_settings()
-    client = InferenceClient(token=settings.huggingface_api_key)
 
-    if reference_image:
-        # Use image-to-image with the reference
-        img_bytes = base64.b64decode(reference_image["image_b64"])
-        ref_img = Image.open(io.BytesIO(img_bytes))
-
-        image = client.image_to_image(
-            ref_img,
-            prompt=prompt,
-            model=settings.flux_model,
-        )
-    else:
-        image = client.text_to_image(
-            prompt,
-            model=settings.flux_model,
-            width=width,
-            height=height,
-            num_inference_steps=num_inference_steps,
-        )
-
-    # Convert PIL Image to bytes
-    buf = io.BytesIO()
-    image.save(buf, format="PNG")
-    return buf.getvalue()
+async def agenerate_flux_image(
+    prompt: str,
+    *,
+    width: int = 1024,
+    height: int = 1024,
+    num_inference_steps: int = 25,
+    reference_image: dict | None = None,
+    seed: int | None = None,
+) -> bytes:
+    """Async ``generate_flux_image`` on ``AsyncInferenceClient``."""
+    method, args, kwargs = _flux_request(
+        prompt,
+        width=width,
+        height=height,
+        num_inference_steps=num_inference_steps,
+        reference_image=reference_image,
+        seed=seed,
+    )
+    image = await getattr(get_clients().async_inference(), method)(*args, **kwargs)
+    args = _encode_args(image)
+    if args is None:
+        return _encode_png(image)
+    png, _ = await get_image_pool().arun("encode_raw", *args)
+    return png
@@ -2,36 +2,29 @@
 
 from __future__ import annotations
 
-import base64
 import io
 
 from image_agent.config import get_settings
+from image_agent.providers.clients import get_clients
+from image_agent.utils.blobs import get_blob_store
 
 
-def generate_gemini_image(
+def _gemini_request(
     prompt: str,
-    *,
-    aspect_ratio: str = "1:1",
-    reference_images: list[dict] | None = None,
-) -> bytes:
-    """Generate an image using Gemini 2.5 Flash. Returns raw PNG bytes.
-
-    If reference_images are provided, builds a multimodal request with
-    PIL Image objects alongside the text prompt.
-    """
-    from google import genai
+    aspect_ratio: str,
+    reference_images: list[dict] | None,
+    seed: int | None,
+) -> dict:
+    """Build generate_content arguments (shared by the sync and async calls)."""
     from google.genai import types
     from PIL import Image
 
-    settings = get_settings()
-    client = genai.Client(api_key=settings.gemini_api_key)
-
     # Build contents: multimodal if we have reference images, text-only otherwise
     if reference_images:
+        blobs = get_blob_store()
         contents: list = []
         for ref in reference_images:
-            img_bytes = base64.b64decode(ref["image_b64"])
-            img = Image.open(io.BytesIO(img_bytes))
+            img = Image.open(io.BytesIO(blobs.get(ref["blob"])))
             contents.append(img)
         contents.append(
             f"Using the reference images above for visual accuracy, generate: {prompt}"
@@ -39,19 +32,53 @@ def generate_gemini_image(
     else:
         contents = prompt
 
-    response = client.models.generate_content(
-        model=settings.gemini_image_model,
-        contents=contents,
-        config=types.GenerateContentConfig(
+    return {
+        "model": get_settings().gemini_image_model,
+        "contents": contents,
+        "config": types.GenerateContentConfig(
             response_modalities=["IMAGE"],
+            seed=seed,
             image_config=types.ImageConfig(
                 aspect_ratio=aspect_ratio,
             ),
         ),
-    )
+    }
 
+
+def _image_from_response(response) -> bytes:
     for part in response.parts:
         if part.inline_data is not None:
             return part.inline_data.data
 
     raise RuntimeError("Gemini returned no image data in the response")
+
+
+def generate_gemini_image(
+    prompt: str,
+    *,
+    aspect_ratio: str = "1:1",
+    reference_images: list[dict] | None = None,
+    seed: int | None = None,
+) -> bytes:
+    """Generate an image using Gemini 2.5 Flash. Returns raw PNG bytes.
+
+    If reference_images are provided, builds a multimodal request with
+    PIL Image objects alongside the text prompt. A seed makes repeated
+    requests more reproducible (best effort on Gemini's side).
+    """
+    request = _gemini_request(prompt, aspect_ratio, reference_images, seed)
+    response = get_clients().gemini().models.generate_content(**request)
+    return _image_from_response(response)
+
+
+async def agenerate_gemini_image(
+    prompt: str,
+    *,
+    aspect_ratio: str = "1:1",
+    reference_images: list[dict] | None = None,
+    seed: int | None = None,
+) -> bytes:
+    """Async ``generate_gemini_image`` on the google-genai ``aio`` client."""
+    request = _gemini_request(prompt, aspect_ratio, reference_images, seed)
+    response = await get_clients().async_gemini().models.generate_content(**request)
+    return _image_from_response(response)
@@ -0,0 +1,205 @@
+"""Per provider/model health: rolling error rate, latency percentiles, circuit breakers.
+
+A circuit is *closed* while a provider behaves. It *opens* after
+``consecutive_failures`` failures in a row, or when the error rate over the
+rolling window reaches ``error_rate`` (with at least ``min_samples`` calls).
+An open circuit rejects calls for ``open_s`` seconds, then goes *half-open*
+and lets exactly one probe through: success closes it, failure re-opens it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from functools import lru_cache
+
+from image_agent.config import get_settings
+from image_agent.utils.disk_cache import DiskCache, open_cache
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile(samples: list[float], q: float) -> float | None:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class ProviderHealth:
+    """Circuit breaker state and rolling call history per provider/model.
+
+    Records are persisted in a DiskCache so a breaker opened by one run is
+    still open for the next; in-flight probes are tracked in memory only.
+    """
+
+    def __init__(
+        self,
+        store: DiskCache,
+        *,
+        window: float,
+        max_events: int,
+        consecutive_failures: int,
+        error_rate: float,
+        min_samples: int,
+        open_for: float,
+    ) -> None:
+        self.store = store
+        self.window = window
+        self.max_events = max_events
+        self.consecutive_failures = consecutive_failures
+        self.error_rate = error_rate
+        self.min_samples = min_samples
+        self.open_for = open_for
+        self._records: dict[str, dict] = {}
+        self._probes: dict[str, float] = {}  # key -> probe start time
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(provider: str, model: str) -> str:
+        return f"{provider}/{model}"
+
+    def _record(self, key: str) -> dict:
+        """Return the mutable record for a key. Caller holds the lock."""
+        record = self._records.get(key)
+        if record is None:
+            record = self.store.get_json(key) or {
+                "state": CLOSED,
+                "opened_at": None,
+                "closed_at": None,  # error rate only counts calls since recovery
+                "consecutive_failures": 0,
+                "events": [],  # [timestamp, ok, seconds]
+                "last_error": None,
+            }
+            self._records[key] = record
+        return record
+
+    def _windowed(self, record: dict, now: float) -> list[list]:
+        return [e for e in record["events"] if now - e[0] <= self.window]
+
+    def _current_state(self, record: dict, now: float) -> str:
+        if record["state"] == OPEN and now - record["opened_at"] >= self.open_for:
+            return HALF_OPEN
+        return record["state"]
+
+    def state(self, provider: str, model: str) -> str:
+        with self._lock:
+            return self._current_state(self._record(self.key(provider, model)), time.time())
+
+    def acquire(self, provider: str, model: str) -> bool:
+        """May a call go to this provider now? Claims the probe when half-open.
+
+        Every True must be followed by ``record_success``, ``record_failure``
+        or, for a call abandoned before it finished, ``release``.
+        """
+        key = self.key(provider, model)
+        now = time.time()
+        with self._lock:
+            state = self._current_state(self._record(key), now)
+            if state == CLOSED:
+                return True
+            if state == OPEN:
+                return False
+            # Half-open: one probe at a time; a probe that never reported
+            # back (crashed run) is given up after another open period
+            probe = self._probes.get(key)
+            if probe is not None and now - probe < self.open_for:
+                return False
+            self._probes[key] = now
+            return True
+
+    def release(self, provider: str, model: str) -> None:
+        """Hand back a claimed half-open probe without recording an outcome."""
+        with self._lock:
+            self._probes.pop(self.key(provider, model), None)
+
+    def record_success(self, provider: str, model: str, seconds: float) -> None:
+        key = self.key(provider, model)
+        now = time.time()
+        with self._lock:
+            record = self._record(key)
+            self._add_event(record, now, True, seconds)
+            record["consecutive_failures"] = 0
+            if record["state"] != CLOSED:
+                record["closed_at"] = now
+            record["state"] = CLOSED
+            record["opened_at"] = None
+            self._probes.pop(key, None)
+            self.store.set_json(key, record)
+
+    def record_failure(self, provider: str, model: str, seconds: float, error: str) -> None:
+        key = self.key(provider, model)
+        now = time.time()
+        with self._lock:
+            record = self._record(key)
+            self._add_event(record, now, False, seconds)
+            record["consecutive_failures"] += 1
+            record["last_error"] = error[:200]
+            was_probe = self._probes.pop(key, None) is not None
+            if was_probe or self._should_open(record, now):
+                record["state"] = OPEN
+                record["opened_at"] = now
+            self.store.set_json(key, record)
+
+    def _add_event(self, record: dict, now: float, ok: bool, seconds: float) -> None:
+        events = self._windowed(record, now) + [[now, ok, round(seconds, 3)]]
+        record["events"] = events[-self.max_events:]
+
+    def _should_open(self, record: dict, now: float) -> bool:
+        if record["state"] != CLOSED:
+            return True
+        if record["consecutive_failures"] >= self.consecutive_failures:
+            return True
+        closed_at = record.get("closed_at") or 0.0
+        events = [e for e in self._windowed(record, now) if e[0] >= closed_at]
+        if len(events) < self.min_samples:
+            return False
+        failures = sum(1 for e in events if not e[1])
+        return failures / len(events) >= self.error_rate
+
+    def snapshot(self, provider: str, model: str) -> dict:
+        """State plus rolling stats for display."""
+        now = time.time()
+        with self._lock:
+            record = self._record(self.key(provider, model))
+            events = self._windowed(record, now)
+            state = self._current_state(record, now)
+            opened_at = record["opened_at"]
+            consecutive = record["consecutive_failures"]
+            last_error = record["last_error"]
+        latencies = [e[2] for e in events if e[1]]
+        failures = sum(1 for e in events if not e[1])
+        return {
+            "provider": provider,
+            "model": model,
+            "state": state,
+            "calls": len(events),
+            "error_rate": failures / len(events) if events else None,
+            "p50_s": _percentile(latencies, 0.5),
+            "p95_s": _percentile(latencies, 0.95),
+            "consecutive_failures": consecutive,
+            "retry_in_s": (
+                max(0.0, opened_at + self.open_for - now) if state == OPEN else None
+            ),
+            "last_error": last_error,
+        }
+
+
+@lru_cache
+def get_provider_health() -> ProviderHealth | None:
+    """Process-wide provider health table, or None when disabled."""
+    settings = get_settings()
+    if not settings.provider_health_enabled:
+        return None
+    store = open_cache("provider_health", ttl=settings.provider_health_ttl_s)
+    return ProviderHealth(
+        store,
+        window=settings.provider_health_window_s,
+        max_events=settings.provider_health_max_events,
+        consecutive_failures=settings.provider_breaker_consecutive_failures,
+        error_rate=settings.provider_breaker_error_rate,
+        min_samples=settings.provider_breaker_min_samples,
+        open_for=settings.provider_breaker_open_s,
+    )
@@ -1,22 +1,146 @@
-"""Image utility functions: download, base64 encode/decode, resize."""
+"""Image utility functions: download, base64 encode/decode, resize.
+
+Downloads go through the shared pooled client in ``download_engine``.
+"""
 
 from __future__ import annotations
 
 import base64
-import io
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
 import httpx
-from PIL import Image
+from PIL import ImageFile
+
+from image_agent.providers.download_engine import get_download_engine
+from image_agent.utils.image_pool import get_image_pool
 
 
 def download_image(url: str, timeout: float = 60.0) -> bytes:
     """Download an image from a URL and return raw bytes."""
-    resp = httpx.get(url, timeout=timeout, follow_redirects=True)
+    resp = get_download_engine().get(url, timeout=timeout)
     resp.raise_for_status()
     return resp.content
 
 
+@dataclass
+class DownloadResult:
+    """Body and cache validators from a (possibly conditional) download."""
+
+    content: bytes | None  # None when the server answered 304 Not Modified
+    etag: str | None = None
+    last_modified: str | None = None
+    seconds: float | None = None  # request sent → body read (excludes slot waits)
+
+    @property
+    def not_modified(self) -> bool:
+        return self.content is None
+
+
+class DownloadRejected(Exception):
+    """Raised when a streaming download is aborted before completion."""
+
+    def __init__(self, url: str, reason: str) -> None:
+        super().__init__(f"{reason}: {url}")
+        self.url = url
+        self.reason = reason
+
+
+# Content types that may still be images (sniffed from the bytes instead)
+_GENERIC_CONTENT_TYPES = ("", "application/octet-stream", "binary/octet-stream")
+
+
+def download_image_conditional(
+    url: str,
+    *,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    timeout: float = 60.0,
+    max_bytes: int | None = None,
+    min_dimension: int | None = None,
+    max_pixels: int | None = None,
+    sniff_bytes: int = 64 * 1024,
+    cancel: threading.Event | None = None,
+    max_seconds: float | None = None,
+) -> DownloadResult:
+    """Stream an image, revalidating with If-None-Match / If-Modified-Since.
+
+    The download is aborted with ``DownloadRejected`` as soon as it is known
+    to be unusable: a non-image Content-Type, a Content-Length over
+    ``max_bytes``, an image header whose dimensions are below
+    ``min_dimension`` or above ``max_pixels``, bytes that cannot be identified
+    as an image within ``sniff_bytes``, a body exceeding ``max_bytes``, or
+    ``cancel`` being set by a caller that no longer needs the image.
+
+    ``timeout`` applies to each network operation (connect, each read);
+    ``max_seconds`` bounds the whole download from the moment the request is
+    sent, and exceeding it raises ``httpx.ReadTimeout``.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with get_download_engine().stream(url, headers=headers, timeout=timeout) as resp:
+        started = resp.extensions.get("download_start", time.perf_counter())
+        if resp.status_code == 304:
+            return DownloadResult(None, etag, last_modified, time.perf_counter() - started)
+        resp.raise_for_status()
+
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type.startswith("image/") and content_type not in _GENERIC_CONTENT_TYPES:
+            raise DownloadRejected(url, f"content-type {content_type}")
+        if content_type == "image/svg+xml":
+            raise DownloadRejected(url, "svg")
+        length = resp.headers.get("Content-Length")
+        if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+            raise DownloadRejected(url, f"content-length {length}")
+
+        parser = ImageFile.Parser()
+        chunks: list[bytes] = []
+        received = 0
+        header_checked = False
+        for chunk in resp.iter_bytes():
+            if cancel is not None and cancel.is_set():
+                raise DownloadRejected(url, "cancelled")
+            if max_seconds is not None and time.perf_counter() - started > max_seconds:
+                raise httpx.ReadTimeout(
+                    f"download took over {max_seconds:.1f}s", request=resp.request
+                )
+            chunks.append(chunk)
+            received += len(chunk)
+            if max_bytes and received > max_bytes:
+                raise DownloadRejected(url, f"body over {max_bytes} bytes")
+            if header_checked:
+                continue
+
+            # Parse just the image header for format and dimensions
+            parser.feed(chunk)
+            if parser.image is None:
+                if received >= sniff_bytes:
+                    raise DownloadRejected(url, "unrecognized image data")
+                continue
+            header_checked = True
+            width, height = parser.image.size
+            if min_dimension and max(width, height) < min_dimension:
+                raise DownloadRejected(url, f"too small {width}x{height}")
+            if max_pixels and width * height > max_pixels:
+                raise DownloadRejected(url, f"too large {width}x{height}")
+
+        if not header_checked and received:
+            raise DownloadRejected(url, "unrecognized image data")
+
+        return DownloadResult(
+            b"".join(chunks),
+            resp.headers.get("ETag"),
+            resp.headers.get("Last-Modified"),
+            time.perf_counter() - started,
+        )
+
+
 def image_to_base64(image_bytes: bytes) -> str:
     """Encode raw image bytes to a base64 string."""
     return base64.b64encode(image_bytes).decode("utf-8")
@@ -36,12 +160,8 @@ def save_image(image_bytes: bytes, path: Path) -> Path:
 
 def resize_image(image_bytes: bytes, max_size: tuple[int, int] = (1024, 1024)) -> bytes:
     """Resize an image to fit within max_size, preserving aspect ratio."""
-    img = Image.open(io.BytesIO(image_bytes))
-    img.thumbnail(max_size, Image.LANCZOS)
-    buf = io.BytesIO()
-    fmt = img.format or "PNG"
-    img.save(buf, format=fmt)
-    return buf.getvalue()
+    data, _ = get_image_pool().run("resize", image_bytes, max_size)
+    return data
 
 
 def load_image_as_base64(path: str | Path) -> str:
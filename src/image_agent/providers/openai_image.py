@@ -1,16 +1,72 @@
-"""OpenAI gpt-image-1 provider for image generation and editing."""
+"""OpenAI gpt-image-1 provider for image generation and editing.
+
+Each call has a sync form and an ``a``-prefixed async form; both build the
+same request and decode the same response, only the client differs.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import io
+from pathlib import Path
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from image_agent.config import get_settings
+from image_agent.providers.clients import get_clients
+from image_agent.utils.blobs import get_blob_store
 
 
 def _client() -> OpenAI:
-    return OpenAI(api_key=get_settings().openai_api_key)
+    return get_clients().openai()
+
+
+def _async_client() -> AsyncOpenAI:
+    return get_clients().async_openai()
+
+
+def _decode(resp) -> bytes:
+    return base64.b64decode(resp.data[0].b64_json)
+
+
+def _generate_request(prompt: str, *, size: str, quality: str, n: int) -> dict:
+    return {
+        "model": get_settings().image_model,
+        "prompt": prompt,
+        "size": size,
+        "quality": quality,
+        "n": n,
+    }
+
+
+def _refs_request(prompt: str, reference_images: list[dict], *, size: str) -> dict:
+    # Wrap reference image bytes in file-like objects
+    blobs = get_blob_store()
+    image_files = []
+    for ref in reference_images:
+        buf = io.BytesIO(blobs.get(ref["blob"]))
+        buf.name = "reference.png"
+        image_files.append(buf)
+
+    # Use first image as the primary, pass rest as additional
+    return {
+        "model": get_settings().image_model,
+        "image": image_files[0],
+        "prompt": f"Using the reference image(s) for visual accuracy: {prompt}",
+        "size": size,
+    }
+
+
+def _edit_request(prompt: str, image: bytes, filename: str, *, size: str) -> dict:
+    img_file = io.BytesIO(image)
+    img_file.name = filename  # the SDK infers the upload's mime type from it
+    return {
+        "model": get_settings().image_model,
+        "prompt": prompt,
+        "image": img_file,
+        "size": size,
+    }
 
 
 def generate_openai_image(
@@ -21,16 +77,20 @@ def generate_openai_image(
     n: int = 1,
 ) -> bytes:
     """Generate an image using OpenAI gpt-image-1. Returns raw PNG bytes."""
-    settings = get_settings()
-    resp = _client().images.generate(
-        model=settings.image_model,
-        prompt=prompt,
-        size=size,
-        quality=quality,
-        n=n,
-    )
-    b64_data = resp.data[0].b64_json
-    return base64.b64decode(b64_data)
+    request = _generate_request(prompt, size=size, quality=quality, n=n)
+    return _decode(_client().images.generate(**request))
+
+
+async def agenerate_openai_image(
+    prompt: str,
+    *,
+    size: str = "1024x1024",
+    quality: str = "high",
+    n: int = 1,
+) -> bytes:
+    """Async ``generate_openai_image``."""
+    request = _generate_request(prompt, size=size, quality=quality, n=n)
+    return _decode(await _async_client().images.generate(**request))
 
 
 def generate_openai_image_with_refs(
@@ -45,27 +105,20 @@ def generate_openai_image_with_refs(
     Uses the edit endpoint which supports up to 16 input images for
     visual conditioning alongside the text prompt.
     """
-    import io
-    settings = get_settings()
-    client = _client()
+    request = _refs_request(prompt, reference_images, size=size)
+    return _decode(_client().images.edit(**request))
 
-    # Convert base64 reference images to file-like objects
-    image_files = []
-    for ref in reference_images:
-        img_bytes = base64.b64decode(ref["image_b64"])
-        buf = io.BytesIO(img_bytes)
-        buf.name = "reference.png"
-        image_files.append(buf)
 
-    # Use first image as the primary, pass rest as additional
-    resp = client.images.edit(
-        model=settings.image_model,
-        image=image_files[0],
-        prompt=f"Using the reference image(s) for visual accuracy: {prompt}",
-        size=size,
-    )
-    b64_data = resp.data[0].b64_json
-    return base64.b64decode(b64_data)
+async def agenerate_openai_image_with_refs(
+    prompt: str,
+    reference_images: list[dict],
+    *,
+    size: str = "1024x1024",
+    quality: str = "high",
+) -> bytes:
+    """Async ``generate_openai_image_with_refs``."""
+    request = _refs_request(prompt, reference_images, size=size)
+    return _decode(await _async_client().images.edit(**request))
 
 
 def edit_openai_image(
@@ -75,13 +128,19 @@ def edit_openai_image(
     size: str = "1024x1024",
 ) -> bytes:
     """Edit an existing image using OpenAI. Returns raw PNG bytes."""
-    settings = get_settings()
-    with open(image_path, "rb") as img_file:
-        resp = _client().images.edit(
-            model=settings.image_model,
-            prompt=prompt,
-            image=img_file,
-            size=size,
-        )
-    b64_data = resp.data[0].b64_json
-    return base64.b64decode(b64_data)
+    path = Path(image_path)
+    request = _edit_request(prompt, path.read_bytes(), path.name, size=size)
+    return _decode(_client().images.edit(**request))
+
+
+async def aedit_openai_image(
+    prompt: str,
+    image_path: str,
+    *,
+    size: str = "1024x1024",
+) -> bytes:
+    """Async ``edit_openai_image``."""
+    path = Path(image_path)
+    image = await asyncio.to_thread(path.read_bytes)
+    request = _edit_request(prompt, image, path.name, size=size)
+    return _decode(await _async_client().images.edit(**request))
@@ -0,0 +1,155 @@
+"""Observed provider performance and the adaptive provider selection policy.
+
+Every generation call updates an exponentially weighted moving average of
+latency (successful calls only) and success rate for its (provider, style,
+size), and for the provider as a whole. The policy picks the provider with
+the lowest expected time to a usable image — EWMA latency divided by EWMA
+success rate, i.e. including the retries a flaky provider costs — among the
+configured candidates whose success rate meets the floor. With probability
+``epsilon`` it explores a random candidate instead, so estimates for the
+providers not currently favoured stay fresh.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from image_agent.config import get_settings
+from image_agent.utils.disk_cache import DiskCache, open_cache
+
+_ANY = "*"
+
+
+@dataclass
+class Selection:
+    """A provider choice and why it was made."""
+
+    provider: str
+    mode: str  # "exploit", "explore" or "default"
+    reason: str
+    estimates: dict[str, dict] = field(default_factory=dict)
+
+
+class ProviderStats:
+    """EWMA latency and success rate per (provider, style, size), persisted in a DiskCache."""
+
+    def __init__(self, store: DiskCache, *, alpha: float, min_samples: int) -> None:
+        self.store = store
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self._records: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(provider: str, style: str, size: str) -> str:
+        return f"{provider}|{style or _ANY}|{size or _ANY}"
+
+    def _record(self, key: str) -> dict:
+        """Return the mutable record for a key. Caller holds the lock."""
+        record = self._records.get(key)
+        if record is None:
+            record = self.store.get_json(key) or {
+                "latency_s": None,
+                "success": None,
+                "samples": 0,
+                "updated": None,
+            }
+            self._records[key] = record
+        return record
+
+    def _ewma(self, current: float | None, value: float) -> float:
+        if current is None:
+            return value
+        return current + self.alpha * (value - current)
+
+    def record(self, provider: str, style: str, size: str, seconds: float, ok: bool) -> None:
+        """Fold one call into the style/size-specific and provider-wide averages."""
+        now = time.time()
+        with self._lock:
+            for key in {self.key(provider, style, size), self.key(provider, _ANY, _ANY)}:
+                record = self._record(key)
+                record["success"] = round(self._ewma(record["success"], 1.0 if ok else 0.0), 4)
+                if ok:
+                    record["latency_s"] = round(self._ewma(record["latency_s"], seconds), 3)
+                record["samples"] += 1
+                record["updated"] = now
+                self.store.set_json(key, record)
+
+    def estimate(self, provider: str, style: str, size: str) -> dict | None:
+        """Most specific estimate with enough samples, or None if the provider is unproven.
+
+        Falls back from (provider, style, size) to the provider-wide average
+        while a style/size combination is still new.
+        """
+        with self._lock:
+            for key, scope in (
+                (self.key(provider, style, size), "style"),
+                (self.key(provider, _ANY, _ANY), "provider"),
+            ):
+                record = self._record(key)
+                if record["samples"] >= self.min_samples and record["latency_s"] is not None:
+                    success = record["success"]
+                    return {
+                        "latency_s": record["latency_s"],
+                        "success": success,
+                        "samples": record["samples"],
+                        "scope": scope,
+                        "expected_s": record["latency_s"] / max(success, 0.01),
+                    }
+        return None
+
+    def choose(
+        self,
+        candidates: list[str],
+        style: str,
+        size: str,
+        *,
+        default: str,
+        min_success: float,
+        epsilon: float,
+        rng: random.Random,
+    ) -> Selection:
+        """Pick a provider from ``candidates`` (callers drop open circuits first)."""
+        if not candidates:
+            return Selection(default, "default", "no candidate available")
+        estimates = {p: e for p in candidates if (e := self.estimate(p, style, size))}
+
+        if len(candidates) > 1 and rng.random() < epsilon:
+            provider = rng.choice(candidates)
+            return Selection(provider, "explore", f"epsilon={epsilon:g}", estimates)
+
+        qualified = {p: e for p, e in estimates.items() if e["success"] >= min_success}
+        if qualified:
+            provider = min(qualified, key=lambda p: qualified[p]["expected_s"])
+            e = qualified[provider]
+            return Selection(
+                provider,
+                "exploit",
+                f"lowest expected {e['expected_s']:.1f}s "
+                f"({e['latency_s']:.1f}s / {e['success']:.0%} over {e['scope']})",
+                estimates,
+            )
+
+        provider = default if default in candidates else candidates[0]
+        return Selection(
+            provider,
+            "default",
+            f"no candidate with {self.min_samples}+ samples at {min_success:.0%}+ success",
+            estimates,
+        )
+
+
+@lru_cache
+def get_provider_stats() -> ProviderStats:
+    """Process-wide provider statistics (recorded even while adaptive selection is off)."""
+    settings = get_settings()
+    store = open_cache("provider_stats", ttl=settings.provider_adaptive_ttl_s)
+    return ProviderStats(
+        store,
+        alpha=settings.provider_adaptive_alpha,
+        min_samples=settings.provider_adaptive_min_samples,
+    )
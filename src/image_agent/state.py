@@ -16,6 +16,7 @@ class GenerationParams(TypedDict, total=False):
     quality: str
     style: str
     n: int
+    seed: int  # honoured by Flux text-to-image and Gemini
 
 
 class ImageAgentState(TypedDict, total=False):
@@ -33,20 +34,28 @@ class ImageAgentState(TypedDict, total=False):
     action: Literal["generate", "edit", "enhance_only"]
     prompt_analysis: dict[str, Any]  # {style, mood, subject, subject_type, complexity}
 
+    # Speculative research started alongside the router (id of in-flight searches)
+    speculative_research_id: str | None
+
     # Research output
     research_context: dict[str, Any]  # {synthesized, style_refs, factual_context, trending_techniques}
+    pending_synthesis: dict[str, Any] | None  # {raw_context, cache_key} awaiting synthesize node
     reference_image_urls: list[str] | None  # URLs extracted from Tavily image results
 
     # Reference image analysis output
-    reference_images: list[dict] | None  # Downloaded images: [{url, image_b64, mime_type}]
+    reference_images: list[dict] | None  # Downloaded images: [{url, blob, mime_type, ...}] (bytes in BlobStore)
     reference_image_analysis: str | None  # GPT-4o vision description of reference images
+    reference_image_features: str | None  # Locally measured palette, tone and framing
+    reference_images_owned: bool  # this run holds a reference to reference_images (response releases it)
 
     # Enhancement output
     enhanced_prompt: str | None
 
     # Provider selection
     provider: Literal["openai", "flux", "gemini"]
+    provider_explicit: bool  # chosen by the user (--provider): no fallback chain
     generation_params: GenerationParams
+    hedge: bool | None  # race a second provider (None: settings.hedge_enabled)
 
     # Creative suggestions (chat mode)
     suggestions: list[dict] | None  # 3 suggestion dicts from suggest node
@@ -57,6 +66,6 @@ class ImageAgentState(TypedDict, total=False):
     # Output
     image_path: str | None
     image_id: str
-    generation_metadata: dict[str, Any]
+    generation_metadata: dict[str, Any]  # image bytes referenced by "image_blob" handle (+ "hedge", "alternate", "fallback", "cached")
     error: str | None
     retry_count: int
@@ -0,0 +1,81 @@
+"""Local merge of per-image vision descriptions into one reference analysis.
+
+Each description is expected as ``Label: sentences`` lines (see
+``REFERENCE_IMAGE_SINGLE_ANALYSIS_PROMPT``). Sentences are grouped per
+aspect, near-duplicates across images are collapsed with MinHash, and
+details seen in several images — the canonical appearance — come first.
+"""
+
+from __future__ import annotations
+
+import re
+
+from image_agent.utils.context_compressor import near_duplicate_groups
+
+ASPECTS = (
+    "Character Appearance",
+    "Clothing & Attire",
+    "Iconographic Details",
+    "Color Palette",
+    "Pose & Composition",
+    "Setting & Environment",
+    "Art Style",
+    "Scene Object Relationships",
+)
+_OTHER = "Other Details"
+
+_LABEL = re.compile(r"^[\s\-*#\d.]*\**\s*([A-Za-z &]+?)\s*\**\s*:\s*\**\s*(.*)$")
+_ASPECT_LOOKUP = {a.lower(): a for a in ASPECTS}
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def parse_description(text: str) -> dict[str, list[str]]:
+    """Split one labelled description into aspect → sentences."""
+    aspects: dict[str, list[str]] = {}
+    current = _OTHER
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _LABEL.match(line)
+        if match and match.group(1).lower() in _ASPECT_LOOKUP:
+            current = _ASPECT_LOOKUP[match.group(1).lower()]
+            line = match.group(2)
+        sentences = [s.strip() for s in _SENTENCE_END.split(line) if s.strip()]
+        aspects.setdefault(current, []).extend(sentences)
+    return aspects
+
+
+def merge_image_descriptions(
+    descriptions: list[str],
+    *,
+    dedup_threshold: float = 0.5,
+    max_per_aspect: int = 4,
+) -> str:
+    """Merge per-image descriptions (in priority order) into one analysis text."""
+    descriptions = [d for d in descriptions if d and d.strip()]
+    if len(descriptions) <= 1:
+        return descriptions[0].strip() if descriptions else ""
+
+    parsed = [parse_description(d) for d in descriptions]
+    lines: list[str] = []
+    for aspect in (*ASPECTS, _OTHER):
+        # (image index, sentence) in priority order
+        entries = [(i, s) for i, p in enumerate(parsed) for s in p.get(aspect, [])]
+        if not entries:
+            continue
+        groups = near_duplicate_groups(
+            [s for _, s in entries], dedup_threshold, shingle_size=1
+        )
+        # Sentences supported by more images first; ties keep priority order
+        ranked = sorted(
+            groups,
+            key=lambda g: (-len({entries[i][0] for i in g}), g[0]),
+        )[:max_per_aspect]
+        parts = []
+        for group in ranked:
+            support = len({entries[i][0] for i in group})
+            sentence = entries[group[0]][1]
+            parts.append(f"{sentence} [{support}/{len(parsed)} images]" if support > 1 else sentence)
+        lines.append(f"**{aspect}**: " + " ".join(parts))
+    return "\n".join(lines)
@@ -0,0 +1,141 @@
+"""In-process, content-addressed store for image bytes referenced from graph state.
+
+Graph state (and therefore every checkpoint) carries only short handles;
+the bytes live here once, however many state snapshots point at them.
+Base64 is produced only where a provider API requires it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from image_agent.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlobNotFound(KeyError):
+    """The handle is unknown, or its bytes were evicted from the store."""
+
+
+class BlobStore:
+    """Thread-safe LRU map of content hash → bytes, bounded by total size.
+
+    Identical bytes share one handle, so ``put`` counts references and
+    ``discard`` only frees a blob once every putter has let go of it —
+    concurrent pipelines producing the same image don't free each other's.
+    Eviction only ever drops unreferenced blobs: a blob a running pipeline
+    still holds is kept even when that takes the store over ``max_bytes``.
+    """
+
+    def __init__(self, *, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._blobs: OrderedDict[str, bytes] = OrderedDict()
+        self._refs: dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self._over_budget = False
+
+    def put(self, data: bytes | bytearray | memoryview) -> str:
+        """Store bytes and return their handle (SHA-256 hex digest)."""
+        data = bytes(data) if not isinstance(data, bytes) else data
+        handle = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._refs[handle] = self._refs.get(handle, 0) + 1
+            if handle in self._blobs:
+                self._blobs.move_to_end(handle)
+                return handle
+            self._blobs[handle] = data
+            self._size += len(data)
+            self._evict(keep=handle)
+        return handle
+
+    def get(self, handle: str) -> bytes:
+        """Return the bytes for a handle, raising ``BlobNotFound`` if gone."""
+        with self._lock:
+            data = self._blobs.get(handle)
+            if data is None:
+                raise BlobNotFound(handle)
+            self._blobs.move_to_end(handle)
+            return data
+
+    def view(self, handle: str) -> memoryview:
+        """Zero-copy read-only view of a blob."""
+        return memoryview(self.get(handle))
+
+    def retain(self, handle: str) -> None:
+        """Take one more reference to a stored blob, raising ``BlobNotFound`` if gone."""
+        with self._lock:
+            if handle not in self._blobs:
+                raise BlobNotFound(handle)
+            self._refs[handle] = self._refs.get(handle, 0) + 1
+
+    def __contains__(self, handle: str) -> bool:
+        with self._lock:
+            return handle in self._blobs
+
+    def discard(self, handle: str | None) -> None:
+        """Release one reference; the blob is dropped when none remain."""
+        if handle is None:
+            return
+        with self._lock:
+            refs = self._refs.pop(handle, 0) - 1
+            if refs > 0:
+                self._refs[handle] = refs
+                return
+            data = self._blobs.pop(handle, None)
+            if data is not None:
+                self._size -= len(data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"blobs": len(self._blobs), "bytes": self._size, "evictions": self.evictions}
+
+    def _evict(self, *, keep: str) -> None:
+        # Least recently used unreferenced blobs first; never the blob just added
+        if self._size <= self.max_bytes:
+            self._over_budget = False
+            return
+        for handle in [h for h in self._blobs if h != keep and not self._refs.get(h)]:
+            if self._size <= self.max_bytes:
+                break
+            self._size -= len(self._blobs.pop(handle))
+            self._refs.pop(handle, None)
+            self.evictions += 1
+        if self._size > self.max_bytes and not self._over_budget:
+            self._over_budget = True
+            logger.warning(
+                "Blob store holds %d bytes of in-use images (budget %d)", self._size, self.max_bytes
+            )
+
+
+def retain_blobs(images: list[dict] | None) -> None:
+    """Take a reference to each image dict's ``"blob"`` (e.g. before handing them to another run).
+
+    Handles that are no longer stored (stale state from an earlier run) are skipped.
+    """
+    store = get_blob_store()
+    for image in images or []:
+        try:
+            store.retain(image["blob"])
+        except BlobNotFound:
+            logger.debug("Blob %s is gone, not retaining it", image["blob"])
+
+
+def release_blobs(images: list[dict] | None) -> None:
+    """Release one reference to each image dict's ``"blob"``, skipping handles no longer stored."""
+    store = get_blob_store()
+    for image in images or []:
+        if image["blob"] in store:
+            store.discard(image["blob"])
+
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store."""
+    return BlobStore(max_bytes=get_settings().blob_store_max_bytes)
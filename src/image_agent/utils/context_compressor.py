@@ -0,0 +1,218 @@
+"""Extractive, token-budgeted compression of Tavily snippets for synthesis.
+
+Snippets are split into sentences, near-duplicates across all query pools
+are dropped via MinHash over word shingles, and the survivors are ranked
+by TF-IDF cosine similarity to the subject/style until a token budget is
+filled. Everything runs locally with NumPy.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+# Rough chars-per-token ratio for English prose (no tokenizer dependency)
+_CHARS_PER_TOKEN = 4
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+_WORD = re.compile(r"[a-z0-9]+")
+_TERMINAL = re.compile(r"[.!?][\"')\]]*$")
+
+_MIN_SENTENCE_CHARS = 30
+_SHINGLE_SIZE = 3
+_NUM_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = np.random.default_rng(1729)
+# a < 2^29 and crc32 hashes < 2^32 keep (a * h + b) below 2^63 — no uint64 overflow
+_PERM_A = _rng.integers(1, 1 << 29, size=_NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, size=_NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting and reporting."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+@dataclass
+class CompressedContext:
+    """Compressed search context plus the numbers reported in the pipeline log."""
+
+    text: str
+    raw_tokens: int  # every snippet in full, before any compression
+    tokens_after: int
+    sentences: int
+    duplicates: int
+    kept: int
+
+
+@dataclass
+class _Sentence:
+    section: int
+    text: str
+
+
+def split_sentences(snippet: str) -> list[str]:
+    """Split a snippet into sentences, dropping fragments and a cut-off tail."""
+    snippet = " ".join(snippet.split())
+    if not snippet:
+        return []
+    parts = _SENTENCE_SPLIT.split(snippet)
+    # Tavily snippets are often truncated mid-sentence — drop the dangling tail
+    if len(parts) > 1 and not _TERMINAL.search(parts[-1]):
+        parts = parts[:-1]
+    return [p.strip() for p in parts if len(p.strip()) >= _MIN_SENTENCE_CHARS]
+
+
+def _minhash(words: list[str], shingle_size: int = _SHINGLE_SIZE) -> np.ndarray:
+    """MinHash signature over word shingles."""
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i:i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+    hashes = np.array(
+        [zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64
+    )
+    # (a * h + b) mod p for every permutation × shingle, then min per permutation
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def _dedupe(sentences: list[_Sentence], threshold: float) -> list[_Sentence]:
+    """Drop sentences whose estimated Jaccard similarity to a kept one exceeds threshold."""
+    kept: list[_Sentence] = []
+    signatures = np.empty((len(sentences), _NUM_PERMUTATIONS), dtype=np.uint64)
+    for sentence in sentences:
+        signature = _minhash(_WORD.findall(sentence.text.lower()))
+        if kept:
+            similarity = (signatures[:len(kept)] == signature).mean(axis=1).max()
+            if similarity >= threshold:
+                continue
+        signatures[len(kept)] = signature
+        kept.append(sentence)
+    return kept
+
+
+def near_duplicate_groups(
+    texts: list[str],
+    threshold: float,
+    *,
+    shingle_size: int = _SHINGLE_SIZE,
+) -> list[list[int]]:
+    """Group texts by estimated Jaccard similarity to each group's first member.
+
+    Groups are returned in order of their first member; indices inside a
+    group are ascending. Use ``shingle_size=1`` (word sets) for short texts.
+    """
+    groups: list[list[int]] = []
+    leaders = np.empty((len(texts), _NUM_PERMUTATIONS), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        signature = _minhash(_WORD.findall(text.lower()), shingle_size)
+        if groups:
+            similarity = (leaders[:len(groups)] == signature).mean(axis=1)
+            best = int(similarity.argmax())
+            if similarity[best] >= threshold:
+                groups[best].append(i)
+                continue
+        leaders[len(groups)] = signature
+        groups.append([i])
+    return groups
+
+
+def _tfidf_scores(texts: list[str], query: str) -> np.ndarray:
+    """Cosine similarity of each text's TF-IDF vector to the query's."""
+    docs = [_WORD.findall(t.lower()) for t in texts]
+    vocab: dict[str, int] = {}
+    for words in docs:
+        for w in words:
+            vocab.setdefault(w, len(vocab))
+    if not vocab:
+        return np.zeros(len(texts))
+
+    counts = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for row, words in enumerate(docs):
+        for w in words:
+            counts[row, vocab[w]] += 1.0
+
+    df = (counts > 0).sum(axis=0)
+    idf = np.log((1.0 + len(docs)) / (1.0 + df)) + 1.0
+    tfidf = counts * idf
+    tfidf /= np.linalg.norm(tfidf, axis=1, keepdims=True) + 1e-9
+
+    q = np.zeros(len(vocab), dtype=np.float32)
+    for w in _WORD.findall(query.lower()):
+        if w in vocab:
+            q[vocab[w]] += 1.0
+    q *= idf
+    norm = np.linalg.norm(q)
+    if norm == 0:
+        return np.zeros(len(texts))
+    return tfidf @ (q / norm)
+
+
+def compress_search_results(
+    sections: list[tuple[str, dict | None]],
+    *,
+    query: str,
+    token_budget: int,
+    dedup_threshold: float = 0.7,
+) -> CompressedContext:
+    """Compress Tavily result pools into a sectioned text block within budget.
+
+    Args:
+        sections: (heading, tavily_results) pairs in display order.
+        query: Text the sentences are ranked against (subject + style).
+        token_budget: Approximate maximum tokens for the returned text.
+        dedup_threshold: Estimated Jaccard similarity at which two sentences
+            count as duplicates.
+    """
+    sentences: list[_Sentence] = []
+    raw_chars = 0
+    for index, (_, results) in enumerate(sections):
+        for item in (results or {}).get("results", []):
+            content = item.get("content", "")
+            raw_chars += len(content)
+            sentences.extend(_Sentence(index, s) for s in split_sentences(content))
+
+    raw_tokens = math.ceil(raw_chars / _CHARS_PER_TOKEN)
+    unique = _dedupe(sentences, dedup_threshold)
+
+    selected: set[int] = set()
+    if unique:
+        scores = _tfidf_scores([s.text for s in unique], query)
+        used = 0
+        for i in np.argsort(-scores, kind="stable"):
+            cost = estimate_tokens(unique[i].text) + 1
+            if used + cost > token_budget:
+                continue
+            selected.add(int(i))
+            used += cost
+
+    lines: list[str] = []
+    for index, (heading, _) in enumerate(sections):
+        section_lines = [
+            f"- {s.text}" for i, s in enumerate(unique)
+            if i in selected and s.section == index
+        ]
+        if not section_lines:
+            continue
+        prefix = "\n" if lines else ""
+        lines.append(f"{prefix}=== {heading} ===")
+        lines.extend(section_lines)
+    text = "\n".join(lines)
+
+    return CompressedContext(
+        text=text,
+        raw_tokens=raw_tokens,
+        tokens_after=estimate_tokens(text),
+        sentences=len(sentences),
+        duplicates=len(sentences) - len(unique),
+        kept=len(selected),
+    )
@@ -0,0 +1,230 @@
+"""Small SQLite-backed on-disk cache with TTL expiry and LRU eviction."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from image_agent.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """Build a stable hex key from arbitrary JSON-serialisable parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and collapse whitespace so trivially different strings share a key."""
+    return " ".join(text.lower().split())
+
+
+class DiskCache:
+    """Key → bytes store persisted in a single SQLite file.
+
+    Entries older than ``ttl`` seconds are treated as misses. When the cache
+    exceeds ``max_entries`` or ``max_bytes`` the least recently accessed
+    entries are evicted. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " meta TEXT,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._conn.commit()
+
+    # -- raw entries -------------------------------------------------------
+
+    def get_entry(self, key: str, *, allow_stale: bool = False) -> tuple[bytes, dict, float] | None:
+        """Return (value, meta, created) or None. Counts a hit or miss.
+
+        With ``allow_stale`` expired entries are still returned (for callers
+        that revalidate them); otherwise they are deleted and reported as misses.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, meta, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, meta, created = row
+            if not allow_stale and self.is_expired(created, now):
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return bytes(value), json.loads(meta) if meta else {}, created
+
+    def is_expired(self, created: float, now: float | None = None) -> bool:
+        """Return True if an entry created at ``created`` is past its TTL."""
+        if self.ttl is None:
+            return False
+        return ((now or time.time()) - created) > self.ttl
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached bytes for key, or None on miss/expiry."""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: bytes, meta: dict | None = None) -> None:
+        """Store bytes under key, then evict least recently used entries if over cap."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, meta, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, json.dumps(meta) if meta else None, len(value), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        """Reset an entry's creation time (e.g. after a successful revalidation)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET created = ?, accessed = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    # -- JSON helpers ------------------------------------------------------
+
+    def get_json(self, key: str) -> Any | None:
+        raw = self.get(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            self.delete(key)
+            return None
+
+    def set_json(self, key: str, value: Any, meta: dict | None = None) -> None:
+        self.set(key, json.dumps(value, default=str).encode("utf-8"), meta)
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def stats(self) -> dict[str, int]:
+        """Return entry/byte totals plus this process's hit/miss/eviction counters."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self) -> None:
+        """Drop least recently accessed rows until within caps. Caller holds the lock."""
+        if self.max_entries is not None:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN"
+                    " (SELECT key FROM entries ORDER BY accessed ASC LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+        if self.max_bytes is not None:
+            (total,) = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            if total <= self.max_bytes:
+                return
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed ASC"
+            ).fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+            self.evictions += len(doomed)
+
+
+_caches: dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_root() -> Path:
+    """Directory holding all on-disk caches (defaults to ``<output_dir>/.cache``)."""
+    settings = get_settings()
+    return settings.cache_dir or (settings.output_dir / ".cache")
+
+
+def open_cache(
+    name: str,
+    *,
+    ttl: float | None = None,
+    max_entries: int | None = None,
+    max_bytes: int | None = None,
+) -> DiskCache:
+    """Return the process-wide DiskCache called ``name``, creating it on first use."""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = DiskCache(
+                cache_root() / f"{name}.sqlite",
+                ttl=ttl,
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+            )
+            _caches[name] = cache
+        return cache
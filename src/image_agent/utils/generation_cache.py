@@ -0,0 +1,22 @@
+"""Exact-match on-disk cache of generated images."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from image_agent.config import get_settings
+from image_agent.utils.disk_cache import DiskCache, open_cache
+
+
+@lru_cache
+def get_generation_cache() -> DiskCache | None:
+    """Process-wide generation cache (key → PNG bytes), or None when disabled."""
+    settings = get_settings()
+    if not settings.generation_cache_enabled:
+        return None
+    return open_cache(
+        "generations",
+        ttl=settings.generation_cache_ttl_s,
+        max_entries=settings.generation_cache_max_entries,
+        max_bytes=settings.generation_cache_max_bytes,
+    )
@@ -0,0 +1,166 @@
+"""Persistent per-host download reputation: negative caching, adaptive timeouts, ordering."""
+
+from __future__ import annotations
+
+import threading
+import time
+from functools import lru_cache
+
+from image_agent.config import get_settings
+from image_agent.utils.disk_cache import DiskCache, open_cache
+
+_LATENCY_SAMPLES = 20  # most recent successful download times kept per host
+_OUTCOME_SAMPLES = 20  # most recent outcomes (1 = ok, 0 = failed) kept per host
+_RECORD_REFRESH_S = 60.0  # re-read a host's record from disk after this long
+_MIN_SAMPLES = 3  # below this, fall back to the default timeout
+_PRIOR_SUCCESSES = 3  # Laplace-style prior: unknown hosts start at 75% reliability
+_PRIOR_FAILURES = 1
+
+
+class HostReputation:
+    """Success rate, p95 latency and last failure per host, persisted in a DiskCache.
+
+    Records are kept in memory for a short while and written through on
+    every update, so concurrent download threads see each other's results
+    and a long-lived process picks up changes made by other runs.
+
+    Only host-level failures (transport errors, timeouts, 403/429/5xx) should
+    be recorded; a single unusable image says nothing about its host. A host
+    is blocked after ``block_after`` consecutive failures, and only once it
+    has ``min_samples`` recent outcomes with at least ``failure_rate`` failed.
+    """
+
+    def __init__(
+        self,
+        store: DiskCache,
+        *,
+        block_after: int,
+        block_min_samples: int,
+        block_failure_rate: float,
+        block_ttl: float,
+        timeout_multiplier: float,
+        min_timeout: float,
+    ) -> None:
+        self.store = store
+        self.block_after = block_after
+        self.block_min_samples = block_min_samples
+        self.block_failure_rate = block_failure_rate
+        self.block_ttl = block_ttl
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self._records: dict[str, tuple[float, dict]] = {}  # host -> (loaded at, record)
+        self._lock = threading.Lock()
+
+    def _record(self, host: str) -> dict:
+        """Return the mutable record for a host. Caller holds the lock."""
+        now = time.monotonic()
+        entry = self._records.get(host)
+        if entry is not None and now - entry[0] < _RECORD_REFRESH_S:
+            return entry[1]
+        record = self.store.get_json(host) or {
+            "successes": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "latencies": [],
+            "last_failure": None,
+            "last_failure_reason": None,
+        }
+        record.setdefault("outcomes", [])
+        self._records[host] = (now, record)
+        return record
+
+    def record_success(self, host: str, seconds: float) -> None:
+        with self._lock:
+            record = self._record(host)
+            record["successes"] += 1
+            record["consecutive_failures"] = 0
+            record["outcomes"] = (record["outcomes"] + [1])[-_OUTCOME_SAMPLES:]
+            record["latencies"] = (record["latencies"] + [round(seconds, 3)])[-_LATENCY_SAMPLES:]
+            self.store.set_json(host, record)
+
+    def record_failure(self, host: str, reason: str) -> None:
+        with self._lock:
+            record = self._record(host)
+            record["failures"] += 1
+            record["consecutive_failures"] += 1
+            record["outcomes"] = (record["outcomes"] + [0])[-_OUTCOME_SAMPLES:]
+            record["last_failure"] = time.time()
+            record["last_failure_reason"] = reason
+            self.store.set_json(host, record)
+
+    def is_blocked(self, host: str) -> bool:
+        """True while a host with repeated recent failures is in its negative-cache window."""
+        with self._lock:
+            record = self._record(host)
+            outcomes = record["outcomes"]
+            return (
+                record["consecutive_failures"] >= self.block_after
+                and len(outcomes) >= self.block_min_samples
+                and outcomes.count(0) / len(outcomes) >= self.block_failure_rate
+                and record["last_failure"] is not None
+                and time.time() - record["last_failure"] < self.block_ttl
+            )
+
+    def reliability(self, host: str) -> float:
+        with self._lock:
+            record = self._record(host)
+            return (record["successes"] + _PRIOR_SUCCESSES) / (
+                record["successes"] + record["failures"] + _PRIOR_SUCCESSES + _PRIOR_FAILURES
+            )
+
+    def p95_latency(self, host: str) -> float | None:
+        with self._lock:
+            samples = sorted(self._record(host)["latencies"])
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def timeout_for(self, host: str, default: float) -> float:
+        """Timeout scaled from the host's p95 latency, within [min_timeout, default]."""
+        p95 = self.p95_latency(host)
+        if p95 is None:
+            return default
+        return max(self.min_timeout, min(default, p95 * self.timeout_multiplier))
+
+    def order(self, urls: list[str], hosts: list[str]) -> list[str]:
+        """Reorder URLs so fast, reliable hosts move up; search rank still dominates.
+
+        Each URL's cost is its rank plus a host penalty of up to ~4 places
+        for unreliability and up to ~4 places for slowness.
+        """
+        def cost(item: tuple[int, str]) -> float:
+            rank, host = item
+            p95 = self.p95_latency(host)
+            penalty = 4.0 * (1.0 - self.reliability(host))
+            if p95 is not None:
+                penalty += min(p95, 8.0) / 2.0
+            return rank + penalty
+
+        ranked = sorted(enumerate(hosts), key=cost)
+        return [urls[rank] for rank, _ in ranked]
+
+    def snapshot(self, host: str) -> dict:
+        with self._lock:
+            return dict(self._record(host))
+
+
+@lru_cache
+def get_host_reputation() -> HostReputation | None:
+    """Process-wide host reputation table, or None when disabled."""
+    settings = get_settings()
+    if not settings.host_reputation_enabled:
+        return None
+    store = open_cache(
+        "host_reputation",
+        ttl=settings.host_reputation_ttl_s,
+        max_entries=settings.host_reputation_max_hosts,
+    )
+    return HostReputation(
+        store,
+        block_after=settings.host_reputation_block_after,
+        block_min_samples=settings.host_reputation_block_min_samples,
+        block_failure_rate=settings.host_reputation_block_failure_rate,
+        block_ttl=settings.host_reputation_block_ttl_s,
+        timeout_multiplier=settings.host_reputation_timeout_multiplier,
+        min_timeout=settings.host_reputation_min_timeout_s,
+    )
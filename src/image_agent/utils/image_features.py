@@ -0,0 +1,170 @@
+"""Local NumPy visual features for reference images: palette, tone, framing.
+
+Everything runs on a small thumbnail (``_ANALYSIS_SIZE`` px) in a few
+milliseconds, so it can supplement — or, in ``local`` analysis mode,
+replace — the vision LLM call.
+"""
+
+from __future__ import annotations
+
+import io
+
+import numpy as np
+from PIL import Image
+
+_ANALYSIS_SIZE = 128
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE = 4096  # strided pixel sample; plenty for a 5-colour palette
+_HISTOGRAM_BINS = 8
+_LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)  # Rec. 709
+
+
+def _thumbnail(data: bytes) -> tuple[np.ndarray, tuple[int, int]]:
+    """Decode to an RGB float array in [0, 1] no larger than _ANALYSIS_SIZE."""
+    img = Image.open(io.BytesIO(data))
+    size = img.size
+    img.draft("RGB", (_ANALYSIS_SIZE, _ANALYSIS_SIZE))
+    img = img.convert("RGB")
+    img.thumbnail((_ANALYSIS_SIZE, _ANALYSIS_SIZE), Image.BILINEAR)
+    return np.asarray(img, dtype=np.float32) / 255.0, size
+
+
+def kmeans_palette(pixels: np.ndarray, k: int, weights: np.ndarray | None = None) -> list[dict]:
+    """Dominant colours of (n, 3) RGB pixels in [0, 1], largest share first.
+
+    Centres start at luminance quantiles, which makes the result
+    deterministic and avoids empty clusters on low-variety images.
+    """
+    weights = np.ones(len(pixels), dtype=np.float32) if weights is None else weights
+    if len(pixels) > _KMEANS_SAMPLE:
+        step = len(pixels) // _KMEANS_SAMPLE
+        pixels, weights = pixels[::step], weights[::step]
+    k = min(k, len(pixels))
+    order = np.argsort(pixels @ _LUMA, kind="stable")
+    centres = pixels[order[np.linspace(0, len(pixels) - 1, k).astype(int)]].copy()
+
+    for _ in range(_KMEANS_ITERATIONS):
+        distances = ((pixels[:, None, :] - centres[None, :, :]) ** 2).sum(axis=-1)
+        labels = distances.argmin(axis=1)
+        mass = np.bincount(labels, weights=weights, minlength=k)
+        for c in range(3):
+            sums = np.bincount(labels, weights=weights * pixels[:, c], minlength=k)
+            centres[:, c] = np.where(mass > 0, sums / np.maximum(mass, 1e-9), centres[:, c])
+
+    shares = mass / mass.sum()
+    palette = [
+        {"hex": _hex(centres[i]), "share": round(float(shares[i]), 3)}
+        for i in np.argsort(-shares, kind="stable")
+        if shares[i] >= 0.01
+    ]
+    return palette
+
+
+def _hex(rgb: np.ndarray) -> str:
+    r, g, b = (int(round(float(v) * 255)) for v in np.clip(rgb, 0, 1))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _rgb(hex_code: str) -> list[float]:
+    return [int(hex_code[i:i + 2], 16) / 255.0 for i in (1, 3, 5)]
+
+
+def _subject_placement(rgb: np.ndarray) -> dict:
+    """Locate the salient region: contrast against the border colour plus edges."""
+    border = np.concatenate([rgb[0], rgb[-1], rgb[:, 0], rgb[:, -1]])
+    background = np.median(border, axis=0)
+    saliency = np.sqrt(((rgb - background) ** 2).sum(axis=-1))
+    luma = rgb @ _LUMA
+    gy, gx = np.gradient(luma)
+    saliency = saliency + np.hypot(gx, gy)
+    if saliency.max() < 1e-3:
+        # Flat image: nothing stands out from the background
+        return {"position": "center", "center": [0.5, 0.5], "coverage": 1.0, "framing": "no distinct subject"}
+
+    mask = saliency >= max(float(np.quantile(saliency, 0.75)), 0.25 * float(saliency.max()))
+    ys, xs = np.nonzero(mask)
+    h, w = luma.shape
+    weight = saliency[ys, xs]
+    cx = float((xs * weight).sum() / weight.sum()) / max(w - 1, 1)
+    cy = float((ys * weight).sum() / weight.sum()) / max(h - 1, 1)
+    # Bounding box of the central 90% of salient mass, as a fraction of the frame
+    x0, x1 = np.quantile(xs, [0.05, 0.95]) / max(w - 1, 1)
+    y0, y1 = np.quantile(ys, [0.05, 0.95]) / max(h - 1, 1)
+    coverage = float((x1 - x0) * (y1 - y0))
+
+    column = ("left", "center", "right")[min(int(cx * 3), 2)]
+    row = ("upper", "middle", "lower")[min(int(cy * 3), 2)]
+    position = "center" if (row, column) == ("middle", "center") else f"{row}-{column}"
+    framing = "close-up" if coverage > 0.6 else "medium" if coverage > 0.25 else "wide"
+    return {
+        "position": position,
+        "center": [round(cx, 2), round(cy, 2)],
+        "coverage": round(coverage, 2),
+        "framing": framing,
+    }
+
+
+def extract_features(data: bytes, *, palette_size: int = 5) -> dict:
+    """Palette, luminance statistics, orientation and subject placement of one image."""
+    rgb, (width, height) = _thumbnail(data)
+    pixels = rgb.reshape(-1, 3)
+    luma = pixels @ _LUMA
+
+    hist, _ = np.histogram(luma, bins=_HISTOGRAM_BINS, range=(0.0, 1.0))
+    brightness = float(luma.mean())
+    contrast = float(luma.std())
+    high, low = pixels.max(axis=1), pixels.min(axis=1)
+    saturation = float(np.where(high > 0, (high - low) / np.maximum(high, 1e-9), 0).mean())
+    warmth = float((pixels[:, 0] - pixels[:, 2]).mean())
+
+    ratio = width / height if height else 1.0
+    orientation = "landscape" if ratio > 1.1 else "portrait" if ratio < 0.9 else "square"
+    return {
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "aspect_ratio": round(ratio, 2),
+        "palette": kmeans_palette(pixels, palette_size),
+        "brightness": round(brightness, 2),
+        "contrast": round(contrast, 2),
+        "saturation": round(saturation, 2),
+        "warmth": round(warmth, 2),
+        "luminance_histogram": [round(float(v), 3) for v in hist / hist.sum()],
+        "subject": _subject_placement(rgb),
+    }
+
+
+def _tone(features: dict) -> str:
+    brightness, contrast = features["brightness"], features["contrast"]
+    key = "high-key" if brightness > 0.65 else "low-key" if brightness < 0.35 else "mid-key"
+    spread = "high contrast" if contrast > 0.25 else "low contrast" if contrast < 0.12 else "moderate contrast"
+    saturation = features["saturation"]
+    vivid = "vivid" if saturation > 0.5 else "muted" if saturation < 0.2 else "natural saturation"
+    temperature = "warm" if features["warmth"] > 0.05 else "cool" if features["warmth"] < -0.05 else "neutral"
+    return f"{key}, {spread}, {vivid}, {temperature} cast"
+
+
+def summarize_features(features: list[dict], *, palette_size: int = 5) -> str:
+    """Render per-image features plus a shared palette as structured text for prompts."""
+    if not features:
+        return ""
+    lines: list[str] = []
+    if len(features) > 1:
+        # Shared palette: re-cluster every image's palette weighted by share
+        colours = np.array(
+            [_rgb(p["hex"]) for f in features for p in f["palette"]], dtype=np.float32
+        )
+        weights = np.array([p["share"] for f in features for p in f["palette"]], dtype=np.float32)
+        shared = kmeans_palette(colours, palette_size, weights)
+        lines.append("Shared palette: " + ", ".join(f"{p['hex']} ({p['share']:.0%})" for p in shared))
+
+    for i, f in enumerate(features, 1):
+        subject = f["subject"]
+        lines.append(
+            f"Reference {i}: {f['orientation']} ({f['aspect_ratio']:.2f}:1)"
+            f" | palette " + ", ".join(f"{p['hex']} ({p['share']:.0%})" for p in f["palette"])
+            + f" | tone: {_tone(f)} (brightness {f['brightness']:.2f}, contrast {f['contrast']:.2f})"
+            f" | subject: {subject['position']}, {subject['framing']}"
+            f" ({subject['coverage']:.0%} of frame)"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,63 @@
+"""NumPy perceptual hashing (dHash) and near-duplicate collapsing for images."""
+
+from __future__ import annotations
+
+import numpy as np
+from PIL import Image
+
+_HASH_SIZE = 8  # 8x8 gradient bits → 64-bit hash
+
+
+def dhash(img: Image.Image) -> int:
+    """Difference hash: 64 bits of horizontal gradient sign on a 9x8 grayscale grid."""
+    small = img.convert("L").resize((_HASH_SIZE + 1, _HASH_SIZE), Image.BILINEAR)
+    px = np.asarray(small, dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_matrix(hashes: list[int]) -> np.ndarray:
+    """Pairwise Hamming distances between 64-bit hashes, as an (n, n) int array."""
+    h = np.array(hashes, dtype=np.uint64)
+    xor = h[:, None] ^ h[None, :]
+    return np.unpackbits(xor.view(np.uint8).reshape(len(h), len(h), 8), axis=-1).sum(axis=-1)
+
+
+def collapse_near_duplicates(images: list[dict], threshold: int) -> tuple[list[dict], int]:
+    """Collapse images whose dHash distance is within ``threshold`` bits.
+
+    ``images`` are dicts in priority order carrying ``dhash``, ``width`` and
+    ``height``. Each group of near-duplicates is replaced, at the position of
+    its highest-priority member, by its highest-resolution copy. Images
+    without a hash are always kept. Returns (kept, number_removed).
+    """
+    hashed = [i for i, img in enumerate(images) if img.get("dhash") is not None]
+    if len(hashed) < 2:
+        return images, 0
+
+    distances = hamming_matrix([int(images[i]["dhash"], 16) for i in hashed])
+    group_of: dict[int, int] = {}  # image index → index of its group's first member
+    for row, i in enumerate(hashed):
+        for prev_row in range(row):
+            if distances[row, prev_row] <= threshold:
+                group_of[i] = group_of[hashed[prev_row]]
+                break
+        else:
+            group_of[i] = i
+
+    best: dict[int, int] = {}
+    for i, leader in group_of.items():
+        current = best.get(leader)
+        if current is None or _pixels(images[i]) > _pixels(images[current]):
+            best[leader] = i
+
+    kept = [
+        images[best[i]] if i in best else img
+        for i, img in enumerate(images)
+        if i not in group_of or i in best
+    ]
+    return kept, len(images) - len(kept)
+
+
+def _pixels(img: dict) -> int:
+    return int(img.get("width") or 0) * int(img.get("height") or 0)
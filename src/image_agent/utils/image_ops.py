@@ -0,0 +1,107 @@
+"""Pure PIL image operations, safe to run in worker processes.
+
+Every operation takes the input buffer first and returns ``(bytes, info)``
+so the worker pool can move both through shared memory uniformly.
+"""
+
+from __future__ import annotations
+
+import io
+
+from PIL import Image
+
+from image_agent.utils.image_features import extract_features
+from image_agent.utils.image_hash import dhash
+from image_agent.utils.image_quality import score_image
+
+# Formats forwarded as-is when already within the size limit
+_PASSTHROUGH_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+# Modes fully described by their raw pixel bytes (no palette or side info)
+RAW_MODES = ("L", "RGB", "RGBA")
+
+
+def normalize_reference(raw_bytes: bytes, max_size: tuple[int, int]) -> tuple[bytes, dict]:
+    """Validate, resize, and re-encode in a single decode. Returns (bytes, info).
+
+    JPEGs are decoded straight at a reduced DCT scale via ``draft``; the one
+    ``load()`` doubles as validation (truncated/corrupt data raises). Images
+    already within ``max_size`` in an accepted format keep their original
+    bytes. ``info`` holds the mime type, source dimensions and a perceptual hash.
+    """
+    img = Image.open(io.BytesIO(raw_bytes))
+    fmt = (img.format or "").upper()
+    source_width, source_height = img.size
+    within_size = source_width <= max_size[0] and source_height <= max_size[1]
+    passthrough = within_size and fmt in _PASSTHROUGH_FORMATS
+
+    if fmt == "JPEG":
+        if passthrough:
+            # Pixels are only needed for the hash: decode at 1/8 scale
+            img.draft("L", (source_width // 8, source_height // 8))
+        elif not within_size:
+            # Decode at the smallest DCT scale that still covers the target size
+            scale = min(max_size[0] / source_width, max_size[1] / source_height)
+            img.draft(img.mode, (round(source_width * scale), round(source_height * scale)))
+    img.load()
+
+    info = {"width": source_width, "height": source_height}
+    if passthrough:
+        info["dhash"] = f"{dhash(img):016x}"
+        info["mime_type"] = _PASSTHROUGH_FORMATS[fmt]
+        return raw_bytes, info
+
+    img.thumbnail(max_size, Image.LANCZOS)
+    info["dhash"] = f"{dhash(img):016x}"
+
+    if fmt not in _PASSTHROUGH_FORMATS:
+        # Convert to PNG for unsupported formats
+        fmt = "PNG"
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    info["mime_type"] = _PASSTHROUGH_FORMATS[fmt]
+    return buf.getvalue(), info
+
+
+def resize(image_bytes: bytes, max_size: tuple[int, int]) -> tuple[bytes, dict]:
+    """Resize an image to fit within max_size, preserving aspect ratio and format."""
+    img = Image.open(io.BytesIO(image_bytes))
+    fmt = img.format or "PNG"
+    img.thumbnail(max_size, Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue(), {"width": img.width, "height": img.height}
+
+
+def encode_raw(pixels: bytes, mode: str, size: tuple[int, int], fmt: str = "PNG") -> tuple[bytes, dict]:
+    """Encode raw pixel data (``Image.tobytes()``) into an image file format.
+
+    Only for ``RAW_MODES``; palette images must be converted before their
+    pixels are shipped here.
+    """
+    if mode not in RAW_MODES:
+        raise ValueError(f"encode_raw cannot rebuild mode {mode!r} from raw pixels")
+    img = Image.frombytes(mode, size, pixels)
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue(), {"width": size[0], "height": size[1]}
+
+
+def features(image_bytes: bytes, palette_size: int = 5) -> tuple[bytes, dict]:
+    """Local palette / tone / framing features; no output bytes."""
+    return b"", extract_features(image_bytes, palette_size=palette_size)
+
+
+def quality(image_bytes: bytes, width: int | None = None, height: int | None = None) -> tuple[bytes, dict]:
+    """Local quality metrics and combined score; no output bytes."""
+    return b"", score_image(image_bytes, width=width, height=height)
+
+
+# Operations addressable by name from ImageWorkerPool.submit()
+OPERATIONS = {
+    "normalize_reference": normalize_reference,
+    "resize": resize,
+    "encode_raw": encode_raw,
+    "features": features,
+    "quality": quality,
+}
@@ -0,0 +1,175 @@
+"""Process pool for CPU-bound image work, with shared-memory buffer transfer.
+
+PIL decode/resize/encode holds the GIL for most of its runtime, so running
+it on threads keeps one core busy while the rest idle. ``ImageWorkerPool``
+runs the operations in ``image_ops.OPERATIONS`` on a ``ProcessPoolExecutor``.
+Input and output buffers travel through ``multiprocessing.shared_memory``
+rather than being pickled. Small inputs run inline, where IPC would cost
+more than the work itself.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing import shared_memory
+from typing import Any
+
+from image_agent.config import get_settings
+from image_agent.utils.image_ops import OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+
+def _to_shared(data: bytes) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    return shm
+
+
+def _worker(op: str, in_name: str, in_size: int, args: tuple) -> tuple[str, int, dict]:
+    """Worker-process entry: read input from shared memory, write output back.
+
+    Workers share the parent's resource tracker, so segments created here
+    stay tracked until the parent unlinks them (or cleans up on exit).
+    """
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    try:
+        data = bytes(shm_in.buf[:in_size])
+    finally:
+        shm_in.close()
+
+    out, info = OPERATIONS[op](data, *args)
+
+    # Ownership passes to the parent, which unlinks after copying out
+    shm_out = _to_shared(out)
+    shm_out.close()
+    return shm_out.name, len(out), info
+
+
+class ImageWorkerPool:
+    """Submit named image operations to worker processes (or run them inline)."""
+
+    def __init__(self, *, max_workers: int, inline_threshold: int) -> None:
+        self.max_workers = max_workers
+        self.inline_threshold = inline_threshold
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._disabled = max_workers <= 0
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        with self._lock:
+            if self._disabled:
+                return None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def submit(self, op: str, data: bytes, *args: Any) -> Future:
+        """Run ``OPERATIONS[op](data, *args)``; the Future resolves to (bytes, info)."""
+        if op not in OPERATIONS:
+            raise KeyError(f"Unknown image operation: {op}")
+
+        executor = None if len(data) < self.inline_threshold else self._get_executor()
+        if executor is None:
+            return self._run_inline(op, data, args)
+
+        shm_in = _to_shared(data)
+        try:
+            remote = executor.submit(_worker, op, shm_in.name, len(data), args)
+        except BrokenProcessPool:
+            self._release(shm_in)
+            self._mark_broken()
+            return self._run_inline(op, data, args)
+
+        result: Future = Future()
+
+        def _done(fut: Future) -> None:
+            self._release(shm_in)
+            try:
+                out_name, out_size, info = fut.result()
+            except BrokenProcessPool:
+                self._mark_broken()
+                inline = self._run_inline(op, data, args)
+                inline.add_done_callback(lambda f: _copy_future(f, result))
+                return
+            except BaseException as exc:  # surface worker errors to the caller
+                result.set_exception(exc)
+                return
+            shm_out = shared_memory.SharedMemory(name=out_name)
+            try:
+                result.set_result((bytes(shm_out.buf[:out_size]), info))
+            finally:
+                self._release(shm_out)
+
+        remote.add_done_callback(_done)
+        return result
+
+    def run(self, op: str, data: bytes, *args: Any) -> tuple[bytes, dict]:
+        """Blocking convenience wrapper around ``submit``."""
+        return self.submit(op, data, *args).result()
+
+    async def arun(self, op: str, data: bytes, *args: Any) -> tuple[bytes, dict]:
+        """Await an operation from async code."""
+        return await asyncio.wrap_future(self.submit(op, data, *args))
+
+    @staticmethod
+    def _run_inline(op: str, data: bytes, args: tuple) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(OPERATIONS[op](data, *args))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+    @staticmethod
+    def _release(shm: shared_memory.SharedMemory) -> None:
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _mark_broken(self) -> None:
+        logger.warning("Image worker pool is broken; running image work in-process")
+        with self._lock:
+            self._disabled = True
+            self._executor = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _copy_future(source: Future, target: Future) -> None:
+    exc = source.exception()
+    if exc is not None:
+        target.set_exception(exc)
+    else:
+        target.set_result(source.result())
+
+
+@lru_cache
+def get_image_pool() -> ImageWorkerPool:
+    """Return the process-wide image worker pool."""
+    settings = get_settings()
+    workers = settings.image_pool_workers
+    if workers < 0 or not settings.image_pool_enabled:
+        workers = 0
+    elif workers == 0:
+        workers = max(1, (os.cpu_count() or 2) - 1)
+    return ImageWorkerPool(
+        max_workers=workers,
+        inline_threshold=settings.image_pool_inline_threshold_bytes,
+    )
@@ -0,0 +1,120 @@
+"""Local NumPy quality score for decoded reference images.
+
+Combines resolution, Laplacian-variance sharpness, luminance entropy,
+letterbox/border detection and a rough text/watermark density estimate
+into a single 0-1 score used to rank and prune reference candidates.
+"""
+
+from __future__ import annotations
+
+import io
+
+import numpy as np
+from PIL import Image
+
+_ANALYSIS_SIZE = 512  # text strokes vanish at smaller sizes
+_BLOCK = 8
+_TARGET_PIXELS = 1024 * 1024  # full resolution credit at ~1 MP
+
+# Relative weight of each metric in the combined score
+_WEIGHTS = {"resolution": 0.25, "sharpness": 0.35, "entropy": 0.2, "content": 0.2}
+
+
+def _gray(data: bytes) -> np.ndarray:
+    img = Image.open(io.BytesIO(data))
+    img.draft("L", (_ANALYSIS_SIZE, _ANALYSIS_SIZE))
+    img = img.convert("L")
+    img.thumbnail((_ANALYSIS_SIZE, _ANALYSIS_SIZE), Image.BILINEAR)
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def laplacian_variance(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian; low values mean blur."""
+    lap = (
+        -4 * gray[1:-1, 1:-1]
+        + gray[:-2, 1:-1] + gray[2:, 1:-1]
+        + gray[1:-1, :-2] + gray[1:-1, 2:]
+    )
+    return float(lap.var())
+
+
+def entropy(gray: np.ndarray) -> float:
+    """Shannon entropy of the 8-bit luminance histogram, scaled to 0-1."""
+    hist = np.bincount((gray * 255).astype(np.uint8).ravel(), minlength=256).astype(np.float64)
+    p = hist[hist > 0] / hist.sum()
+    return max(0.0, float(-(p * np.log2(p)).sum() / 8.0))
+
+
+def border_fraction(gray: np.ndarray, tolerance: float = 0.02) -> float:
+    """Share of the frame taken by uniform bars on any side (letterbox / pillarbox)."""
+    h, w = gray.shape
+    row_flat = gray.std(axis=1) < tolerance
+    col_flat = gray.std(axis=0) < tolerance
+
+    def run(flags: np.ndarray) -> int:
+        # Length of the leading run of True values
+        return int(np.argmin(flags)) if not flags.all() else len(flags)
+
+    top, bottom = run(row_flat), run(row_flat[::-1])
+    left, right = run(col_flat), run(col_flat[::-1])
+    content_h = max(h - top - bottom, 0)
+    content_w = max(w - left - right, 0)
+    return 1.0 - (content_h * content_w) / float(h * w)
+
+
+def text_density(gray: np.ndarray) -> float:
+    """Rough share of 8x8 blocks that look like overlaid text or watermark strokes.
+
+    Text blocks are high-contrast, flip sign around their mean many times
+    per row (strokes), and are bimodal — pixels sit near the block's
+    darkest or brightest value. Photographic texture and noise fail the
+    bimodality test; smooth areas fail the contrast test.
+    """
+    h, w = (d - d % _BLOCK for d in gray.shape)
+    if h == 0 or w == 0:
+        return 0.0
+    blocks = gray[:h, :w].reshape(h // _BLOCK, _BLOCK, w // _BLOCK, _BLOCK).swapaxes(1, 2)
+    blocks = blocks.reshape(-1, _BLOCK, _BLOCK)
+    low = blocks.min(axis=(1, 2), keepdims=True)
+    high = blocks.max(axis=(1, 2), keepdims=True)
+    spread = high - low
+    centred = blocks - blocks.mean(axis=(1, 2), keepdims=True)
+    crossings = (np.signbit(centred[:, :, 1:]) != np.signbit(centred[:, :, :-1])).mean(axis=(1, 2))
+    bimodal = ((blocks - low < 0.2 * spread) | (high - blocks < 0.2 * spread)).mean(axis=(1, 2))
+    texty = (spread[:, 0, 0] > 0.3) & (crossings > 0.15) & (bimodal > 0.6)
+    return float(texty.mean())
+
+
+def score_image(data: bytes, *, width: int | None = None, height: int | None = None) -> dict:
+    """Score one image; ``width``/``height`` are the source dimensions if known.
+
+    Returns the individual metrics plus ``score`` in 0-1 (higher is better).
+    """
+    gray = _gray(data)
+    if width is None or height is None:
+        width, height = Image.open(io.BytesIO(data)).size
+
+    resolution = min(1.0, (width * height / _TARGET_PIXELS) ** 0.5)
+    sharpness = 1.0 - float(np.exp(-laplacian_variance(gray) / 0.002))
+    ent = entropy(gray)
+    border = border_fraction(gray)
+    text = text_density(gray)
+    # Letterbox bars and overlaid text both reduce the useful picture area
+    content = max(0.0, 1.0 - border - 2.0 * text)
+
+    score = (
+        _WEIGHTS["resolution"] * resolution
+        + _WEIGHTS["sharpness"] * sharpness
+        + _WEIGHTS["entropy"] * ent
+        + _WEIGHTS["content"] * content
+    )
+    if ent < 0.25:
+        score *= ent / 0.25  # near-blank images
+    return {
+        "score": round(max(0.0, score), 3),
+        "resolution": round(resolution, 3),
+        "sharpness": round(sharpness, 3),
+        "entropy": round(ent, 3),
+        "border": round(border, 3),
+        "text_density": round(text, 3),
+    }
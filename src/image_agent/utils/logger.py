@@ -19,6 +19,7 @@ _STAGE_COLORS: dict[str, str] = {
     "Provider": "bright_cyan",
     "Generate": "bright_green",
     "Save": "bright_white",
+    "Clients": "bright_black",
 }
 
 _STAGE_WIDTH = 12  # fixed width for alignment
@@ -0,0 +1,126 @@
+"""Content-addressed on-disk cache for normalized reference images."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+
+from image_agent.config import get_settings
+from image_agent.utils.disk_cache import open_cache
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest used to address image bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class CachedRefImage:
+    """A normalized reference image found in the cache."""
+
+    url: str
+    data: bytes  # already resized / re-encoded
+    mime_type: str
+    info: dict  # per-image facts computed at normalization (dhash, source size)
+    source_hash: str  # hash of the bytes originally downloaded
+    etag: str | None
+    last_modified: str | None
+    fresh: bool  # False → revalidate with the origin before use
+
+
+class RefImageCache:
+    """Two-level cache: URL → validators + source hash, source hash → normalized bytes.
+
+    Keying normalized bytes by the hash of the *downloaded* bytes lets
+    mirrors serving identical files share one entry, and lets a 200
+    response with unchanged content skip all PIL work.
+    """
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.urls = open_cache(
+            "ref_image_urls",
+            ttl=settings.ref_image_cache_ttl_s,
+            max_entries=settings.ref_image_cache_max_entries,
+        )
+        self.blobs = open_cache(
+            "ref_image_blobs",
+            max_bytes=settings.ref_image_cache_max_bytes,
+        )
+
+    def lookup(self, url: str) -> CachedRefImage | None:
+        """Return the cached image for a URL (possibly stale), or None."""
+        entry = self.urls.get_entry(url, allow_stale=True)
+        if entry is None:
+            return None
+        raw, _, created = entry
+        meta = json.loads(raw)
+        blob = self.get_normalized(meta["source_hash"])
+        if blob is None:
+            return None
+        data, info = blob
+        return CachedRefImage(
+            url=url,
+            data=data,
+            mime_type=info.get("mime_type", "image/png"),
+            info=info,
+            source_hash=meta["source_hash"],
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            fresh=not self.urls.is_expired(created),
+        )
+
+    def get_normalized(self, source_hash: str) -> tuple[bytes, dict] | None:
+        """Return (normalized_bytes, info) for previously seen source bytes.
+
+        ``info`` always has ``mime_type`` plus whatever was stored with it.
+        """
+        entry = self.blobs.get_entry(source_hash)
+        if entry is None:
+            return None
+        data, meta, _ = entry
+        meta.setdefault("mime_type", "image/png")
+        return data, meta
+
+    def store(
+        self,
+        url: str,
+        *,
+        source_hash: str,
+        data: bytes,
+        mime_type: str,
+        info: dict | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Record a URL's validators and its normalized bytes."""
+        self.blobs.set(source_hash, data, {**(info or {}), "mime_type": mime_type})
+        self.remember_url(url, source_hash=source_hash, etag=etag, last_modified=last_modified)
+
+    def remember_url(
+        self,
+        url: str,
+        *,
+        source_hash: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Point a URL at already-cached normalized bytes."""
+        self.urls.set_json(
+            url,
+            {"source_hash": source_hash, "etag": etag, "last_modified": last_modified},
+        )
+
+    def mark_fresh(self, url: str) -> None:
+        """Restart a URL's freshness window after a 304 Not Modified."""
+        self.urls.touch(url)
+
+
+@lru_cache
+def get_ref_image_cache() -> RefImageCache | None:
+    """Process-wide reference image cache, or None when disabled."""
+    if not get_settings().ref_image_cache_enabled:
+        return None
+    return RefImageCache()
@@ -0,0 +1,229 @@
+"""Concurrent Tavily search executor used by the research node.
+
+Sync searches run on a shared thread pool; the ``a``-prefixed variants run
+them as tasks on the caller's event loop. Both collect into the same
+``SearchOutcome`` records, and the async collector also accepts searches
+that were submitted to the thread pool (e.g. speculative ones).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any
+
+from image_agent.utils.disk_cache import DiskCache, cache_key, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Long-lived pool shared by every research run — searches are I/O bound, so
+# threads are plenty and we avoid re-creating a pool per node invocation.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="research")
+
+
+def empty_results() -> dict:
+    """Return a Tavily-shaped response with no results or images."""
+    return {"results": [], "images": []}
+
+
+@dataclass
+class SearchQuery:
+    """A single planned Tavily search."""
+
+    name: str  # pool name, e.g. "style", "factual", "canonical"
+    query: str
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SearchOutcome:
+    """Result of one search, degraded to empty results on failure/timeout."""
+
+    name: str
+    query: str
+    results: dict
+    latency: float
+    status: str  # "ok" | "cached" | "error" | "timeout"
+
+
+@dataclass
+class PendingSearch:
+    """A dispatched (or cache-satisfied) search awaiting collection."""
+
+    query: SearchQuery
+    future: Future | asyncio.Future  # thread-pool future or event-loop task
+    submitted_at: float
+    cached: bool = False
+
+
+def search_cache_key(query: SearchQuery) -> str:
+    """Cache key for a search: normalized query string plus its parameters."""
+    return cache_key(normalize_text(query.query), query.params)
+
+
+def _timed_search(client, query: SearchQuery, timeout: float) -> tuple[dict, float]:
+    """Run a single search and return (results, latency_seconds)."""
+    start = time.perf_counter()
+    results = client.search(query.query, timeout=timeout, **query.params)
+    return results, time.perf_counter() - start
+
+
+async def _atimed_search(client, query: SearchQuery, timeout: float) -> tuple[dict, float]:
+    """Async ``_timed_search`` for ``AsyncTavilyClient``."""
+    start = time.perf_counter()
+    results = await client.search(query.query, timeout=timeout, **query.params)
+    return results, time.perf_counter() - start
+
+
+def _cached_search(cache: DiskCache | None, query: SearchQuery) -> dict | None:
+    return cache.get_json(search_cache_key(query)) if cache is not None else None
+
+
+def submit_searches(
+    client,
+    queries: list[SearchQuery],
+    *,
+    per_query_timeout: float,
+    cache: DiskCache | None = None,
+) -> dict[str, PendingSearch]:
+    """Dispatch every query at once, answering from ``cache`` where possible."""
+    submitted = time.perf_counter()
+    pending: dict[str, PendingSearch] = {}
+    for q in queries:
+        cached = _cached_search(cache, q)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result((cached, 0.0))
+            pending[q.name] = PendingSearch(q, future, submitted, cached=True)
+        else:
+            future = _executor.submit(_timed_search, client, q, per_query_timeout)
+            pending[q.name] = PendingSearch(q, future, submitted)
+    return pending
+
+
+def asubmit_searches(
+    client,
+    queries: list[SearchQuery],
+    *,
+    per_query_timeout: float,
+    cache: DiskCache | None = None,
+) -> dict[str, PendingSearch]:
+    """``submit_searches`` as tasks on the running loop, for ``AsyncTavilyClient``."""
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    pending: dict[str, PendingSearch] = {}
+    for q in queries:
+        cached = _cached_search(cache, q)
+        if cached is not None:
+            future = loop.create_future()
+            future.set_result((cached, 0.0))
+            pending[q.name] = PendingSearch(q, future, submitted, cached=True)
+        else:
+            task = loop.create_task(_atimed_search(client, q, per_query_timeout))
+            pending[q.name] = PendingSearch(q, task, submitted)
+    return pending
+
+
+def _failed_outcome(name: str, item: PendingSearch, exc: BaseException) -> SearchOutcome:
+    latency = time.perf_counter() - item.submitted_at
+    if isinstance(exc, TimeoutError):
+        logger.warning("Search %r timed out after %.1fs", name, latency)
+        return SearchOutcome(name, item.query.query, empty_results(), latency, "timeout")
+    logger.warning("Search %r failed: %s", name, exc)
+    return SearchOutcome(name, item.query.query, empty_results(), latency, "error")
+
+
+def _completed_outcome(
+    name: str,
+    item: PendingSearch,
+    results: dict,
+    latency: float,
+    cache: DiskCache | None,
+) -> SearchOutcome:
+    if item.cached:
+        return SearchOutcome(name, item.query.query, results, latency, "cached")
+    results = results or empty_results()
+    if cache is not None:
+        cache.set_json(search_cache_key(item.query), results)
+    return SearchOutcome(name, item.query.query, results, latency, "ok")
+
+
+def collect_searches(
+    pending: dict[str, PendingSearch],
+    *,
+    deadline: float,
+    per_query_timeout: float,
+    cache: DiskCache | None = None,
+) -> dict[str, SearchOutcome]:
+    """Wait for submitted searches under a shared deadline (seconds from now).
+
+    A query that raises or does not finish within its own timeout (or the
+    shared deadline, whichever comes first) yields an empty result. Fresh
+    successful results are written back to ``cache``.
+    """
+    outcomes: dict[str, SearchOutcome] = {}
+    deadline_at = time.perf_counter() + deadline
+
+    for name, item in pending.items():
+        query_deadline = min(item.submitted_at + per_query_timeout, deadline_at)
+        remaining = max(0.0, query_deadline - time.perf_counter())
+        try:
+            results, latency = item.future.result(timeout=remaining)
+        except FutureTimeoutError as exc:
+            item.future.cancel()
+            outcomes[name] = _failed_outcome(name, item, exc)
+            continue
+        except Exception as exc:
+            outcomes[name] = _failed_outcome(name, item, exc)
+            continue
+        outcomes[name] = _completed_outcome(name, item, results, latency, cache)
+
+    return outcomes
+
+
+async def acollect_searches(
+    pending: dict[str, PendingSearch],
+    *,
+    deadline: float,
+    per_query_timeout: float,
+    cache: DiskCache | None = None,
+) -> dict[str, SearchOutcome]:
+    """Async ``collect_searches``; timed-out tasks are cancelled, not left running."""
+    outcomes: dict[str, SearchOutcome] = {}
+    deadline_at = time.perf_counter() + deadline
+
+    for name, item in pending.items():
+        future = item.future
+        if not isinstance(future, asyncio.Future):
+            future = asyncio.wrap_future(future)
+        query_deadline = min(item.submitted_at + per_query_timeout, deadline_at)
+        remaining = max(0.0, query_deadline - time.perf_counter())
+        try:
+            results, latency = await asyncio.wait_for(future, timeout=remaining)
+        except Exception as exc:
+            outcomes[name] = _failed_outcome(name, item, exc)
+            continue
+        outcomes[name] = _completed_outcome(name, item, results, latency, cache)
+
+    return outcomes
+
+
+def run_searches(
+    client,
+    queries: list[SearchQuery],
+    *,
+    deadline: float,
+    per_query_timeout: float,
+    cache: DiskCache | None = None,
+) -> dict[str, SearchOutcome]:
+    """Run all queries concurrently and return their outcomes keyed by name."""
+    pending = submit_searches(
+        client, queries, per_query_timeout=per_query_timeout, cache=cache
+    )
+    return collect_searches(
+        pending, deadline=deadline, per_query_timeout=per_query_timeout, cache=cache
+    )
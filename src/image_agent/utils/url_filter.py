@@ -0,0 +1,128 @@
+"""Single-pass URL filter: one compiled pattern alternation plus a domain suffix trie."""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable
+
+_TERMINAL = ""  # trie key marking the end of an excluded domain
+
+
+class DomainSuffixTrie:
+    """Match hosts against domains by reversed labels.
+
+    ``example.com`` matches ``example.com`` and every subdomain such as
+    ``cdn.img.example.com``, but not ``badexample.com``. Lookups cost one
+    dict step per host label, however many domains are loaded.
+    """
+
+    def __init__(self, domains: Iterable[str] = ()) -> None:
+        self._root: dict = {}
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain: str) -> None:
+        node = self._root
+        for label in reversed(domain.strip().lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        node[_TERMINAL] = True
+
+    def matches(self, host: str) -> bool:
+        """``host`` must already be lower-case."""
+        node = self._root
+        for label in reversed(host.rstrip(".").split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _TERMINAL in node:
+                return True
+        return False
+
+
+@dataclass
+class FilterResult:
+    """URLs that passed, in input order, plus rejection counts by reason."""
+
+    kept: list[str]
+    rejected: Counter = field(default_factory=Counter)
+
+    @property
+    def rejected_total(self) -> int:
+        return sum(self.rejected.values())
+
+
+def split_url(url: str) -> tuple[str, str, str]:
+    """Cheap lower-cased (host, path, path_and_query) split, without urllib's validation."""
+    lowered = url.lower()
+    start = lowered.find("://")
+    rest = lowered[start + 3:] if start >= 0 else lowered
+    end = len(rest)
+    for sep in "/?#":
+        i = rest.find(sep)
+        if i != -1 and i < end:
+            end = i
+    netloc, tail = rest[:end], rest[end:]
+    host = netloc.rpartition("@")[2]
+    if not host.startswith("["):  # leave IPv6 literals alone
+        host = host.partition(":")[0]
+    path_end = len(tail)
+    for sep in "?#":
+        i = tail.find(sep)
+        if i != -1 and i < path_end:
+            path_end = i
+    return host, tail[:path_end], tail
+
+
+class UrlFilter:
+    """Reject URLs by pattern, excluded host, or too-short path.
+
+    All patterns are combined into one alternation and matched against the
+    whole lower-cased URL, so each URL is scanned once however many patterns
+    exist and a pattern like ``/logo.`` still catches ``//logo.`` hosts.
+    Patterns must therefore be written in lower case; whole domains belong in
+    the domain list, where subdomains are matched too.
+    """
+
+    def __init__(
+        self,
+        bad_patterns: Iterable[str],
+        excluded_domains: Iterable[str] = (),
+        *,
+        min_path_length: int = 8,
+    ) -> None:
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in bad_patterns))
+        self.domains = DomainSuffixTrie(excluded_domains)
+        self.min_path_length = min_path_length
+
+    def reject_reason(self, url: str) -> str | None:
+        """Return why a URL is rejected ("pattern", "domain", "short_path"), or None."""
+        if self.pattern.search(url.lower()):
+            return "pattern"
+        host, path, _ = split_url(url)
+        if host and self.domains.matches(host):
+            return "domain"
+        # Paths like "/" or "/image" are generic stubs
+        if len(path.strip("/")) < self.min_path_length:
+            return "short_path"
+        return None
+
+    def is_allowed(self, url: str) -> bool:
+        return self.reject_reason(url) is None
+
+    def filter(self, urls: Iterable[str]) -> FilterResult:
+        """Filter a whole candidate list, dropping exact duplicates as well."""
+        result = FilterResult(kept=[])
+        seen: set[str] = set()
+        for url in urls:
+            if url in seen:
+                result.rejected["duplicate"] += 1
+                continue
+            seen.add(url)
+            reason = self.reject_reason(url)
+            if reason is None:
+                result.kept.append(url)
+            else:
+                result.rejected[reason] += 1
+        return result